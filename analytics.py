@@ -0,0 +1,186 @@
+"""
+Agregações incrementais sobre os posts analisados.
+
+As estruturas deste módulo são atualizadas post a post, em O(1), para que os
+painéis possam ser redesenhados sem reprocessar o conjunto de dados inteiro.
+Aqui também fica o armazenamento único dos posts da sessão (`PostStore`).
+"""
+
+from collections import defaultdict
+from datetime import datetime, timezone
+
+SENTIMENT_LABELS = ('positive', 'negative', 'neutral', 'analysis_error')
+
+# Esquema compacto do DataFrame de posts: categorias para valores muito repetidos,
+# strings apoiadas em Arrow para textos e URIs, inteiros pequenos para tópicos.
+CATEGORY_COLUMNS = ('author', 'author_handle', 'sentiment', 'lang', 'sample_stratum')
+STRING_COLUMNS = ('text', 'uri', 'reply_to')
+
+
+def parse_timestamp(value):
+    """
+    Converte o `createdAt` de um post (ISO 8601) em segundos desde a época. Retorna None se inválido.
+    """
+    if isinstance(value, datetime):
+        # Também aceita timestamps já convertidos (ex.: coluna `created_at` do DataFrame compacto).
+        parsed = value
+    elif isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    else:
+        return None
+    try:
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    except ValueError:
+        # NaT e datas fora do intervalo representável.
+        return None
+
+
+class SentimentTimeSeries:
+    """
+    Contagens de sentimento por intervalo de tempo (chave: início do intervalo,
+    a partir de `created_at`). Cada post classificado atualiza apenas o seu
+    intervalo. Intervalos maiores, múltiplos do intervalo base, são obtidos
+    reagrupando os intervalos já agregados.
+    """
+
+    def __init__(self, bucket_seconds=60):
+        self.bucket_seconds = bucket_seconds
+        self.buckets = {}
+        self.skipped = 0
+
+    def add(self, created_at, sentiment, weight=1.0):
+        ts = parse_timestamp(created_at)
+        if ts is None:
+            self.skipped += 1
+            return
+        bucket = int(ts // self.bucket_seconds) * self.bucket_seconds
+        counts = self.buckets.setdefault(bucket, {})
+        counts[sentiment] = counts.get(sentiment, 0.0) + weight
+
+    def __len__(self):
+        return len(self.buckets)
+
+    def to_frame(self, bucket_seconds=None, normalize=False):
+        """
+        Retorna um DataFrame indexado pelo início do intervalo, com uma coluna
+        por sentimento. `bucket_seconds` deve ser múltiplo do intervalo base.
+        Com `normalize=True`, os valores são percentuais de cada intervalo.
+        """
+        import pandas as pd
+
+        bucket_seconds = bucket_seconds or self.bucket_seconds
+        if bucket_seconds % self.bucket_seconds:
+            raise ValueError(f"O intervalo deve ser múltiplo de {self.bucket_seconds} segundos.")
+
+        merged = defaultdict(lambda: defaultdict(float))
+        for bucket, counts in self.buckets.items():
+            target = bucket - bucket % bucket_seconds
+            for sentiment, value in counts.items():
+                merged[target][sentiment] += value
+
+        columns = [label for label in SENTIMENT_LABELS if any(label in counts for counts in merged.values())]
+        frame = pd.DataFrame.from_dict({k: dict(v) for k, v in merged.items()}, orient='index', columns=columns).fillna(0).sort_index()
+        frame.index = pd.to_datetime(frame.index, unit='s', utc=True)
+        frame.index.name = 'bucket_start'
+        if normalize and not frame.empty:
+            frame = (frame.div(frame.sum(axis=1), axis=0) * 100).round(1)
+        return frame
+
+
+def _string_dtype():
+    try:
+        import pyarrow  # noqa: F401
+        return 'string[pyarrow]'
+    except ImportError:
+        return 'string'
+
+
+def build_posts_frame(records):
+    """
+    Monta o DataFrame de posts com tipos compactos, em vez de colunas `object`:
+    categorias para autor e sentimento, strings Arrow para texto e URIs,
+    `int16` para o tópico, booleanos nativos e datas já convertidas.
+    """
+    import pandas as pd
+
+    df = pd.DataFrame(records)
+    if df.empty:
+        return df
+    string_dtype = _string_dtype()
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in STRING_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(string_dtype)
+    if 'created_at' in df.columns:
+        df['created_at'] = pd.to_datetime(df['created_at'], errors='coerce', utc=True, format='ISO8601')
+    if 'has_images' in df.columns:
+        df['has_images'] = df['has_images'].fillna(False).astype(bool)
+    if 'topic_id' in df.columns:
+        topic_ids = df['topic_id'].fillna(-1)
+        df['topic_id'] = topic_ids.astype('int16' if topic_ids.max() < 32_000 else 'int32')
+    if 'sample_weight' in df.columns:
+        df['sample_weight'] = df['sample_weight'].astype('float32')
+    return df
+
+
+class PostStore:
+    """
+    Fonte única dos posts de uma sessão: um DataFrame compacto (ver
+    `build_posts_frame`), montado uma vez ao fim da coleta, ao qual cada
+    análise acrescenta suas colunas no próprio lugar (sentimento, texto
+    pré-processado, tópico). Tabelas, gráficos e exportação são visões sobre
+    ele; a sessão não guarda outras cópias dos posts.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        # Incrementada a cada coluna acrescentada; identifica o conteúdo (ex.: para reaproveitar exportações).
+        self.version = 0
+
+    @classmethod
+    def from_records(cls, records):
+        return cls(build_posts_frame(records))
+
+    def __len__(self):
+        return len(self.frame)
+
+    def __contains__(self, column):
+        return column in self.frame.columns
+
+    def set_column(self, name, values, dtype=None):
+        """
+        Acrescenta (ou substitui) uma coluna, alinhada às linhas do armazenamento.
+        `dtype='string'` usa strings Arrow quando disponíveis.
+        """
+        if len(values) != len(self.frame):
+            raise ValueError(f"A coluna '{name}' tem {len(values)} valores para {len(self.frame)} posts.")
+        if dtype == 'string':
+            dtype = _string_dtype()
+        self.frame[name] = values
+        if dtype:
+            self.frame[name] = self.frame[name].astype(dtype)
+        self.version += 1
+        # Visões do DataFrame (ex.: `browser.PostBrowser`) detectam colunas substituídas por esta versão.
+        self.frame.attrs['version'] = self.version
+
+
+def memory_report(df):
+    """
+    Uso de memória por coluna (bytes) com o tipo de cada uma, para exibição na interface.
+    """
+    import pandas as pd
+
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'Coluna': usage.index,
+        'Tipo': [str(df[col].dtype) for col in usage.index],
+        'Memória (KB)': (usage.values / 1024).round(1),
+    })
+    return report.sort_values('Memória (KB)', ascending=False), int(usage.sum())
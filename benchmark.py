@@ -0,0 +1,700 @@
+"""
+Benchmarks reprodutíveis das etapas do pipeline do BskyMood.
+
+Executa offline sobre um corpus multilíngue sintético e determinístico (ou um
+corpus gravado em JSONL) e mede cada etapa do pipeline em vários tamanhos de
+corpus. Os resultados são gravados em JSON para comparação entre commits.
+
+Uso:
+    python benchmark.py                              # 1k/10k/100k, todas as etapas
+    python benchmark.py --sizes 1000 --stages preprocess lang_gate
+    python benchmark.py --corpus posts.jsonl         # corpus gravado
+    python benchmark.py --backend onnx-int8 --stages sentiment backend_agreement
+    python benchmark.py --workers 8 --stages sentiment
+    python benchmark.py --stages concurrent_sentiment   # várias sessões ao mesmo tempo
+    python benchmark.py --sizes 1000 --stages shared_encoder
+    python benchmark.py --record-frames frames.pkl --record-seconds 60   # grava frames do Firehose
+    python benchmark.py --stages prefilter --frames frames.pkl            # pré-filtro de frames
+    python benchmark.py --compare base.json novo.json --threshold 0.10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import pickle
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from analytics import PostStore
+from browser import PAGE_SIZES, PostBrowser
+from collector import decode_frame, frame_has_post_creates
+from export import export_posts
+from handles import HandleCache, make_resolver, resolve_handles
+from inference import SENTIMENT_BACKENDS, SHARED_ENCODER_BACKEND, MicroBatchingService, compare_backends, load_sentiment_backend
+from main import INFERENCE_BATCH_LATENCY_MS, SENTIMENT_CHUNK_SIZE, BskyDataCollectorApp
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_RESULTS_DIR = "bench_results"
+AGREEMENT_SAMPLE = 500
+# Sessões simuladas na etapa de inferência concorrente.
+CONCURRENT_SESSIONS = 4
+# Colunas da tabela de posts com sentimento (`main.py`), renderizadas na etapa `render`.
+BENCH_PAGE_COLUMNS = ['text', 'sentiment']
+
+# Frases-base por idioma. Os posts sintéticos combinam essas frases com
+# menções, URLs, domínios, emojis e respostas, exercitando todas as regras
+# de `preprocess_text`.
+_CORPUS_PHRASES = {
+    'en': [
+        "the economy is doing great this quarter",
+        "i can't believe how bad the traffic was today",
+        "just finished reading a wonderful book about history",
+        "the new phone update broke everything again",
+        "watching the game tonight with friends",
+        "this weather is absolutely terrible",
+        "so happy for the team, what a performance",
+        "politics in this country is exhausting",
+    ],
+    'pt': [
+        "a economia está melhorando neste trimestre",
+        "não acredito como o trânsito estava ruim hoje",
+        "acabei de ler um livro maravilhoso sobre história",
+        "a nova atualização do celular quebrou tudo de novo",
+        "assistindo o jogo hoje à noite com os amigos",
+        "esse calor está insuportável no brasil",
+        "muito feliz pelo time, que atuação incrível",
+        "a política neste país é cansativa",
+    ],
+    'es': [
+        "la economía está mejorando este trimestre",
+        "no puedo creer lo malo que estaba el tráfico hoy",
+        "acabo de terminar un libro maravilloso sobre historia",
+        "la nueva actualización del teléfono rompió todo otra vez",
+        "viendo el partido esta noche con amigos",
+        "este clima es absolutamente terrible",
+        "muy feliz por el equipo, qué actuación",
+        "la política en este país es agotadora",
+    ],
+    # Idiomas descartados pelo filtro de idioma.
+    'de': ["das wetter ist heute wirklich schrecklich", "ich habe gerade ein tolles buch gelesen"],
+    'fr': ["la politique dans ce pays est épuisante", "je regarde le match ce soir avec des amis"],
+}
+_LANG_WEIGHTS = {'en': 0.45, 'pt': 0.25, 'es': 0.15, 'de': 0.08, 'fr': 0.07}
+_EMOJIS = ["😀", "😡", "🎉", "🔥", "😢", "👍", "🇧🇷", ""]
+
+
+def generate_corpus(size, seed=42):
+    """
+    Gera `size` posts sintéticos no mesmo formato de `_extract_post_data`.
+    O resultado é determinístico para um mesmo `seed`.
+    """
+    rng = random.Random(seed)
+    langs = list(_LANG_WEIGHTS)
+    weights = list(_LANG_WEIGHTS.values())
+    base_time = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    authors = [f"did:plc:{rng.getrandbits(96):024x}" for _ in range(max(1, size // 5))]
+    posts = []
+    for i in range(size):
+        lang = rng.choices(langs, weights)[0]
+        parts = rng.sample(_CORPUS_PHRASES[lang], k=min(2, len(_CORPUS_PHRASES[lang])))
+        text = ", ".join(parts)
+        if rng.random() < 0.3:
+            text = f"@user{rng.randint(0, 999)}.bsky.social {text}"
+        if rng.random() < 0.2:
+            text += f" https://example.com/{rng.randint(0, 9999)}"
+        if rng.random() < 0.1:
+            text += " veja em exemplo.com.br/noticia"
+        text += f" {rng.choice(_EMOJIS)}"
+        author = rng.choice(authors)
+        created_at = base_time + timedelta(seconds=i * 0.05 + rng.random())
+        reply_to = None
+        if posts and rng.random() < 0.35:
+            reply_to = rng.choice(posts)['uri']
+        posts.append({
+            'text': text.strip(),
+            'created_at': created_at.isoformat().replace('+00:00', 'Z'),
+            'author': author,
+            'uri': f"at://{author}/app.bsky.feed.post/{i:012x}",
+            'has_images': rng.random() < 0.15,
+            'reply_to': reply_to,
+        })
+    return posts
+
+
+def load_corpus(path, size):
+    """
+    Carrega até `size` posts de um corpus gravado em JSONL (um post por linha).
+    O corpus é repetido ciclicamente se tiver menos posts que o solicitado.
+    """
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if not records:
+        raise ValueError(f"Corpus vazio: {path}")
+    return [dict(records[i % len(records)]) for i in range(size)]
+
+
+class LexiconSentimentStandIn:
+    """
+    Substituto local do pipeline de sentimentos, usado quando o modelo não
+    pode ser baixado. Mantém a mesma interface de chamada do `transformers.pipeline`.
+    """
+
+    _POSITIVE = {'great', 'wonderful', 'happy', 'maravilhoso', 'feliz', 'incrível', 'melhorando',
+                 'mejorando', 'maravilloso', 'tolles', 'good', 'love'}
+    _NEGATIVE = {'bad', 'terrible', 'broke', 'exhausting', 'ruim', 'insuportável', 'cansativa',
+                 'quebrou', 'malo', 'agotadora', 'rompió', 'schrecklich', 'épuisante'}
+
+    def __call__(self, texts, **kwargs):
+        single = isinstance(texts, str)
+        results = [self._classify(t) for t in ([texts] if single else texts)]
+        return results
+
+    def _classify(self, text):
+        words = set(text.lower().replace(',', ' ').split())
+        score = len(words & self._POSITIVE) - len(words & self._NEGATIVE)
+        label = 'positive' if score > 0 else 'negative' if score < 0 else 'neutral'
+        return {'label': label, 'score': 1.0}
+
+
+def make_standin_embedding_model():
+    """
+    Modelo de embeddings local para o BERTopic (TF-IDF + SVD), dispensando o
+    download do sentence-transformer multilíngue.
+    """
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.pipeline import make_pipeline
+    return make_pipeline(TfidfVectorizer(), TruncatedSVD(n_components=64, random_state=42))
+
+
+class StandInPlcDirectory:
+    """
+    Diretório PLC local mínimo: responde `GET /<did>` com um documento DID
+    sintético, permitindo medir a resolução de handles sem rede.
+    """
+
+    def __init__(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        directory = self
+        self.requests = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                directory.requests += 1
+                did = self.path.lstrip('/')
+                doc = {
+                    'id': did,
+                    'alsoKnownAs': [f"at://{did.rsplit(':', 1)[-1][:12]}.bsky.social"],
+                    'verificationMethod': [{
+                        'id': f"{did}#atproto", 'type': 'Multikey', 'controller': did,
+                        'publicKeyMultibase': 'zQ3shXjHeiBuRCKmM36cuYnm7YEMzhGnCmCyW92sRJ9pribSF',
+                    }],
+                    'service': [{'id': '#atproto_pds', 'type': 'AtprotoPersonalDataServer', 'serviceEndpoint': 'http://localhost'}],
+                }
+                body = json.dumps(doc).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+def make_bench_app():
+    """
+    Cria uma instância do aplicativo sem inicializar a interface do Streamlit,
+    expondo apenas os métodos de processamento.
+    """
+    app = BskyDataCollectorApp.__new__(BskyDataCollectorApp)
+    app.sentiment_pipeline = None
+    app.topic_model = None
+    return app
+
+
+def load_sentiment_pipeline(offline, backend='pytorch', workers=1):
+    """
+    Carrega o backend de sentimentos real ou, se offline/indisponível, o substituto léxico.
+    Retorna o pipeline e o nome do backend efetivamente usado.
+    """
+    if not offline:
+        try:
+            name = backend if workers == 1 else f"{backend} x{workers} processos"
+            return load_sentiment_backend(backend, num_workers=workers), name
+        except Exception as e:
+            print(f"Aviso: modelo de sentimentos indisponível ({e}). Usando substituto local.")
+    return LexiconSentimentStandIn(), "standin:lexicon"
+
+
+# --- Etapas ------------------------------------------------------------------
+# Cada etapa recebe (ctx, posts) e retorna um dicionário opcional de métricas extras.
+
+def stage_preprocess(ctx, posts):
+    app = ctx['app']
+    for post in posts:
+        app.preprocess_text(post['text'])
+
+
+def stage_lang_gate(ctx, posts):
+    app = ctx['app']
+    accepted = sum(1 for post in posts if app._lang_selector(post['text']))
+    return {'accepted_ratio': round(accepted / len(posts), 4)}
+
+
+def stage_sentiment(ctx, posts):
+    # Mesmo caminho de `analyze_sentiment`: pré-processamento e envio em blocos ao modelo.
+    app = ctx['app']
+    pipe = ctx['sentiment_pipeline']
+    texts = [t for t in (app.preprocess_text(post['text']) for post in posts) if t.strip()]
+    chunk_size = SENTIMENT_CHUNK_SIZE * ctx['workers']
+    for start in range(0, len(texts), chunk_size):
+        pipe(texts[start:start + chunk_size], batch_size=16, truncation=True)
+
+
+def stage_backend_agreement(ctx, posts):
+    # Concordância e latência do backend selecionado em relação ao PyTorch, numa amostra do corpus.
+    if ctx['offline']:
+        raise RuntimeError("A comparação de backends requer os modelos reais (execute sem --offline).")
+    app = ctx['app']
+    texts = [app.preprocess_text(post['text']) for post in posts[:AGREEMENT_SAMPLE]]
+    reference = ctx.setdefault('reference_pipeline', load_sentiment_backend('pytorch'))
+    return compare_backends(texts, reference, ctx['sentiment_pipeline'])
+
+
+def _run_sessions(texts, call):
+    # Divide os textos entre sessões simuladas, cada uma em sua thread e enviando blocos como `analyze_sentiment`.
+    def session(share):
+        for start in range(0, len(share), SENTIMENT_CHUNK_SIZE):
+            call(share[start:start + SENTIMENT_CHUNK_SIZE])
+    threads = [threading.Thread(target=session, args=(texts[i::CONCURRENT_SESSIONS],)) for i in range(CONCURRENT_SESSIONS)]
+    t0 = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - t0
+
+
+def stage_concurrent_sentiment(ctx, posts):
+    # Várias sessões analisando ao mesmo tempo: cada uma chamando o modelo diretamente vs. pelo serviço de micro-lotes.
+    app = ctx['app']
+    pipe = ctx['sentiment_pipeline']
+    texts = [t for t in (app.preprocess_text(post['text']) for post in posts) if t.strip()]
+    direct_s = _run_sessions(texts, lambda chunk: pipe(chunk, batch_size=16, truncation=True))
+    service = ctx.get('sentiment_service') or ctx.setdefault('sentiment_service', MicroBatchingService(
+        pipe, max_batch_size=SENTIMENT_CHUNK_SIZE * ctx['workers'], max_latency=INFERENCE_BATCH_LATENCY_MS / 1000, batch_size=16, truncation=True))
+    # As métricas do serviço refletem apenas esta repetição.
+    service.reset_stats()
+    # Cada thread é um cliente distinto do serviço, como uma sessão do Streamlit.
+    service_s = _run_sessions(texts, lambda chunk: service.submit(threading.current_thread().name, chunk))
+    stats = service.stats()
+    return {
+        'sessions': CONCURRENT_SESSIONS,
+        'direct_posts_per_s': round(len(texts) / direct_s, 2) if direct_s > 0 else None,
+        'service_posts_per_s': round(len(texts) / service_s, 2) if service_s > 0 else None,
+        # Acima de 1, o serviço de micro-lotes atende mais posts por segundo que as chamadas diretas.
+        'service_speedup': round(direct_s / service_s, 3) if service_s > 0 else None,
+        'mean_batch_size': stats['mean_batch_size'],
+        'wait_p50_ms': stats['wait_p50_ms'],
+        'wait_p99_ms': stats['wait_p99_ms'],
+    }
+
+
+def stage_handles(ctx, posts):
+    # Resolução de handles contra um diretório PLC local, com cache vazio a cada repetição.
+    plc = ctx.get('plc_directory') or ctx.setdefault('plc_directory', StandInPlcDirectory())
+    requests_before = plc.requests
+    _, stats = resolve_handles([post['author'] for post in posts], HandleCache(path=None), resolver=make_resolver(plc.url))
+    return {**stats, 'plc_requests': plc.requests - requests_before}
+
+
+def stage_topics(ctx, posts):
+    from bertopic import BERTopic
+    app = ctx['app']
+    texts = [app.preprocess_text(post['text']) for post in posts]
+    kwargs = {'language': 'multilingual', 'min_topic_size': 3, 'verbose': False}
+    if ctx['offline']:
+        kwargs['embedding_model'] = make_standin_embedding_model()
+    topics, _ = BERTopic(**kwargs).fit_transform(texts)
+    return {'n_topics': len(set(topics)), 'outlier_ratio': round(topics.count(-1) / len(topics), 4)}
+
+
+def stage_shared_encoder(ctx, posts):
+    # Custo e qualidade do encoder compartilhado: sentimentos + sentence-transformer (duas codificações)
+    # vs. uma única passada do classificador, cujos embeddings alimentam o BERTopic.
+    if ctx['offline']:
+        raise RuntimeError("A comparação do encoder compartilhado requer os modelos reais (execute sem --offline).")
+    import numpy as np
+    from bertopic import BERTopic
+    from sentence_transformers import SentenceTransformer
+    from sklearn.metrics import adjusted_rand_score
+    from topics import topic_quality
+
+    app = ctx['app']
+    texts = [app.preprocess_text(post['text']) for post in posts]
+    separate = ctx.setdefault('reference_pipeline', load_sentiment_backend('pytorch'))
+    shared = ctx.get('shared_encoder') or ctx.setdefault('shared_encoder', load_sentiment_backend(SHARED_ENCODER_BACKEND))
+    sentence_model = ctx.get('sentence_model') or ctx.setdefault('sentence_model', SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2'))
+
+    t0 = time.perf_counter()
+    separate(texts, batch_size=16, truncation=True)
+    separate_embeddings = sentence_model.encode(texts, batch_size=16)
+    separate_encode_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    outputs = shared(texts, batch_size=16, truncation=True)
+    shared_embeddings = np.vstack([output['embedding'] for output in outputs])
+    shared_encode_s = time.perf_counter() - t0
+
+    results = {}
+    assignments = {}
+    for name, embeddings in (('separate', separate_embeddings), ('shared', shared_embeddings)):
+        model = BERTopic(language='multilingual', min_topic_size=3, verbose=False)
+        t0 = time.perf_counter()
+        topics, _ = model.fit_transform(texts, embeddings=embeddings)
+        results[name] = {**topic_quality(model, topics), 'fit_s': round(time.perf_counter() - t0, 4)}
+        assignments[name] = topics
+    results['separate']['encode_s'] = round(separate_encode_s, 4)
+    results['shared']['encode_s'] = round(shared_encode_s, 4)
+    return {**results, 'topic_agreement_ari': round(adjusted_rand_score(assignments['separate'], assignments['shared']), 4)}
+
+
+def _post_store(ctx, posts):
+    # Armazenamento de posts do corpus, montado uma vez e reaproveitado pelas etapas de renderização e exportação.
+    if ctx.get('post_store_posts') is not posts:
+        ctx['post_store'] = PostStore.from_records(posts)
+        ctx['post_store_posts'] = posts
+    return ctx['post_store']
+
+
+def stage_dataframe(ctx, posts):
+    # Montagem do armazenamento ao fim da coleta e as contagens das métricas gerais.
+    store = PostStore.from_records(posts)
+    df = store.frame
+    df['has_images'].sum()
+    df['reply_to'].notna().sum()
+    if 'sentiment' in df.columns:
+        df['sentiment'].value_counts()
+    return {'memory_bytes': int(df.memory_usage(deep=True, index=False).sum())}
+
+
+def stage_render(ctx, posts):
+    # Consulta e página do navegador de posts, com a serialização Arrow feita por `st.dataframe` sobre a página.
+    import pyarrow as pa
+    browser = PostBrowser(_post_store(ctx, posts).frame)
+    positions = browser.query(sort_by='created_at', ascending=False, sentiments=('negative',), text='the')
+    for page in range(1, 4):
+        pa.Table.from_pandas(browser.page(positions, page, PAGE_SIZES[1], columns=BENCH_PAGE_COLUMNS), preserve_index=False)
+    return {'matches': len(positions)}
+
+
+def stage_export(ctx, posts):
+    # Exportação em blocos do painel de download, em NDJSON compactado e em Parquet.
+    store = _post_store(ctx, posts)
+    sizes = {}
+    for fmt in ('ndjson.gz', 'parquet'):
+        path = export_posts(store.frame, fmt)
+        try:
+            sizes[f'{fmt}_bytes'] = os.path.getsize(path)
+        finally:
+            os.remove(path)
+    return sizes
+
+
+_STARTUP_SCRIPT = """
+import os
+import time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t2 = time.perf_counter()
+AppTest.from_file(os.path.abspath('main.py'), default_timeout=120).run()
+t3 = time.perf_counter()
+print(t1 - t0, t3 - t2)
+"""
+
+
+class RecordedFrame:
+    """
+    Frame do Firehose gravado (tipo e corpo), com a interface lida por `decode_frame` e pelo pré-filtro.
+    """
+
+    def __init__(self, frame_type, body):
+        self.type = frame_type
+        self.body = body
+
+
+def record_frames(path, seconds):
+    """
+    Grava os frames recebidos do Firehose durante `seconds` segundos, para a
+    etapa `prefilter`. Retorna o número de frames gravados.
+    """
+    from atproto import AsyncFirehoseSubscribeReposClient
+
+    frames = []
+
+    async def record():
+        client = AsyncFirehoseSubscribeReposClient()
+
+        async def on_message(message):
+            frames.append((message.type, message.body))
+
+        async def stop_later():
+            await asyncio.sleep(seconds)
+            await client.stop()
+
+        stopper = asyncio.create_task(stop_later())
+        await client.start(on_message)
+        stopper.cancel()
+
+    asyncio.run(record())
+    with open(path, 'wb') as f:
+        pickle.dump(frames, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return len(frames)
+
+
+def run_prefilter(frames_path, repeats):
+    """
+    Mede, em tempo de CPU, a decodificação completa de todos os frames
+    gravados e a mesma decodificação precedida do pré-filtro
+    (`frame_has_post_creates`), conferindo que os posts extraídos são os mesmos.
+    """
+    if not frames_path:
+        raise RuntimeError("A etapa 'prefilter' requer frames gravados (--frames; grave com --record-frames).")
+    with open(frames_path, 'rb') as f:
+        frames = [RecordedFrame(frame_type, body) for frame_type, body in pickle.load(f)]
+
+    def decode_all(prefilter):
+        posts = []
+        for frame in frames:
+            if prefilter and not frame_has_post_creates(frame):
+                continue
+            try:
+                posts.extend(decode_frame(frame))
+            except Exception:
+                # Frames que o hub também descartaria por erro de decodificação.
+                pass
+        return posts
+
+    results = {}
+    for name, prefilter in (('full_decode', False), ('prefiltered', True)):
+        timings = []
+        for _ in range(repeats):
+            t0 = time.process_time()
+            posts = decode_all(prefilter)
+            timings.append(time.process_time() - t0)
+        median = statistics.median(timings)
+        results[name] = {
+            'median_s': round(median, 6), 'min_s': round(min(timings), 6), 'max_s': round(max(timings), 6),
+            'frames_per_s': round(len(frames) / median, 2) if median > 0 else None, 'posts': len(posts), 'repeats': repeats,
+        }
+    rejected = sum(1 for frame in frames if not frame_has_post_creates(frame))
+    full_s, prefiltered_s = results['full_decode']['median_s'], results['prefiltered']['median_s']
+    results['prefiltered'].update({
+        'frames': len(frames),
+        'rejected_frames': rejected,
+        'rejected_pct': round(rejected / len(frames) * 100, 2) if frames else None,
+        'cpu_saved_pct': round((1 - prefiltered_s / full_s) * 100, 2) if full_s > 0 else None,
+        'same_posts': results['prefiltered']['posts'] == results['full_decode']['posts'],
+    })
+    return results
+
+
+def run_startup(repeats):
+    """
+    Mede, em processos novos (inicialização a frio), o tempo de importação do
+    `main.py` e o tempo até a primeira renderização completa do script.
+    """
+    imports, renders = [], []
+    for _ in range(repeats):
+        out = subprocess.check_output([sys.executable, '-c', _STARTUP_SCRIPT], text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        import_s, render_s = map(float, out.strip().splitlines()[-1].split())
+        imports.append(import_s)
+        renders.append(render_s)
+    return {
+        'import_main': {'median_s': round(statistics.median(imports), 6), 'min_s': round(min(imports), 6), 'max_s': round(max(imports), 6), 'repeats': repeats},
+        'first_render': {'median_s': round(statistics.median(renders), 6), 'min_s': round(min(renders), 6), 'max_s': round(max(renders), 6), 'repeats': repeats},
+    }
+
+
+STAGES = {
+    'preprocess': stage_preprocess,
+    'lang_gate': stage_lang_gate,
+    'sentiment': stage_sentiment,
+    'backend_agreement': stage_backend_agreement,
+    'concurrent_sentiment': stage_concurrent_sentiment,
+    'handles': stage_handles,
+    'topics': stage_topics,
+    'shared_encoder': stage_shared_encoder,
+    'dataframe': stage_dataframe,
+    'render': stage_render,
+    'export': stage_export,
+}
+# As etapas 'startup' e 'prefilter' (sobre frames gravados) independem do tamanho do corpus e são medidas uma única vez por execução.
+STAGE_CHOICES = ['startup', 'prefilter', *STAGES]
+DEFAULT_STAGES = [name for name in STAGE_CHOICES if name not in ('prefilter', 'backend_agreement', 'concurrent_sentiment', 'shared_encoder')]
+
+
+def _with_sentiment(posts, seed):
+    rng = random.Random(seed)
+    labels = ['positive', 'negative', 'neutral']
+    return [dict(post, sentiment=rng.choice(labels)) for post in posts]
+
+
+def run_stage(name, ctx, posts, repeats):
+    """
+    Executa uma etapa `repeats` vezes e retorna as métricas de tempo.
+    """
+    fn = STAGES[name]
+    timings = []
+    extra = {}
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        extra = fn(ctx, posts) or {}
+        timings.append(time.perf_counter() - t0)
+    median = statistics.median(timings)
+    return {
+        'median_s': round(median, 6),
+        'min_s': round(min(timings), 6),
+        'max_s': round(max(timings), 6),
+        'posts_per_s': round(len(posts) / median, 2) if median > 0 else None,
+        'repeats': repeats,
+        **extra,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def run_benchmarks(sizes, stages, repeats, seed, corpus_path, offline, backend='pytorch', workers=1, frames_path=None):
+    """
+    Executa as etapas selecionadas em cada tamanho de corpus e retorna o relatório completo.
+    """
+    ctx = {'app': make_bench_app(), 'offline': offline, 'sentiment_pipeline': None, 'workers': workers}
+    model_name = None
+    if {'sentiment', 'backend_agreement', 'concurrent_sentiment'} & set(stages):
+        ctx['sentiment_pipeline'], model_name = load_sentiment_pipeline(offline, backend, workers)
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': seed,
+        'corpus': corpus_path or 'synthetic',
+        'frames': frames_path,
+        'offline': offline,
+        'sentiment_backend': model_name,
+        'results': {},
+    }
+    if 'startup' in stages:
+        print("startup...", flush=True)
+        report['results']['startup'] = run_startup(repeats)
+    if 'prefilter' in stages:
+        print("prefilter...", flush=True)
+        try:
+            report['results']['prefilter'] = run_prefilter(frames_path, repeats)
+        except Exception as e:
+            report['results']['prefilter'] = {'error': str(e)}
+            print(f"prefilter falhou: {e}")
+    stages = [name for name in stages if name not in ('startup', 'prefilter')]
+    for size in sizes:
+        posts = load_corpus(corpus_path, size) if corpus_path else generate_corpus(size, seed)
+        posts_with_sentiment = _with_sentiment(posts, seed)
+        report['results'][str(size)] = {}
+        for name in stages:
+            stage_posts = posts_with_sentiment if name in ('dataframe', 'render', 'export') else posts
+            print(f"[{size}] {name}...", flush=True)
+            try:
+                report['results'][str(size)][name] = run_stage(name, ctx, stage_posts, repeats)
+            except Exception as e:
+                report['results'][str(size)][name] = {'error': str(e)}
+                print(f"[{size}] {name} falhou: {e}")
+    return report
+
+
+def compare_reports(base_path, new_path, threshold):
+    """
+    Compara dois relatórios e imprime as variações de tempo por etapa.
+    Retorna o número de regressões acima de `threshold` (fração, ex.: 0.10 = 10%).
+    """
+    with open(base_path, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+
+    regressions = 0
+    print(f"{'tamanho':>8}  {'etapa':<12} {'base (s)':>10} {'novo (s)':>10} {'variação':>9}")
+    for size, stages in new['results'].items():
+        for name, metrics in stages.items():
+            base_metrics = base['results'].get(size, {}).get(name)
+            if not base_metrics or 'median_s' not in base_metrics or 'median_s' not in metrics:
+                continue
+            old, cur = base_metrics['median_s'], metrics['median_s']
+            delta = (cur - old) / old if old else 0.0
+            flag = ''
+            if delta > threshold:
+                flag = '  REGRESSÃO'
+                regressions += 1
+            print(f"{size:>8}  {name:<12} {old:>10.4f} {cur:>10.4f} {delta:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks das etapas do pipeline do BskyMood.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Tamanhos de corpus (número de posts).")
+    parser.add_argument('--stages', nargs='+', choices=STAGE_CHOICES, default=DEFAULT_STAGES, help="Etapas a medir.")
+    parser.add_argument('--repeats', type=int, default=3, help="Repetições por etapa (mediana reportada).")
+    parser.add_argument('--seed', type=int, default=42, help="Semente do corpus sintético.")
+    parser.add_argument('--corpus', help="Corpus gravado em JSONL no formato dos posts coletados.")
+    parser.add_argument('--offline', action='store_true', help="Usa modelos substitutos locais em vez de baixar modelos.")
+    parser.add_argument('--backend', choices=SENTIMENT_BACKENDS, default='pytorch', help="Backend de inferência de sentimentos.")
+    parser.add_argument('--workers', type=int, default=1, help="Processos de inferência de sentimentos (inferência distribuída).")
+    parser.add_argument('--output', help="Arquivo JSON de saída (padrão: bench_results/<data>_<revisão>.json).")
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NOVO'), help="Compara dois relatórios JSON.")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Limite de regressão para --compare.")
+    parser.add_argument('--frames', help="Frames do Firehose gravados com --record-frames (etapa 'prefilter').")
+    parser.add_argument('--record-frames', metavar='ARQUIVO', help="Grava frames do Firehose em ARQUIVO e encerra.")
+    parser.add_argument('--record-seconds', type=int, default=60, help="Duração da gravação de frames, em segundos.")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare_reports(*args.compare, args.threshold) else 0
+    if args.record_frames:
+        count = record_frames(args.record_frames, args.record_seconds)
+        print(f"{count} frames gravados em {args.record_frames}")
+        return 0
+
+    report = run_benchmarks(args.sizes, args.stages, args.repeats, args.seed, args.corpus, args.offline, args.backend, args.workers, args.frames)
+    output = args.output
+    if not output:
+        os.makedirs(DEFAULT_RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = os.path.join(DEFAULT_RESULTS_DIR, f"{stamp}_{report['git_revision'] or 'nogit'}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Resultados gravados em {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Navegação paginada pelos posts coletados.
+
+Ordenação, filtros e paginação são feitos no servidor, e apenas a página
+visível é enviada ao navegador. As ordenações de cada coluna e o resultado
+da última consulta ficam em cache, então trocar de página custa apenas o
+recorte, independentemente do tamanho da coleta.
+"""
+
+import numpy as np
+
+PAGE_SIZES = (25, 50, 100, 250)
+
+
+def frame_signature(df):
+    """
+    Identifica o conteúdo do DataFrame de posts: muda quando chegam posts ou quando uma análise acrescenta
+    (ou substitui) colunas, o que `analytics.PostStore` registra em `df.attrs['version']`.
+    """
+    return len(df), tuple(df.columns), df.attrs.get('version')
+
+
+class PostBrowser:
+    """
+    Consultas sobre o DataFrame de posts que retornam posições (não cópias):
+    filtros por sentimento, tópico e texto, ordenação estável por qualquer
+    coluna e recorte da página pedida.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.signature = frame_signature(df)
+        self._orders = {}
+        self._last_query = None
+        self._last_positions = None
+
+    def bind(self, df):
+        """
+        Associa o DataFrame da execução atual. Se o conteúdo for o mesmo, os caches são mantidos.
+        """
+        signature = frame_signature(df)
+        if signature != self.signature:
+            self.signature = signature
+            self._orders = {}
+            self._last_query = None
+            self._last_positions = None
+        self.df = df
+
+    def _order(self, sort_by, ascending):
+        key = (sort_by, ascending)
+        if key not in self._orders:
+            if sort_by is None:
+                order = np.arange(len(self.df))
+                if not ascending:
+                    order = order[::-1]
+            else:
+                column = self.df[sort_by].reset_index(drop=True)
+                order = column.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+            self._orders[key] = order
+        return self._orders[key]
+
+    def query(self, sort_by=None, ascending=True, sentiments=(), topics=(), text=''):
+        """
+        Retorna as posições (em ordem de exibição) dos posts que passam pelos filtros.
+        """
+        key = (sort_by, ascending, tuple(sentiments), tuple(topics), text)
+        if key == self._last_query:
+            return self._last_positions
+
+        df = self.df
+        mask = np.ones(len(df), dtype=bool)
+        if sentiments and 'sentiment' in df.columns:
+            mask &= df['sentiment'].isin(sentiments).to_numpy(dtype=bool)
+        if topics and 'topic_id' in df.columns:
+            mask &= df['topic_id'].isin(topics).to_numpy(dtype=bool)
+        if text and 'text' in df.columns:
+            mask &= df['text'].str.contains(text, case=False, regex=False, na=False).to_numpy(dtype=bool, na_value=False)
+
+        order = self._order(sort_by, ascending)
+        self._last_positions = order[mask[order]]
+        self._last_query = key
+        return self._last_positions
+
+    def page(self, positions, page, page_size, columns=None):
+        """
+        Recorta a página `page` (a partir de 1) das posições retornadas por `query`.
+        """
+        start = (page - 1) * page_size
+        frame = self.df.iloc[positions[start:start + page_size]]
+        return frame[columns] if columns else frame
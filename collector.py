@@ -0,0 +1,357 @@
+"""
+Serviço de coleta compartilhado do BskyMood.
+
+Uma única conexão com o Firehose por processo: cada frame é decodificado uma
+vez e os posts resultantes são distribuídos para as assinaturas das sessões
+do Streamlit, cada uma com seus próprios filtros, janela de tempo e buffer.
+O custo de banda e CPU não cresce com o número de sessões.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from atproto import CAR, parse_subscribe_repos_message
+from langdetect import detect
+
+# Idiomas mantidos pelo filtro de idioma da coleta.
+SUPPORTED_LANGUAGES = ('en', 'pt', 'es')
+POST_COLLECTION = 'app.bsky.feed.post'
+COMMIT_FRAME_TYPE = '#commit'
+
+
+def detect_language(text):
+    """
+    Detecta o idioma do texto. Retorna None se não for possível detectar.
+    """
+    try:
+        return detect(text)
+    except Exception:
+        return None
+
+
+def extract_post_data(commit, op):
+    """
+    Extrai os dados relevantes de um post (skeet) a partir do objeto CAR.
+    """
+    car = CAR.from_bytes(commit.blocks)
+    author_handle = commit.repo
+
+    for record in car.blocks.values():
+        if isinstance(record, dict) and record.get('$type') == POST_COLLECTION:
+            return {
+                'text': record.get('text', ''),
+                'created_at': record.get('createdAt', ''),
+                'author': author_handle,
+                'uri': f'at://{commit.repo}/{op.path}',
+                'has_images': 'embed' in record,
+                'reply_to': record.get('reply', {}).get('parent', {}).get('uri')
+            }
+    return None
+
+
+class Subscription:
+    """
+    Assinatura de uma sessão no serviço de coleta: recebe os posts que passam
+    pelos seus filtros enquanto sua janela de tempo estiver aberta. O buffer é
+    limitado; se a sessão não consumir a tempo, os posts excedentes são
+    descartados e contabilizados em `dropped`.
+    """
+
+    def __init__(self, hub, filters=None, duration=None, maxsize=100_000):
+        self.hub = hub
+        self.filters = filters
+        self.started_at = time.time()
+        self.ends_at = self.started_at + duration if duration else None
+        self.buffer = queue.Queue(maxsize=maxsize)
+        self.received = 0
+        self.dropped = 0
+        self.closed = False
+
+    @property
+    def expired(self):
+        return self.closed or (self.ends_at is not None and time.time() >= self.ends_at)
+
+    def accepts_author(self, author, posts=1):
+        """
+        Filtro de autor da sessão, aplicado ao DID do commit antes da decodificação
+        do frame. `posts` é o número de posts criados no frame, para a contagem.
+        """
+        return not self.filters or self.filters.accept_author(author, posts)
+
+    def accepts_text(self, text):
+        """
+        Filtros de texto da sessão, aplicados aos posts decodificados dos frames que a sessão aceitou.
+        """
+        return not self.filters or self.filters.accept_text(text)
+
+    def offer(self, post):
+        try:
+            self.buffer.put_nowait(post)
+            self.received += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def drain(self, max_items=None):
+        """
+        Retira os posts disponíveis no buffer, sem bloquear.
+        """
+        items = []
+        while max_items is None or len(items) < max_items:
+            try:
+                items.append(self.buffer.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def close(self):
+        self.closed = True
+        self.hub.unsubscribe(self)
+
+
+def frame_repo(message):
+    """
+    DID do repositório (autor) de um frame de commit, lido do corpo sem decodificar o commit.
+    """
+    body = getattr(message, 'body', None)
+    return body.get('repo') if isinstance(body, dict) else None
+
+
+def frame_has_post_creates(message):
+    """
+    Pré-filtro barato, aplicado antes de `decode_frame`: lê apenas o tipo do
+    frame (cabeçalho) e os caminhos das operações do commit, sem validar o
+    commit nem decodificar o CAR. Descarta eventos de identidade, conta,
+    handle e tombstone e commits sem criação de posts (curtidas, follows,
+    reposts), que são a maior parte do tráfego do Firehose.
+    """
+    if getattr(message, 'type', None) != COMMIT_FRAME_TYPE:
+        return False
+    body = getattr(message, 'body', None)
+    ops = body.get('ops') if isinstance(body, dict) else None
+    if not ops:
+        return False
+    prefix = POST_COLLECTION + '/'
+    return any(op.get('action') == 'create' and (op.get('path') or '').startswith(prefix) for op in ops)
+
+
+def count_post_creates(message):
+    """
+    Número de posts criados em um frame de commit, pelos caminhos das operações
+    (sem decodificar o CAR); 0 para os demais frames.
+    """
+    if getattr(message, 'type', None) != COMMIT_FRAME_TYPE:
+        return 0
+    body = getattr(message, 'body', None)
+    ops = body.get('ops') if isinstance(body, dict) else None
+    prefix = POST_COLLECTION + '/'
+    return sum(1 for op in ops or () if op.get('action') == 'create' and (op.get('path') or '').startswith(prefix))
+
+
+def decode_frame(message):
+    """
+    Decodifica um frame do Firehose e retorna os posts criados nele (sem idioma).
+    Executada fora do loop de eventos, pois é uma etapa intensiva em CPU.
+    """
+    commit = parse_subscribe_repos_message(message)
+    if not hasattr(commit, 'ops'):
+        return []
+    posts = []
+    for op in commit.ops:
+        if op.action == 'create' and op.path.startswith(POST_COLLECTION + '/'):
+            post_data = extract_post_data(commit, op)
+            if post_data:
+                posts.append(post_data)
+    return posts
+
+
+class FirehoseHub:
+    """
+    Mantém uma única conexão com o Firehose enquanto houver assinaturas ativas
+    e distribui os posts decodificados entre elas.
+
+    A ingestão é um pipeline asyncio em uma thread própria, com etapas de
+    recebimento, decodificação, filtragem e entrega ligadas por filas
+    limitadas. Frames sem criação de posts (`frame_has_post_creates`) e
+    frames cujo autor nenhuma sessão aceita são descartados já no
+    recebimento, antes de entrar na fila: só é decodificado o que ao menos
+    uma sessão vai receber. Decodificação e detecção de idioma rodam em um executor, e o
+    recebimento nunca espera pelas etapas seguintes: se a fila de frames
+    estiver cheia, o frame é descartado e contabilizado.
+    """
+
+    def __init__(self, client_factory=None, queue_size=10_000, decode_workers=4, executor_workers=4):
+        self.client_factory = client_factory
+        self.queue_size = queue_size
+        self.decode_workers = decode_workers
+        self.executor_workers = executor_workers
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        # Cópia imutável das assinaturas ativas, lida sem lock no recebimento de cada frame e refeita
+        # apenas ao assinar, cancelar ou quando a janela de alguma assinatura se encerra (`_next_expiry`).
+        self._snapshot = ()
+        self._next_expiry = float('inf')
+        self._loop = None
+        self._client = None
+        self._thread = None
+        self._queues = {}
+        self.frames = 0
+        self.skipped_frames = 0
+        self.author_rejected_frames = 0
+        self.dropped_frames = 0
+        self.posts_decoded = 0
+        self.errors = 0
+
+    def subscribe(self, filters=None, duration=None, maxsize=100_000):
+        subscription = Subscription(self, filters=filters, duration=duration, maxsize=maxsize)
+        with self._lock:
+            self._subscriptions.add(subscription)
+            self._refresh_snapshot()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+            self._refresh_snapshot()
+            self._stop_if_idle()
+
+    def _stop_if_idle(self):
+        # Sem assinantes: encerra a conexão até a próxima coleta. Deve ser chamado com o lock adquirido.
+        if not self._subscriptions and self._client is not None and self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._client.stop(), self._loop)
+            self._client = None
+
+    def _refresh_snapshot(self):
+        # Deve ser chamado com o lock adquirido.
+        self._snapshot = tuple(self._subscriptions)
+        self._next_expiry = min((s.ends_at for s in self._subscriptions if s.ends_at is not None), default=float('inf'))
+
+    def _active_subscriptions(self):
+        if time.time() >= self._next_expiry:
+            with self._lock:
+                # Assinaturas com a janela encerrada deixam de receber posts; o buffer continua disponível para a sessão.
+                self._subscriptions = {s for s in self._subscriptions if not s.expired}
+                self._refresh_snapshot()
+                self._stop_if_idle()
+        return self._snapshot
+
+    @property
+    def active_subscriptions(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+    def _run(self):
+        while True:
+            asyncio.run(self._main())
+            # Uma sessão pode ter assinado enquanto a conexão anterior era encerrada.
+            with self._lock:
+                if not self._subscriptions:
+                    self._thread = None
+                    return
+            time.sleep(1)
+
+    async def _main(self):
+        from atproto import AsyncFirehoseSubscribeReposClient
+
+        self._loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.executor_workers, thread_name_prefix='bsky-ingest')
+        frames = asyncio.Queue(maxsize=self.queue_size)
+        decoded = asyncio.Queue(maxsize=self.queue_size)
+        accepted = asyncio.Queue(maxsize=self.queue_size)
+        self._queues = {'frames': frames, 'decoded': decoded, 'accepted': accepted}
+
+        stages = [asyncio.create_task(self._decode_stage(frames, decoded, executor)) for _ in range(self.decode_workers)]
+        stages.append(asyncio.create_task(self._filter_stage(decoded, accepted, executor)))
+        stages.append(asyncio.create_task(self._sink_stage(accepted)))
+
+        async def on_message(message):
+            self.frames += 1
+            post_creates = count_post_creates(message)
+            if not post_creates:
+                self.skipped_frames += 1
+                return
+            # Filtros de autor de cada sessão, pelo DID do commit: o frame segue com as sessões que o aceitaram.
+            repo = frame_repo(message)
+            targets = [s for s in self._active_subscriptions() if s.accepts_author(repo, post_creates)]
+            if not targets:
+                self.author_rejected_frames += 1
+                return
+            try:
+                frames.put_nowait((message, targets))
+            except asyncio.QueueFull:
+                self.dropped_frames += 1
+
+        client = (self.client_factory or AsyncFirehoseSubscribeReposClient)()
+        with self._lock:
+            self._client = client
+        try:
+            await client.start(on_message)
+        except Exception as e:
+            print(f"Erro na conexão com o Firehose: {e}")
+        finally:
+            for task in stages:
+                task.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            executor.shutdown(wait=False, cancel_futures=True)
+            with self._lock:
+                if self._client is client:
+                    self._client = None
+                self._queues = {}
+
+    async def _decode_stage(self, frames, decoded, executor):
+        loop = asyncio.get_running_loop()
+        while True:
+            message, targets = await frames.get()
+            try:
+                posts = await loop.run_in_executor(executor, decode_frame, message)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error processing message in thread: {e}")
+                continue
+            self.posts_decoded += len(posts)
+            for post_data in posts:
+                await decoded.put((post_data, targets))
+
+    async def _filter_stage(self, decoded, accepted, executor):
+        """
+        Aplica os filtros de texto das sessões que aceitaram o autor do frame e,
+        só então, a detecção de idioma (uma vez por post).
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            post_data, targets = await decoded.get()
+            targets = [s for s in targets if not s.expired and s.accepts_text(post_data['text'])]
+            if not targets:
+                continue
+            lang = await loop.run_in_executor(executor, detect_language, post_data['text'])
+            if lang not in SUPPORTED_LANGUAGES:
+                continue
+            post_data['lang'] = lang
+            await accepted.put((post_data, targets))
+
+    async def _sink_stage(self, accepted):
+        while True:
+            post_data, targets = await accepted.get()
+            for subscription in targets:
+                subscription.offer(dict(post_data))
+
+    def stats(self):
+        """
+        Contadores do serviço e profundidade atual de cada fila do pipeline.
+        """
+        queues = dict(self._queues)
+        return {
+            'active_subscriptions': self.active_subscriptions,
+            'frames': self.frames,
+            'skipped_frames': self.skipped_frames,
+            'author_rejected_frames': self.author_rejected_frames,
+            'dropped_frames': self.dropped_frames,
+            'posts_decoded': self.posts_decoded,
+            'errors': self.errors,
+            'queue_depths': {name: q.qsize() for name, q in queues.items()},
+        }
@@ -0,0 +1,151 @@
+"""
+Índice das conversas (threads) formadas pelas respostas entre posts.
+
+O grafo é montado à medida que os posts chegam, a partir de `uri` e
+`reply_to`, em dicionários indexados pela URI: pai, filhos, tamanho da
+subárvore e raiz da conversa são consultados em O(1) amortizado, e os
+agregados por conversa são obtidos em um único passe, sem junções de
+DataFrames.
+"""
+
+from collections import Counter
+
+from analytics import SENTIMENT_LABELS
+
+
+class ReplyGraph:
+    """
+    Grafo de respostas dos posts coletados. Pais que não foram coletados (ex.:
+    publicados antes da coleta) entram como nós sem dados, para que as
+    respostas a um mesmo post fiquem na mesma conversa.
+
+    Inserir um post custa O(profundidade da thread), para atualizar o tamanho
+    das subárvores dos ancestrais; as consultas são O(1) amortizado.
+    """
+
+    def __init__(self):
+        self.parent = {}
+        self.children = {}
+        self.subtree_size = {}
+        self.positions = {}
+        self.weights = {}
+        self.sentiments = {}
+        self.topics = {}
+        self._roots = {}
+        self._version = 0
+        self._rollup = None
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add(self, uri, parent=None, position=None, weight=1.0):
+        """
+        Registra um post coletado. `position` é o índice do post nos dados da sessão.
+        """
+        if not uri or uri in self.parent:
+            return
+        self.parent[uri] = parent
+        self.positions[uri] = position
+        self.weights[uri] = weight
+        self._version += 1
+        # Respostas que chegaram antes deste post já estão contadas na sua subárvore.
+        self.subtree_size[uri] = self.subtree_size.get(uri, 0) + 1
+        if uri in self.children:
+            self._roots.clear()
+        if not parent:
+            return
+        self.children.setdefault(parent, []).append(uri)
+        delta = self.subtree_size[uri]
+        node, seen = parent, {uri}
+        while node and node not in seen:
+            seen.add(node)
+            self.subtree_size[node] = self.subtree_size.get(node, 0) + delta
+            node = self.parent.get(node)
+
+    def add_posts(self, posts, start=0):
+        """
+        Registra uma lista de posts, com posições a partir de `start`.
+        """
+        for position, post in enumerate(posts, start=start):
+            self.add(post.get('uri'), post.get('reply_to'), position, post.get('sample_weight', 1.0))
+
+    def annotate(self, uri, sentiment=None, topic=None):
+        """
+        Associa o sentimento e/ou o tópico de um post, para os agregados por conversa.
+        """
+        if sentiment is not None:
+            self.sentiments[uri] = sentiment
+        if topic is not None:
+            self.topics[uri] = topic
+        self._version += 1
+
+    def root(self, uri):
+        """
+        Raiz da conversa do post: o ancestral mais alto conhecido, coletado ou não.
+        """
+        path, node = [], uri
+        while node not in self._roots:
+            parent = self.parent.get(node)
+            if not parent or parent in path or parent == uri:
+                break
+            path.append(node)
+            node = parent
+        root = self._roots.get(node, node)
+        for visited in path:
+            self._roots[visited] = root
+        self._roots[node] = root
+        return root
+
+    def thread(self, uri):
+        """
+        URIs dos posts coletados da conversa que contém `uri`, em ordem de profundidade.
+        """
+        root = self.root(uri)
+        stack, collected, seen = [root], [], set()
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            if node in self.parent:
+                collected.append(node)
+            stack.extend(reversed(self.children.get(node, ())))
+        return collected
+
+    def conversations(self, min_posts=2):
+        """
+        Agregados por conversa: número de posts, respostas, proporção de cada
+        sentimento (ponderada pelo peso amostral) e tópico predominante.
+        O resultado fica em cache até o próximo post ou anotação.
+        """
+        if self._rollup is None or self._rollup[0] != self._version:
+            rollup = {}
+            for uri in self.parent:
+                root = self.root(uri)
+                entry = rollup.get(root)
+                if entry is None:
+                    entry = rollup[root] = {'posts': 0, 'sentiments': Counter(), 'topics': Counter()}
+                entry['posts'] += 1
+                if uri in self.sentiments:
+                    entry['sentiments'][self.sentiments[uri]] += self.weights.get(uri, 1.0)
+                topic = self.topics.get(uri)
+                if topic is not None and topic != -1:
+                    entry['topics'][topic] += 1
+            self._rollup = (self._version, rollup)
+
+        rows = []
+        for root, entry in self._rollup[1].items():
+            if entry['posts'] < min_posts:
+                continue
+            total = sum(entry['sentiments'].values())
+            row = {
+                'conversation': root,
+                'posts': entry['posts'],
+                'root_collected': root in self.parent,
+                'dominant_topic': entry['topics'].most_common(1)[0][0] if entry['topics'] else None,
+            }
+            for label in SENTIMENT_LABELS:
+                row[label] = round(entry['sentiments'][label] / total * 100, 1) if total else None
+            rows.append(row)
+        rows.sort(key=lambda row: row['posts'], reverse=True)
+        return rows
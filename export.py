@@ -0,0 +1,207 @@
+"""
+Exportação em streaming dos posts coletados.
+
+Os registros são gravados em disco em blocos de tamanho fixo, sem montar o
+conteúdo inteiro em memória. Formatos suportados: NDJSON (opcionalmente
+gzip), JSON compactado com gzip ou zstd, e Parquet.
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import time
+import weakref
+
+EXPORT_FORMATS = {
+    'ndjson': {'label': 'NDJSON', 'extension': 'ndjson', 'mime': 'application/x-ndjson'},
+    'ndjson.gz': {'label': 'NDJSON (gzip)', 'extension': 'ndjson.gz', 'mime': 'application/gzip'},
+    'json.gz': {'label': 'JSON (gzip)', 'extension': 'json.gz', 'mime': 'application/gzip'},
+    'json.zst': {'label': 'JSON (zstd)', 'extension': 'json.zst', 'mime': 'application/zstd'},
+    'parquet': {'label': 'Parquet', 'extension': 'parquet', 'mime': 'application/vnd.apache.parquet'},
+}
+DEFAULT_CHUNK_SIZE = 5_000
+EXPORT_PREFIX = 'bsky_export_'
+# Arquivos de sessões encerradas sem limpeza (ex.: servidor reiniciado) são removidos após este prazo.
+STALE_EXPORT_SECONDS = 24 * 60 * 60
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ExportFile:
+    """
+    Arquivo exportado de uma sessão, com a assinatura dos dados que contém.
+    É apagado ao ser descartado ou quando o objeto deixa de existir (ex.: a
+    sessão do Streamlit é encerrada sem reiniciar a coleta).
+    """
+
+    def __init__(self, path, signature=None):
+        self.path = path
+        self.signature = signature
+        self._finalizer = weakref.finalize(self, _remove_file, path)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def discard(self):
+        self._finalizer()
+
+
+def prune_stale_exports(directory=None, max_age=STALE_EXPORT_SECONDS):
+    """
+    Remove arquivos de exportação antigos deixados no diretório temporário.
+    """
+    directory = directory or tempfile.gettempdir()
+    now = time.time()
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith(EXPORT_PREFIX) and os.path.isfile(path) and now - os.path.getmtime(path) > max_age:
+            _remove_file(path)
+
+
+def _json_default(value):
+    # Escalares do numpy/pandas (ex.: `topic_id`) e timestamps.
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def _dumps(row):
+    return json.dumps(row, ensure_ascii=False, default=_json_default)
+
+
+def _open_text_sink(path, fmt):
+    if fmt == 'ndjson':
+        return open(path, 'w', encoding='utf-8')
+    if fmt in ('ndjson.gz', 'json.gz'):
+        return gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+    if fmt == 'json.zst':
+        try:
+            import zstandard
+        except ImportError as e:
+            raise RuntimeError("A exportação em zstd requer o pacote 'zstandard'.") from e
+        return zstandard.open(path, 'wt', cctx=zstandard.ZstdCompressor(level=6), encoding='utf-8')
+    raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+
+
+def _frame_records(frame):
+    # Registros de um bloco do DataFrame de posts, com valores ausentes como None e datas em ISO 8601.
+    records = frame.astype(object).where(frame.notna(), None).to_dict('records')
+    for record in records:
+        for col, value in record.items():
+            if hasattr(value, 'isoformat'):
+                record[col] = value.isoformat()
+    return records
+
+
+def _chunks(rows, chunk_size, columns, as_records=True):
+    # As colunas de um DataFrame são selecionadas por bloco, sem copiar o DataFrame inteiro.
+    for start in range(0, len(rows), chunk_size):
+        if hasattr(rows, 'iloc'):
+            chunk = rows.iloc[start:start + chunk_size][columns]
+            yield start, _frame_records(chunk) if as_records else chunk
+        else:
+            yield start, rows[start:start + chunk_size]
+
+
+def _write_json(rows, path, fmt, chunk_size, progress, columns):
+    as_array = fmt in ('json.gz', 'json.zst')
+    with _open_text_sink(path, fmt) as sink:
+        if as_array:
+            sink.write('[')
+        for start, chunk in _chunks(rows, chunk_size, columns):
+            lines = [_dumps(row) for row in chunk]
+            if as_array:
+                sink.write((',' if start else '') + ','.join(lines))
+            else:
+                sink.write('\n'.join(lines) + '\n')
+            progress(start + len(chunk))
+        if as_array:
+            sink.write(']')
+
+
+def _chunk_table(chunk, columns, schema=None):
+    import pyarrow as pa
+    if hasattr(chunk, 'iloc'):
+        return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+    return pa.Table.from_pydict({col: [row.get(col) for row in chunk] for col in columns}, schema=schema)
+
+
+def _parquet_schema(first_chunk, columns):
+    """
+    Esquema Arrow inferido do primeiro bloco (dos tipos do DataFrame, quando
+    for o caso). Colunas sem nenhum valor no bloco são gravadas como texto.
+    """
+    import pyarrow as pa
+    schema = _chunk_table(first_chunk, columns).schema
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            schema = schema.set(i, field.with_type(pa.string()))
+    return schema
+
+
+def _write_parquet(rows, path, chunk_size, progress, columns):
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for start, chunk in _chunks(rows, chunk_size, columns, as_records=False):
+            if writer is None:
+                schema = _parquet_schema(chunk, columns)
+                writer = pq.ParquetWriter(path, schema, compression='zstd')
+            writer.write_table(_chunk_table(chunk, columns, schema))
+            progress(start + len(chunk))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        # Sem posts não há bloco de onde inferir os tipos: as colunas são gravadas como texto.
+        import pyarrow as pa
+        pq.write_table(pa.table({col: pa.array([], pa.string()) for col in columns}), path, compression='zstd')
+
+
+def export_posts(rows, fmt, chunk_size=DEFAULT_CHUNK_SIZE, progress_callback=None, directory=None, columns=None):
+    """
+    Grava `rows` (DataFrame de posts ou lista de dicionários) em um arquivo
+    temporário no formato `fmt`, processando `chunk_size` registros por vez.
+    `columns` restringe as colunas exportadas de um DataFrame.
+    `progress_callback(n_gravados, total)` é chamado a cada bloco.
+    Retorna o caminho do arquivo gerado.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt}")
+    total = len(rows)
+
+    def progress(done):
+        if progress_callback:
+            progress_callback(done, total)
+
+    if hasattr(rows, 'columns'):
+        columns = list(columns or rows.columns)
+    else:
+        # Ordem estável das colunas: as do primeiro post e, depois, as que surgirem nos demais.
+        columns = []
+        for row in rows:
+            for col in row:
+                if col not in columns:
+                    columns.append(col)
+
+    prune_stale_exports(directory)
+    fd, path = tempfile.mkstemp(prefix=EXPORT_PREFIX, suffix='.' + EXPORT_FORMATS[fmt]['extension'], dir=directory)
+    os.close(fd)
+    try:
+        if fmt == 'parquet':
+            _write_parquet(rows, path, chunk_size, progress, columns)
+        else:
+            _write_json(rows, path, fmt, chunk_size, progress, columns)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
@@ -0,0 +1,141 @@
+"""
+Resolução de DIDs para handles dos autores.
+
+Os DIDs são deduplicados, consultados em um cache LRU persistente com TTL e,
+apenas os ausentes, resolvidos concorrentemente em um pool limitado de
+threads. O custo cresce com o número de autores únicos, não de posts.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from inference import DEFAULT_CACHE_DIR
+
+DEFAULT_HANDLE_DB = os.path.join(DEFAULT_CACHE_DIR, 'handles.sqlite3')
+HANDLE_TTL = 24 * 60 * 60
+# DIDs que não puderam ser resolvidos são lembrados por menos tempo.
+NEGATIVE_TTL = 10 * 60
+
+
+class HandleCache:
+    """
+    Cache LRU em memória, com TTL por entrada, apoiado em um arquivo SQLite
+    para persistir os handles entre reinícios do aplicativo.
+    """
+
+    def __init__(self, path=DEFAULT_HANDLE_DB, capacity=100_000, ttl=HANDLE_TTL, negative_ttl=NEGATIVE_TTL):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS handles (did TEXT PRIMARY KEY, handle TEXT, expires_at REAL)')
+            self._db.commit()
+
+    def _remember(self, did, handle, expires_at):
+        self._memory[did] = (handle, expires_at)
+        self._memory.move_to_end(did)
+        if len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def get_many(self, dids):
+        """
+        Retorna `{did: handle}` para os DIDs presentes e válidos no cache
+        (handle `None` indica DID sabidamente não resolvível).
+        """
+        now = time.time()
+        found = {}
+        missing = []
+        with self._lock:
+            for did in dids:
+                entry = self._memory.get(did)
+                if entry and entry[1] > now:
+                    self._memory.move_to_end(did)
+                    found[did] = entry[0]
+                else:
+                    self._memory.pop(did, None)
+                    missing.append(did)
+
+            if self._db and missing:
+                # Consulta em lotes para respeitar o limite de parâmetros do SQLite.
+                for start in range(0, len(missing), 500):
+                    batch = missing[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT did, handle, expires_at FROM handles WHERE did IN ({','.join('?' * len(batch))}) AND expires_at > ?",
+                        (*batch, now),
+                    ).fetchall()
+                    for did, handle, expires_at in rows:
+                        self._remember(did, handle, expires_at)
+                        found[did] = handle
+        return found
+
+    def set_many(self, resolved):
+        """
+        Grava `{did: handle}` no cache; handles `None` usam o TTL negativo.
+        """
+        now = time.time()
+        rows = [(did, handle, now + (self.ttl if handle else self.negative_ttl)) for did, handle in resolved.items()]
+        with self._lock:
+            for did, handle, expires_at in rows:
+                self._remember(did, handle, expires_at)
+            if self._db and rows:
+                self._db.executemany('INSERT OR REPLACE INTO handles (did, handle, expires_at) VALUES (?, ?, ?)', rows)
+                self._db.commit()
+
+    def __len__(self):
+        return len(self._memory)
+
+
+def make_resolver(plc_url=None, timeout=5):
+    """
+    Cria o resolvedor de DIDs do atproto. `plc_url` permite apontar para um
+    diretório PLC local (ex.: um servidor de testes).
+    """
+    from atproto import IdResolver
+    return IdResolver(plc_url=plc_url or os.environ.get('BSKYMOOD_PLC_URL'), timeout=timeout)
+
+
+def _resolve_one(resolver, did):
+    try:
+        return did, resolver.did.resolve_atproto_data(did).handle
+    except Exception:
+        return did, None
+
+
+def resolve_handles(dids, cache, resolver=None, max_workers=16, progress_callback=None):
+    """
+    Resolve um conjunto de DIDs para handles. Os DIDs são deduplicados; os
+    presentes no cache não geram requisições e os demais são resolvidos em
+    paralelo com no máximo `max_workers` requisições simultâneas.
+    Retorna `({did: handle}, estatísticas)`.
+    """
+    unique = list(dict.fromkeys(d for d in dids if d))
+    handles = cache.get_many(unique)
+    missing = [did for did in unique if did not in handles]
+
+    resolved = {}
+    if missing:
+        resolver = resolver or make_resolver()
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for done, (did, handle) in enumerate(pool.map(lambda d: _resolve_one(resolver, d), missing), start=1):
+                resolved[did] = handle
+                if progress_callback:
+                    progress_callback(done, len(missing))
+        cache.set_many(resolved)
+        handles.update(resolved)
+
+    stats = {
+        'unique_authors': len(unique),
+        'cache_hits': len(unique) - len(missing),
+        'resolved': sum(1 for h in resolved.values() if h),
+        'failed': sum(1 for h in resolved.values() if not h),
+    }
+    return handles, stats
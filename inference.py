@@ -0,0 +1,476 @@
+"""
+Backends de inferência para a análise de sentimentos do BskyMood.
+
+Todos os backends seguem a interface de chamada do `transformers.pipeline`:
+recebem um texto (ou uma lista de textos) e retornam uma lista de
+dicionários `{'label': ..., 'score': ...}`.
+"""
+
+import heapq
+import multiprocessing
+import os
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+SENTIMENT_MODEL = "lxyuan/distilbert-base-multilingual-cased-sentiments-student"
+SENTIMENT_BACKENDS = ('pytorch', 'onnx-int8')
+# Backend do modo de encoder compartilhado: também devolve o embedding de cada post (ver `SharedEncoderPipeline`).
+SHARED_ENCODER_BACKEND = 'pytorch-shared'
+DEFAULT_CACHE_DIR = os.environ.get('BSKYMOOD_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'bskymood'))
+
+
+def load_sentiment_backend(backend='pytorch', model_name=SENTIMENT_MODEL, num_threads=None, cache_dir=None, num_workers=1):
+    """
+    Carrega o backend de sentimentos solicitado.
+
+    - 'pytorch': pipeline padrão do `transformers` (fp32).
+    - 'onnx-int8': modelo exportado para ONNX, quantizado dinamicamente em int8
+      e executado no ONNX Runtime (CPU).
+
+    Com `num_workers` > 1, o backend é replicado em processos separados e os
+    posts são divididos entre eles (ver `ShardedSentimentPipeline`).
+    """
+    if num_workers and num_workers > 1:
+        return ShardedSentimentPipeline(backend, num_workers, model_name=model_name, threads_per_worker=num_threads, cache_dir=cache_dir)
+    if backend == 'pytorch':
+        from transformers import pipeline
+        if num_threads:
+            import torch
+            torch.set_num_threads(num_threads)
+        return pipeline(model=model_name, return_all_scores=False)
+    if backend == 'onnx-int8':
+        return OnnxSentimentPipeline(model_name, cache_dir=cache_dir, num_threads=num_threads)
+    if backend == SHARED_ENCODER_BACKEND:
+        return SharedEncoderPipeline(model_name, num_threads=num_threads)
+    raise ValueError(f"Backend de sentimentos desconhecido: {backend}. Opções: {', '.join((*SENTIMENT_BACKENDS, SHARED_ENCODER_BACKEND))}")
+
+
+def _onnx_model_dir(model_name, cache_dir=None):
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, 'onnx', model_name.replace('/', '__'))
+
+
+def export_quantized_onnx(model_name=SENTIMENT_MODEL, cache_dir=None):
+    """
+    Exporta o modelo para ONNX e aplica quantização dinâmica int8.
+    A conversão é feita apenas uma vez; as execuções seguintes reutilizam o
+    modelo gravado em cache. Retorna o diretório com modelo, tokenizer e config.
+    """
+    target_dir = _onnx_model_dir(model_name, cache_dir)
+    quantized_path = os.path.join(target_dir, 'model.int8.onnx')
+    if os.path.exists(quantized_path):
+        return target_dir
+
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    os.makedirs(target_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    # Tokenizer e config são gravados antes do modelo: a presença de `model.int8.onnx` marca o cache como completo.
+    tokenizer.save_pretrained(target_dir)
+    model.config.save_pretrained(target_dir)
+    model.config.return_dict = False
+    model.eval()
+
+    # Arquivos intermediários com nomes por processo, para que sessões convertendo ao mesmo tempo não colidam.
+    fd, fp32_path = tempfile.mkstemp(prefix='model.fp32.', suffix='.onnx', dir=target_dir)
+    os.close(fd)
+    fd, tmp_path = tempfile.mkstemp(prefix='model.int8.', suffix='.onnx.tmp', dir=target_dir)
+    os.close(fd)
+    dummy = tokenizer(["texto de exemplo para exportação"], return_tensors='pt')
+    with torch.no_grad():
+        torch.onnx.export(
+            model, (dummy['input_ids'], dummy['attention_mask']), fp32_path,
+            input_names=['input_ids', 'attention_mask'], output_names=['logits'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'logits': {0: 'batch'},
+            },
+            opset_version=14,
+        )
+
+    try:
+        # Grava em arquivo temporário e renomeia por último, para que uma conversão
+        # interrompida não deixe um modelo corrompido ou um cache incompleto.
+        quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, quantized_path)
+    finally:
+        for path in (fp32_path, tmp_path):
+            if os.path.exists(path):
+                os.remove(path)
+    return target_dir
+
+
+class OnnxSentimentPipeline:
+    """
+    Classificador de sentimentos sobre o ONNX Runtime, com a mesma interface
+    de chamada do `transformers.pipeline`.
+    """
+
+    def __init__(self, model_name=SENTIMENT_MODEL, cache_dir=None, num_threads=None, max_length=512):
+        import onnxruntime as ort
+        from transformers import AutoConfig, AutoTokenizer
+
+        model_dir = export_quantized_onnx(model_name, cache_dir)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.id2label = AutoConfig.from_pretrained(model_dir).id2label
+        self.max_length = max_length
+
+        sess_options = ort.SessionOptions()
+        sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        sess_options.intra_op_num_threads = num_threads or 0  # 0 = padrão do ONNX Runtime
+        sess_options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, 'model.int8.onnx'), sess_options, providers=['CPUExecutionProvider']
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def __call__(self, texts, batch_size=8, **kwargs):
+        import numpy as np
+
+        if isinstance(texts, str):
+            texts = [texts]
+        results = []
+        for start in range(0, len(texts), batch_size):
+            batch = list(texts[start:start + batch_size])
+            encoded = self.tokenizer(batch, padding=True, truncation=True, max_length=self.max_length, return_tensors='np')
+            feeds = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+            logits = self.session.run(None, feeds)[0]
+            logits = logits - logits.max(axis=1, keepdims=True)
+            probs = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+            for row in probs:
+                idx = int(row.argmax())
+                results.append({'label': self.id2label[idx], 'score': float(row[idx])})
+        return results
+
+
+class SharedEncoderPipeline:
+    """
+    Classificador de sentimentos em PyTorch que, na mesma passada do
+    transformer, devolve também um embedding de cada post (média das
+    ativações da última camada, normalizada) em `'embedding'`. Esses
+    embeddings são reaproveitados pela modelagem de tópicos, que assim não
+    precisa codificar os posts de novo com outro modelo.
+    """
+
+    def __init__(self, model_name=SENTIMENT_MODEL, num_threads=None, max_length=512):
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        self.model.eval()
+        self.id2label = self.model.config.id2label
+        self.max_length = max_length
+
+    def __call__(self, texts, batch_size=8, **kwargs):
+        import torch
+
+        if isinstance(texts, str):
+            texts = [texts]
+        results = []
+        with torch.inference_mode():
+            for start in range(0, len(texts), batch_size):
+                batch = list(texts[start:start + batch_size])
+                encoded = self.tokenizer(batch, padding=True, truncation=True, max_length=self.max_length, return_tensors='pt')
+                output = self.model(**encoded, output_hidden_states=True)
+                probs = torch.softmax(output.logits, dim=-1)
+                mask = encoded['attention_mask'].unsqueeze(-1).to(output.hidden_states[-1].dtype)
+                pooled = (output.hidden_states[-1] * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+                pooled = torch.nn.functional.normalize(pooled, dim=-1).numpy().astype('float32')
+                scores, indices = probs.max(dim=-1)
+                for score, idx, embedding in zip(scores.tolist(), indices.tolist(), pooled):
+                    results.append({'label': self.id2label[idx], 'score': score, 'embedding': embedding})
+        return results
+
+
+# Backend carregado em cada processo de trabalho do pool de inferência.
+_shard_backend = None
+
+
+def _init_shard_worker(backend, model_name, num_threads, cache_dir):
+    """
+    Inicializa um processo de trabalho: fixa o número de threads do torch e carrega sua própria cópia do modelo.
+    """
+    global _shard_backend
+    import torch
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+    _shard_backend = load_sentiment_backend(backend, model_name, num_threads=num_threads, cache_dir=cache_dir)
+
+
+def _run_shard(indices, texts, batch_size):
+    """
+    Classifica um shard de textos no processo de trabalho e devolve os índices originais junto aos resultados.
+    """
+    return indices, _shard_backend(texts, batch_size=batch_size, truncation=True)
+
+
+def balance_shards(lengths, num_shards):
+    """
+    Divide os índices em `num_shards` grupos com soma de tokens aproximadamente igual
+    (heurística LPT: maiores primeiro, sempre no shard menos carregado).
+    Dentro de cada shard, os índices ficam ordenados por tamanho para reduzir padding.
+    """
+    heap = [(0, shard) for shard in range(num_shards)]
+    shards = [[] for _ in range(num_shards)]
+    for idx in sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True):
+        load, shard = heapq.heappop(heap)
+        shards[shard].append(idx)
+        heapq.heappush(heap, (load + lengths[idx], shard))
+    return [sorted(shard, key=lambda i: lengths[i]) for shard in shards if shard]
+
+
+class ShardedSentimentPipeline:
+    """
+    Inferência de sentimentos distribuída em um pool de processos. Cada processo
+    mantém sua própria cópia do modelo com um número fixo de threads do torch;
+    os posts são balanceados pelo total de tokens e os resultados voltam na
+    ordem de entrada.
+    """
+
+    def __init__(self, backend='pytorch', num_workers=2, model_name=SENTIMENT_MODEL, threads_per_worker=None, cache_dir=None):
+        from transformers import AutoTokenizer
+
+        if backend == 'onnx-int8':
+            # Converte antes de iniciar o pool, para que os processos não disputem a exportação.
+            export_quantized_onnx(model_name, cache_dir)
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // num_workers)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            # 'spawn' evita herdar as threads do Streamlit e do torch do processo principal.
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_shard_worker,
+            initargs=(backend, model_name, self.threads_per_worker, cache_dir),
+        )
+
+    def __call__(self, texts, batch_size=16, **kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+        texts = list(texts)
+        if not texts:
+            return []
+        lengths = [len(ids) for ids in self.tokenizer(texts, truncation=True)['input_ids']]
+        futures = [
+            self.executor.submit(_run_shard, shard, [texts[i] for i in shard], batch_size)
+            for shard in balance_shards(lengths, self.num_workers)
+        ]
+        results = [None] * len(texts)
+        for future in futures:
+            indices, outputs = future.result()
+            for idx, output in zip(indices, outputs):
+                results[idx] = output
+        return results
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _BatchRequest:
+    # Uma chamada de um cliente: os textos, os resultados preenchidos aos poucos e o sinal de conclusão.
+    __slots__ = ('caller', 'texts', 'results', 'remaining', 'done', 'error', 'submitted_at')
+
+    def __init__(self, caller, texts):
+        self.caller = caller
+        self.texts = texts
+        self.results = [None] * len(texts)
+        self.remaining = len(texts)
+        self.done = threading.Event()
+        self.error = None
+        self.submitted_at = time.perf_counter()
+
+
+class MicroBatchingService:
+    """
+    Serviço de inferência compartilhado entre as sessões. Os textos enviados
+    por todos os clientes entram em filas por cliente e são agrupados em
+    micro-lotes: um lote é executado quando atinge `max_batch_size` ou quando
+    o texto mais antigo na fila espera `max_latency` segundos. Os lotes são
+    montados em rodízio entre os clientes, para que uma sessão com muitos
+    posts não atrase as demais, e sob carga os lotes crescem e a vazão total
+    aumenta em vez de as sessões disputarem o modelo.
+    """
+
+    def __init__(self, pipeline, max_batch_size=64, max_latency=0.05, batch_size=16, history=2048, **call_kwargs):
+        self.pipeline = pipeline
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.batch_size = batch_size
+        self.call_kwargs = call_kwargs
+        self._queues = {}
+        self._pending = 0
+        self._cond = threading.Condition()
+        self.batches = 0
+        self.items = 0
+        self.submitted = Counter()
+        self.completed = Counter()
+        self._waits = deque(maxlen=history)
+        self._batch_sizes = deque(maxlen=history)
+        self._thread = threading.Thread(target=self._run, name='bsky-inference', daemon=True)
+        self._thread.start()
+
+    def client(self, caller):
+        """
+        Retorna uma função com a interface de um pipeline, associada ao cliente `caller` (ex.: o ID da sessão).
+        """
+        def call(texts, **kwargs):
+            return self.submit(caller, texts)
+        return call
+
+    def submit(self, caller, texts):
+        """
+        Enfileira os textos do cliente e espera os resultados, na ordem de entrada.
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        texts = list(texts)
+        if not texts:
+            return []
+        request = _BatchRequest(caller, texts)
+        with self._cond:
+            queue = self._queues.setdefault(caller, deque())
+            for index in range(len(texts)):
+                queue.append((request, index, request.submitted_at))
+            self._pending += len(texts)
+            self.submitted[caller] += len(texts)
+            self._cond.notify()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.results
+
+    def _oldest_arrival(self):
+        return min(queue[0][2] for queue in self._queues.values() if queue)
+
+    def _take_batch(self):
+        # Rodízio entre os clientes com itens na fila, um item por vez, até completar o lote.
+        batch = []
+        while len(batch) < self.max_batch_size and self._pending:
+            for caller in list(self._queues):
+                queue = self._queues[caller]
+                if queue:
+                    batch.append(queue.popleft())
+                    self._pending -= 1
+                    if len(batch) >= self.max_batch_size:
+                        break
+                if not queue:
+                    del self._queues[caller]
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = self._oldest_arrival() + self.max_latency
+                while self._pending < self.max_batch_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._take_batch()
+
+            started = time.perf_counter()
+            try:
+                outputs = self.pipeline([request.texts[index] for request, index, _ in batch], batch_size=self.batch_size, **self.call_kwargs)
+                error = None
+            except Exception as e:
+                outputs, error = [None] * len(batch), e
+
+            with self._cond:
+                self.batches += 1
+                self.items += len(batch)
+                self._batch_sizes.append(len(batch))
+                for (request, index, arrived), output in zip(batch, outputs):
+                    self._waits.append(started - arrived)
+                    request.results[index] = output
+                    if error is not None:
+                        request.error = error
+                    request.remaining -= 1
+                    self.completed[request.caller] += 1
+                    if request.remaining == 0:
+                        request.done.set()
+
+    def stats(self):
+        """
+        Métricas do serviço: fila atual por cliente, lotes executados, tamanho médio dos lotes e espera na fila (p50/p99).
+        """
+        with self._cond:
+            waits = sorted(self._waits)
+            sizes = list(self._batch_sizes)
+            queued = {caller: len(queue) for caller, queue in self._queues.items() if queue}
+            return {
+                'queued': self._pending,
+                'queued_by_caller': queued,
+                'batches': self.batches,
+                'items': self.items,
+                'mean_batch_size': round(sum(sizes) / len(sizes), 2) if sizes else 0,
+                'wait_p50_ms': round(waits[len(waits) // 2] * 1000, 2) if waits else None,
+                'wait_p99_ms': round(waits[min(len(waits) - 1, int(len(waits) * 0.99))] * 1000, 2) if waits else None,
+                'callers': len(self.submitted),
+            }
+
+    def reset_stats(self):
+        """
+        Zera as métricas acumuladas (ex.: entre repetições de um benchmark); a fila não é alterada.
+        """
+        with self._cond:
+            self.batches = 0
+            self.items = 0
+            self.submitted.clear()
+            self.completed.clear()
+            self._waits.clear()
+            self._batch_sizes.clear()
+
+
+def _latency_profile(backend, texts, batch_size):
+    """
+    Mede latência por post (chamadas unitárias) e vazão em lote de um backend.
+    """
+    latencies = []
+    labels = []
+    for text in texts:
+        t0 = time.perf_counter()
+        labels.append(backend(text)[0]['label'])
+        latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    backend(list(texts), batch_size=batch_size)
+    batch_elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    return labels, {
+        'p50_ms': round(statistics.median(latencies) * 1000, 3),
+        'p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3),
+        'sequential_posts_per_s': round(len(texts) / sum(latencies), 2),
+        'batched_posts_per_s': round(len(texts) / batch_elapsed, 2) if batch_elapsed > 0 else None,
+    }
+
+
+def compare_backends(texts, reference, candidate, batch_size=16):
+    """
+    Compara um backend candidato com o backend de referência (PyTorch):
+    concordância dos rótulos e perfis de latência e vazão de cada um.
+    """
+    texts = [t for t in texts if t.strip()]
+    if not texts:
+        raise ValueError("Nenhum texto não vazio para comparar os backends.")
+    ref_labels, ref_profile = _latency_profile(reference, texts, batch_size)
+    cand_labels, cand_profile = _latency_profile(candidate, texts, batch_size)
+    agreement = sum(a == b for a, b in zip(ref_labels, cand_labels)) / len(texts)
+    return {
+        'n_texts': len(texts),
+        'agreement': round(agreement, 4),
+        'reference': ref_profile,
+        'candidate': cand_profile,
+    }
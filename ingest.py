@@ -0,0 +1,247 @@
+"""
+Etapas de ingestão executadas no caminho quente da coleta.
+
+Aqui ficam os filtros aplicados a cada post recebido do Firehose, antes da
+detecção de idioma, para descartar cedo o que não interessa ao estudo, e a
+amostragem que limita a quantidade de posts mantidos em memória.
+"""
+
+import random
+from collections import Counter
+
+import regex as re
+
+
+def _split_terms(raw):
+    """
+    Converte um texto com termos separados por vírgula ou quebra de linha em uma lista sem vazios.
+    """
+    if not raw:
+        return []
+    return [term.strip() for term in re.split(r'[,\n]', raw) if term.strip()]
+
+
+class KeywordMatcher:
+    """
+    Busca simultânea de várias palavras-chave em um único passe pelo texto.
+    Usa um autômato Aho-Corasick (`pyahocorasick`) quando disponível; caso
+    contrário, uma alternação compilada do módulo `regex`.
+    """
+
+    def __init__(self, keywords, whole_words=True):
+        self.keywords = sorted({k.casefold() for k in keywords if k.strip()})
+        self.whole_words = whole_words
+        self._automaton = None
+        self._pattern = None
+        try:
+            import ahocorasick
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+        except ImportError:
+            alternation = '|'.join(re.escape(k) for k in sorted(self.keywords, key=len, reverse=True))
+            prefix, suffix = (r'(?<!\w)', r'(?!\w)') if whole_words else ('', '')
+            self._pattern = re.compile(f"{prefix}(?:{alternation}){suffix}")
+
+    def __bool__(self):
+        return bool(self.keywords)
+
+    def find(self, text):
+        """
+        Retorna o conjunto de palavras-chave presentes no texto.
+        """
+        text = text.casefold()
+        if self._pattern is not None:
+            return set(self._pattern.findall(text))
+        found = set()
+        for end, keyword in self._automaton.iter(text):
+            start = end - len(keyword) + 1
+            if self.whole_words and ((start > 0 and text[start - 1].isalnum()) or (end + 1 < len(text) and text[end + 1].isalnum())):
+                continue
+            found.add(keyword)
+        return found
+
+
+class IngestFilters:
+    """
+    Filtros configuráveis de ingestão: listas de autores permitidos/bloqueados,
+    palavras-chave e expressões regulares, com contadores de descarte e de
+    acertos por filtro.
+
+    Um post passa se o autor for aceito e, havendo filtros de texto, se o texto
+    contiver ao menos uma palavra-chave ou casar com ao menos uma regex.
+    """
+
+    def __init__(self, keywords=(), regexes=(), allow_authors=(), deny_authors=(), whole_words=True):
+        self.keyword_matcher = KeywordMatcher(keywords, whole_words=whole_words)
+        self.regexes = [(pattern, re.compile(pattern, re.IGNORECASE)) for pattern in regexes]
+        self.allow_authors = frozenset(allow_authors)
+        self.deny_authors = frozenset(deny_authors)
+        self.counters = Counter()
+        self.keyword_hits = Counter()
+        self.regex_hits = Counter()
+
+    @classmethod
+    def from_text(cls, keywords='', regexes='', allow_authors='', deny_authors=''):
+        """
+        Cria os filtros a partir dos campos de texto da interface (termos separados por vírgula ou linha).
+        """
+        return cls(
+            keywords=_split_terms(keywords),
+            regexes=[line.strip() for line in (regexes or '').splitlines() if line.strip()],
+            allow_authors=_split_terms(allow_authors),
+            deny_authors=_split_terms(deny_authors),
+        )
+
+    @property
+    def has_text_filters(self):
+        return bool(self.keyword_matcher) or bool(self.regexes)
+
+    @property
+    def is_active(self):
+        return self.has_text_filters or bool(self.allow_authors) or bool(self.deny_authors)
+
+    def accept_author(self, did, posts=1):
+        """
+        Filtro mais barato: usa apenas o DID do commit, antes de qualquer decodificação do registro.
+        Os descartes são contados em posts (`posts` criados no commit), na mesma unidade dos filtros de texto.
+        """
+        if did in self.deny_authors:
+            self.counters['rejected_author_denied'] += posts
+            return False
+        if self.allow_authors and did not in self.allow_authors:
+            self.counters['rejected_author_not_allowed'] += posts
+            return False
+        return True
+
+    def accept_text(self, text):
+        """
+        Filtros de texto (palavras-chave e regex), aplicados antes da detecção de idioma.
+        """
+        if not self.has_text_filters:
+            self.counters['passed'] += 1
+            return True
+        matched = False
+        if self.keyword_matcher:
+            found = self.keyword_matcher.find(text)
+            if found:
+                self.keyword_hits.update(found)
+                matched = True
+        for pattern, compiled in self.regexes:
+            if compiled.search(text):
+                self.regex_hits[pattern] += 1
+                matched = True
+        self.counters['passed' if matched else 'rejected_text'] += 1
+        return matched
+
+    def stats(self):
+        """
+        Resumo dos contadores, para exibição na interface.
+        """
+        return {
+            'counters': dict(self.counters),
+            'keyword_hits': dict(self.keyword_hits.most_common()),
+            'regex_hits': dict(self.regex_hits.most_common()),
+        }
+
+
+SAMPLING_MODES = {
+    None: "Desativada",
+    'uniform': "Reservatório uniforme",
+    'lang': "Estratificada por idioma",
+    'reply': "Estratificada por resposta/original",
+}
+
+
+class ReservoirSampler:
+    """
+    Amostragem de tamanho fixo (algoritmo R de reservatório), uniforme ou
+    estratificada por idioma ou por resposta/original. A memória fica limitada
+    a `capacity` posts, independentemente da duração da coleta.
+
+    A capacidade é repartida por nivelamento: estratos com menos posts que a
+    cota comum mantêm todos os seus posts, e os demais dividem o restante
+    igualmente. Como os estratos só crescem, a cota comum nunca aumenta, e os
+    reservatórios só encolhem por descarte aleatório, o que preserva a
+    uniformidade de cada um.
+
+    Cada post mantido recebe um `sample_weight` (posts vistos / posts mantidos
+    no estrato), de modo que agregados ponderados estimem sem viés as
+    proporções da população completa.
+    """
+
+    def __init__(self, capacity, mode='uniform', seed=None):
+        if mode is None or mode not in SAMPLING_MODES:
+            raise ValueError(f"Modo de amostragem desconhecido: {mode}")
+        self.capacity = capacity
+        self.mode = mode
+        self.rng = random.Random(seed)
+        self.reservoirs = {}
+        self.seen = Counter()
+        self._sequence = 0
+
+    def _stratum(self, post):
+        if self.mode == 'lang':
+            return post.get('lang') or 'unknown'
+        if self.mode == 'reply':
+            return 'reply' if post.get('reply_to') else 'original'
+        return 'all'
+
+    def _level(self):
+        """
+        Cota comum dos estratos: o maior nível L com soma de min(vistos, L) dentro da capacidade.
+        """
+        counts = sorted(self.seen.values())
+        remaining = self.capacity
+        for i, count in enumerate(counts):
+            share = remaining // (len(counts) - i)
+            if count > share:
+                return max(1, share)
+            remaining -= count
+        return self.capacity
+
+    def add(self, post):
+        stratum = self._stratum(post)
+        self.seen[stratum] += 1
+        self._sequence += 1
+        level = self._level()
+        # Reservatórios acima da nova cota (ex.: quando surge um estrato) encolhem por descarte aleatório;
+        # o item descartado troca de lugar com o último, para remover em O(1).
+        for reservoir in self.reservoirs.values():
+            while len(reservoir) > level:
+                i = self.rng.randrange(len(reservoir))
+                reservoir[i] = reservoir[-1]
+                reservoir.pop()
+        reservoir = self.reservoirs.setdefault(stratum, [])
+        entry = (self._sequence, post)
+        if len(reservoir) < level:
+            # Abaixo da cota, o estrato ainda mantém todos os posts que viu.
+            reservoir.append(entry)
+        else:
+            j = self.rng.randrange(self.seen[stratum])
+            if j < len(reservoir):
+                reservoir[j] = entry
+
+    def items(self):
+        """
+        Retorna os posts amostrados, na ordem de chegada, com `sample_weight` e `sample_stratum`.
+        """
+        sampled = []
+        for stratum, reservoir in self.reservoirs.items():
+            weight = self.seen[stratum] / len(reservoir)
+            for sequence, post in reservoir:
+                post['sample_weight'] = weight
+                post['sample_stratum'] = stratum
+                sampled.append((sequence, post))
+        sampled.sort(key=lambda entry: entry[0])
+        return [post for _, post in sampled]
+
+    def stats(self):
+        """
+        Posts vistos, mantidos e peso amostral por estrato.
+        """
+        return {
+            stratum: {'seen': self.seen[stratum], 'kept': len(reservoir), 'weight': self.seen[stratum] / len(reservoir)}
+            for stratum, reservoir in self.reservoirs.items()
+        }
@@ -1,26 +1,102 @@
 import streamlit as st
 import pandas as pd
-from atproto import FirehoseSubscribeReposClient, parse_subscribe_repos_message, CAR, IdResolver, DidInMemoryCache
 import time
 import multiprocessing
-import threading
 import regex as re
-from langdetect import detect
-import queue
 from datetime import datetime
-from transformers import pipeline
 import emoji
-from bertopic import BERTopic
-from sklearn.feature_extraction.text import CountVectorizer
-import nltk
+import os
+import uuid
+from analytics import PostStore, SentimentTimeSeries, memory_report
+from browser import PAGE_SIZES, PostBrowser
+from collector import SUPPORTED_LANGUAGES, FirehoseHub, detect_language
+from conversations import ReplyGraph
+from export import EXPORT_FORMATS, ExportFile, export_posts
+from handles import HandleCache, make_resolver, resolve_handles
+from inference import SENTIMENT_BACKENDS, SHARED_ENCODER_BACKEND, MicroBatchingService
+from ingest import SAMPLING_MODES, IngestFilters, ReservoirSampler
+from memory import DEFAULT_BUDGET_MB, SessionMemory
+from model_zoo import DEFAULT_PROFILES_PATH, REFERENCE_MODEL, load_registered_model, load_registry, profile_models, select_model
+from profiling import DEFAULT_HISTORY, ProfileStore
+from topic_partitions import PartitionedTopicModel, fit_partitioned
+from topic_sweep import DEFAULT_GRID, expand_grid, format_config, run_sweep
+from topics import ModelResultCache, compute_topics_over_time, load_stopwords, make_vectorizer, model_fingerprint, topic_quality
+
+# Dependências pesadas (transformers, BERTopic, scikit-learn, NLTK) são importadas
+# apenas quando a etapa que as utiliza é executada, e as stopwords do NLTK são
+# baixadas uma única vez para o cache local (ver `topics.load_stopwords`).
+
+# Visualizações dos resultados da análise de tópicos.
+TOPIC_VIEWS = {
+    'sentiments': "📊 Sentimentos por Tópicos",
+    'map': "🗺️ Mapa de Tópicos",
+    'keywords': "🗝️ Palavras-Chave",
+    'hierarchy': "🌳 Hierarquia",
+    'search': "🔍 Pesquisa de Tópicos",
+    'data': "📋 Dados Coletados",
+    'time': "⏱️ Tópicos no Tempo",
+}
+
+# Intervalo base (em segundos) da série temporal de sentimentos.
+TIMESERIES_BUCKET_SECONDS = int(os.environ.get('BSKYMOOD_TIMESERIES_BUCKET', 60))
+
+# Número de posts enviados ao modelo por chamada (por processo de inferência).
+SENTIMENT_CHUNK_SIZE = 256
+
+# Espera máxima (ms) de um post na fila do serviço de inferência antes de o micro-lote ser executado.
+INFERENCE_BATCH_LATENCY_MS = int(os.environ.get('BSKYMOOD_BATCH_LATENCY_MS', 50))
+
+# Orçamento de latência (p99, ms) usado na escolha automática do modelo de sentimentos.
+SENTIMENT_LATENCY_BUDGET_MS = float(os.environ.get('BSKYMOOD_LATENCY_BUDGET_MS', 50))
+
+# Orçamento de memória de cada sessão; acima dele, caches são descartados e artefatos frios vão para o disco.
+SESSION_MEMORY_BUDGET_MB = int(os.environ.get('BSKYMOOD_SESSION_MEMORY_MB', DEFAULT_BUDGET_MB))
+
+
+@st.cache_resource(show_spinner=False)
+def get_sentiment_backend(backend, num_threads=None, num_workers=1, model=REFERENCE_MODEL):
+    """
+    Carrega o backend de sentimentos uma única vez por processo e o compartilha entre as sessões.
+    """
+    return load_registered_model(model, backend, num_threads=num_threads, num_workers=num_workers)
+
 
-# Download das Stopwords do NLTK. Este bloco é executado uma vez no início da aplicação.
-try:
-  nltk.download('stopwords', quiet=True)
-except Exception as e:
-  # Não bloquear a UI se o download falhar. Um aviso é mostrado.
-  st.toast(f"Alerta: Não foi possível baixar stopwords do NLTK: {e}. A modelagem de tópicos prosseguirá com as configurações padrão.", icon="⚠️")
-  print(f"Alerta: Não foi possível baixar stopwords do NLTK: {e}.")
+@st.cache_resource(show_spinner=False)
+def get_sentiment_service(backend, num_threads=None, num_workers=1, model=REFERENCE_MODEL):
+    """
+    Serviço de inferência do processo: agrupa os posts de todas as sessões em micro-lotes para o backend compartilhado.
+    """
+    return MicroBatchingService(
+        get_sentiment_backend(backend, num_threads, num_workers, model),
+        max_batch_size=SENTIMENT_CHUNK_SIZE * max(1, num_workers), max_latency=INFERENCE_BATCH_LATENCY_MS / 1000,
+        batch_size=16, truncation=True,
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_firehose_hub():
+    """
+    Serviço de coleta do processo: uma única conexão com o Firehose compartilhada por todas as sessões.
+    """
+    return FirehoseHub()
+
+
+@st.cache_resource(show_spinner=False)
+def get_handle_cache():
+    """
+    Cache de handles compartilhado entre as sessões e persistido em disco.
+    """
+    return HandleCache()
+
+
+@st.cache_data(show_spinner=False)
+def select_sentiment_model(budget_ms, profiles_mtime):
+    """
+    Escolha automática do modelo de sentimentos pelos perfis em cache. A
+    data de modificação do arquivo de perfis faz parte da chave, então a
+    escolha só é refeita quando `model_zoo.py` grava novos perfis.
+    """
+    return select_model(profile_models(cached_only=True), budget_ms)
 
 
 class BskyDataCollectorApp:
@@ -44,8 +120,8 @@ class BskyDataCollectorApp:
         """
         self._initialize_session_state()
         self._initialize_topic_session_state()
-        self.resolver_cache = DidInMemoryCache()
         self.sentiment_pipeline = None
+        self.sentiment_service = None
         self.topic_model = None
 
 
@@ -54,6 +130,8 @@ class BskyDataCollectorApp:
         Inicializa os estados da sessão do Streamlit para dados gerais e de coleta.
         Garante que as variáveis persistam entre as interações do usuário.
         """
+        if 'session_id' not in st.session_state:
+            st.session_state['session_id'] = uuid.uuid4().hex
         if 'data' not in st.session_state:
             st.session_state['data'] = []
         if 'collecting' not in st.session_state:
@@ -64,12 +142,26 @@ class BskyDataCollectorApp:
             st.session_state['stop_event'] = multiprocessing.Event()
         if 'start_time' not in st.session_state:
             st.session_state['start_time'] = 0.0
-        if 'data_queue' not in st.session_state:
-            st.session_state['data_queue'] = multiprocessing.Queue()
-        if 'sentiment_results' not in st.session_state:
-            st.session_state['sentiment_results'] = []
-        if 'collected_df' not in st.session_state:
-            st.session_state['collected_df'] = pd.DataFrame()
+        if 'posts' not in st.session_state:
+            st.session_state['posts'] = None
+        if 'session_memory' not in st.session_state:
+            st.session_state['session_memory'] = SessionMemory(SESSION_MEMORY_BUDGET_MB * 1024**2)
+        if 'reply_graph' not in st.session_state:
+            st.session_state['reply_graph'] = ReplyGraph()
+        if 'sentiment_backend' not in st.session_state:
+            st.session_state['sentiment_backend'] = os.environ.get('BSKYMOOD_SENTIMENT_BACKEND', 'pytorch')
+        if 'sentiment_model' not in st.session_state:
+            st.session_state['sentiment_model'] = os.environ.get('BSKYMOOD_SENTIMENT_MODEL', REFERENCE_MODEL)
+        if 'shared_encoder' not in st.session_state:
+            st.session_state['shared_encoder'] = os.environ.get('BSKYMOOD_SHARED_ENCODER', '0') == '1'
+        if 'partition_topics' not in st.session_state:
+            st.session_state['partition_topics'] = os.environ.get('BSKYMOOD_TOPIC_PARTITIONS', '0') == '1'
+        if 'profiling_enabled' not in st.session_state:
+            st.session_state['profiling_enabled'] = os.environ.get('BSKYMOOD_PROFILE', '0') == '1'
+        if 'profile_store' not in st.session_state:
+            st.session_state['profile_store'] = ProfileStore(int(os.environ.get('BSKYMOOD_PROFILE_HISTORY', DEFAULT_HISTORY)))
+        if 'sentiment_workers' not in st.session_state:
+            st.session_state['sentiment_workers'] = int(os.environ.get('BSKYMOOD_SENTIMENT_WORKERS', 1))
 
 
     def _initialize_topic_session_state(self):
@@ -84,74 +176,36 @@ class BskyDataCollectorApp:
             st.session_state['topics_analyzed'] = False
         if 'performing_topic_analysis' not in st.session_state:
             st.session_state['performing_topic_analysis'] = False
-        if 'texts_for_topic_analysis' not in st.session_state:
-            st.session_state['texts_for_topic_analysis'] = []
-
-
-    def _process_message(self, message, data_queue):
-        """
-        Processa uma única mensagem recebida do Firehose.
-        Filtra por posts criados e os coloca na fila de dados.
-        """
-        try:
-            commit = parse_subscribe_repos_message(message)
-            if not hasattr(commit, 'ops'):
-                return
-
-            for op in commit.ops:
-                if op.action == 'create' and op.path.startswith('app.bsky.feed.post/'):
-                    post_data = self._extract_post_data(commit, op)
-                    if post_data and self._lang_selector(post_data['text']):
-                        data_queue.put(post_data)
-        except Exception as e:
-            print(f"Error processing message in thread: {e}")
 
 
     def _lang_selector(self, text):
         """
         Detecta o idioma do texto e retorna True se for inglês, português ou espanhol.
         """
-        try:
-            lang = detect(text)
-            return lang in ['en', 'pt', 'es']
-        except Exception:
-            return False
+        return detect_language(text) in SUPPORTED_LANGUAGES
 
 
-    def _extract_post_data(self, commit, op):
+    def _build_ingest_filters(self, keywords_raw, regexes_raw, allow_raw, deny_raw):
         """
-        Extrai os dados relevantes de um post (skeet) a partir do objeto CAR.
+        Cria os filtros de ingestão a partir da barra lateral. Handles informados
+        nas listas de autores são convertidos em DIDs, pois o Firehose identifica
+        os autores apenas pelo DID. Retorna None se nenhum filtro foi definido.
         """
-        try:
-            car = CAR.from_bytes(commit.blocks)
-            author_handle = commit.repo
-
-            for record in car.blocks.values():
-                if isinstance(record, dict) and record.get('$type') == 'app.bsky.feed.post':
-                    return {
-                        'text': record.get('text', ''),
-                        'created_at': record.get('createdAt', ''),
-                        'author': author_handle,
-                        'uri': f'at://{commit.repo}/{op.path}',
-                        'has_images': 'embed' in record,
-                        'reply_to': record.get('reply', {}).get('parent', {}).get('uri')
-                    }
-        except Exception as e:
-            st.toast(f"Erro ao extrair dados: {e}", icon=":material/dangerous:")
-            return None
-
-
-    def _collect_messages_threaded(self, stop_event, data_queue):
-        """
-        Inicia a coleta de mensagens em uma thread separada para não bloquear a UI.
-        """
-        client = FirehoseSubscribeReposClient()
-        try:
-            client.start(lambda message: self._process_message(message, data_queue))
-        except Exception as e:
-            st.toast(f"Erro na thread de coleta: {e}", icon=":material/dangerous:")
-        finally:
-            client.stop()
+        def to_dids(raw):
+            entries = [entry.lstrip('@') for entry in re.split(r'[,\n]', raw or '') if entry.strip()]
+            dids = [entry.strip() for entry in entries if entry.strip().startswith('did:')]
+            handles = [entry.strip() for entry in entries if not entry.strip().startswith('did:')]
+            if handles:
+                resolver = make_resolver()
+                for handle in handles:
+                    did = resolver.handle.resolve(handle)
+                    if not did:
+                        raise ValueError(f"não foi possível resolver o handle '{handle}'")
+                    dids.append(did)
+            return ','.join(dids)
+
+        filters = IngestFilters.from_text(keywords_raw, regexes_raw, to_dids(allow_raw), to_dids(deny_raw))
+        return filters if filters.is_active else None
 
 
     def collect_data(self):
@@ -159,65 +213,153 @@ class BskyDataCollectorApp:
         Gerencia o processo de coleta de dados, incluindo a UI (botão de parar, status).
         """
         stop_event = st.session_state['stop_event']
-        data_queue = st.session_state['data_queue']
         st.session_state['collection_ended'] = False
 
         if st.session_state['collecting'] and not st.session_state['collection_ended']:
             stop_button_pressed = st.button("Parar Coleta", icon=":material/stop_circle:", help="Clique para parar a coleta de dados. Os dados já coletados serão mantidos na memória.")
             if stop_button_pressed:
+                # O clique interrompe a execução que estava coletando; a coleta é encerrada aqui, com os posts já recebidos.
                 st.session_state['stop_event'].set()
-                st.session_state['collecting'] = False
+                with st.status("Encerrando a coleta...") as status:
+                    subscription = st.session_state.get('subscription')
+                    if subscription:
+                        subscription.close()
+                        for post in subscription.drain():
+                            self._store_post(post)
+                    self._finalize_collection(status)
+                st.rerun()
 
         start_time = time.time()
         collection_duration = st.session_state.get('collection_duration', 30)
         collecting_data_flag = st.session_state['collecting']
 
         if collecting_data_flag:
-            collection_thread = threading.Thread(target=self._collect_messages_threaded, args=(stop_event, data_queue))
-            collection_thread.daemon = True
-            collection_thread.start()
-
-            with st.status(f"Coletando posts do Bluesky durante {collection_duration} segundos. Aguarde!") as status:
-                mensagens = [
-                    "Estabelecendo conexão com o Firehose...", "Conexão estabelecida com sucesso!",
-                    "Autenticando...", "Autenticação concluída!", "Organizando a fila...",
-                    "Atualizando lista...", "Coletando posts... Isso pode demorar alguns minutos.",
-                ]
-                for i, msg in enumerate(mensagens):
-                    status.update(label=msg)
-                    if i < len(mensagens) - 1:
-                        time.sleep(1 if i != 0 else 2)
-                        if stop_event.is_set() or (time.time() - start_time >= collection_duration):
-                            break
-                    else:
-                        while collecting_data_flag and not stop_event.is_set() and (time.time() - start_time < collection_duration):
-                            try:
-                                while not data_queue.empty():
-                                    st.session_state['data'].append(data_queue.get_nowait())
-                            except queue.Empty:
-                                pass
-                            except Exception as e:
-                                print(f"Erro ao recuperar da fila: {e}")
-                            time.sleep(0.5)
-                            collecting_data_flag = st.session_state['collecting']
-                            if not collecting_data_flag:
-                                stop_event.set()
-                try:
-                    while not data_queue.empty():
-                        st.session_state['data'].append(data_queue.get_nowait())
-                except queue.Empty:
-                    pass
-                except Exception as e:
-                    print(f"Erro ao recuperar dados restantes da fila: {e}")
+            # A conexão com o Firehose é compartilhada entre as sessões; esta sessão apenas assina o fluxo de posts.
+            subscription = get_firehose_hub().subscribe(filters=st.session_state.get('ingest_filters'), duration=collection_duration)
+            st.session_state['subscription'] = subscription
+
+            try:
+                with st.status(f"Coletando posts do Bluesky durante {collection_duration} segundos. Aguarde!") as status:
+                    mensagens = [
+                        "Estabelecendo conexão com o Firehose...", "Conexão estabelecida com sucesso!",
+                        "Autenticando...", "Autenticação concluída!", "Organizando a fila...",
+                        "Atualizando lista...", "Coletando posts... Isso pode demorar alguns minutos.",
+                    ]
+                    for i, msg in enumerate(mensagens):
+                        status.update(label=msg)
+                        if i < len(mensagens) - 1:
+                            time.sleep(1 if i != 0 else 2)
+                            if stop_event.is_set() or (time.time() - start_time >= collection_duration):
+                                break
+                        else:
+                            pipeline_caption = st.empty()
+                            while collecting_data_flag and not stop_event.is_set() and (time.time() - start_time < collection_duration):
+                                for post in subscription.drain():
+                                    self._store_post(post)
+                                pipeline_caption.caption(self._format_pipeline_stats(subscription))
+                                time.sleep(0.5)
+                                collecting_data_flag = st.session_state['collecting']
+                                if not collecting_data_flag:
+                                    stop_event.set()
+                    subscription.close()
+                    for post in subscription.drain():
+                        self._store_post(post)
+                    if subscription.dropped:
+                        st.toast(f"{subscription.dropped} posts descartados por excesso no buffer de coleta.", icon="⚠️")
+                    self._finalize_collection(status)
+            finally:
+                # Garante o cancelamento da assinatura mesmo se a execução do script for interrompida.
+                subscription.close()
 
-            st.session_state['collecting'] = False
-            st.session_state['collection_ended'] = True
             stop_event.set()
-            if collection_thread.is_alive():
-                collection_thread.join(timeout=2)
             st.rerun()
 
 
+    def _finalize_collection(self, status_obj):
+        """
+        Encerra a coleta, seja ao fim da janela de tempo ou pelo botão "Parar Coleta":
+        consolida a amostra (se ativa), resolve os handles dos autores e monta o
+        armazenamento de posts.
+        """
+        st.session_state['subscription'] = None
+        if st.session_state.get('sampler'):
+            st.session_state['data'] = st.session_state['sampler'].items()
+            # O grafo de respostas considera apenas os posts mantidos na amostra.
+            st.session_state['reply_graph'] = ReplyGraph()
+            st.session_state['reply_graph'].add_posts(st.session_state['data'])
+        self._resolve_author_handles(status_obj)
+        st.session_state['collecting'] = False
+        st.session_state['collection_ended'] = True
+        self._post_store()
+
+
+    def _format_pipeline_stats(self, subscription):
+        """
+        Resumo do pipeline de ingestão: frames recebidos e profundidade de cada fila, incluindo o buffer desta sessão.
+        """
+        hub_stats = get_firehose_hub().stats()
+        depths = ' · '.join(f"{name}: {depth}" for name, depth in hub_stats['queue_depths'].items())
+        return (f"Frames recebidos: {hub_stats['frames']} (sem posts: {hub_stats['skipped_frames']}, autores filtrados: {hub_stats['author_rejected_frames']}, descartados: {hub_stats['dropped_frames']}) · "
+                f"Filas — {depths} · buffer da sessão: {subscription.buffer.qsize()} · "
+                f"sessões coletando: {hub_stats['active_subscriptions']}")
+
+
+    def _store_post(self, post):
+        """
+        Encaminha um post vindo da fila de coleta para a amostragem, se ativa, ou diretamente para os dados da sessão.
+        """
+        sampler = st.session_state.get('sampler')
+        if sampler:
+            sampler.add(post)
+        else:
+            st.session_state['reply_graph'].add(post.get('uri'), post.get('reply_to'), len(st.session_state['data']))
+            st.session_state['data'].append(post)
+
+
+    def _post_store(self):
+        """
+        Armazenamento único dos posts da sessão (ver `analytics.PostStore`). É
+        montado uma vez, ao fim da coleta, a partir da lista em que os posts
+        chegam, que é então esvaziada; as análises acrescentam colunas a ele.
+        """
+        if st.session_state['data'] and not st.session_state.get('collecting'):
+            st.session_state['posts'] = PostStore.from_records(st.session_state['data'])
+            st.session_state['data'] = []
+        return st.session_state.get('posts')
+
+
+    def _sentiment_shares(self, df):
+        """
+        Proporção de cada sentimento. Com amostragem ativa, os posts são ponderados pelo peso amostral.
+        """
+        if 'sample_weight' in df.columns:
+            weights = df.groupby('sentiment', observed=True)['sample_weight'].sum()
+            return weights / weights.sum()
+        return df['sentiment'].value_counts(normalize=True)
+
+
+    def _resolve_author_handles(self, status_obj):
+        """
+        Resolve os DIDs dos autores para handles legíveis, preenchendo a coluna 'author_handle'.
+        """
+        pending = [post for post in st.session_state['data'] if 'author_handle' not in post]
+        if not pending:
+            return
+
+        def report_progress(done, total):
+            if done % 50 == 0 or done == total:
+                status_obj.update(label=f"Resolvendo handles dos autores ({done}/{total})...")
+
+        status_obj.update(label="Resolvendo handles dos autores...")
+        try:
+            handles, _ = resolve_handles([post['author'] for post in pending], get_handle_cache(), progress_callback=report_progress)
+        except Exception as e:
+            st.toast(f"Não foi possível resolver os handles dos autores: {e}", icon="⚠️")
+            return
+        for post in pending:
+            post['author_handle'] = handles.get(post['author']) or post['author']
+
+
     def preprocess_text(self, text):
         """
         Limpa e pré-processa o texto de uma publicação.
@@ -238,43 +380,118 @@ class BskyDataCollectorApp:
         """
         if not self.sentiment_pipeline:
             try:
-                status_obj.update(label="Carregando modelo de análise de sentimentos...")
-                self.sentiment_pipeline = pipeline(
-                    model="lxyuan/distilbert-base-multilingual-cased-sentiments-student",
-                    return_all_scores=False,
-                )
+                model, backend = self._resolve_sentiment_model()
+                status_obj.update(label=f"Carregando modelo de análise de sentimentos ({model}, backend: {backend})...")
+                num_threads = int(os.environ['BSKYMOOD_INFERENCE_THREADS']) if os.environ.get('BSKYMOOD_INFERENCE_THREADS') else None
+                self.sentiment_service = get_sentiment_service(backend, num_threads, st.session_state.get('sentiment_workers', 1), model)
+                self.sentiment_pipeline = self.sentiment_service.client(st.session_state['session_id'])
             except Exception as e:
                 st.error(f"Erro ao carregar o modelo de análise de sentimentos: {e}", icon=":material/error:")
                 status_obj.update(label="Falha ao carregar modelo de análise.", state="error", expanded=True)
                 return
 
-        st.session_state['sentiment_results'] = []
-        updated_data_with_sentiment = []
-        if st.session_state['collection_ended'] and st.session_state['data']:
-            total_posts = len(st.session_state['data'])
-            for i, post in enumerate(st.session_state['data']):
-                status_obj.update(label=f"Analisando post {i+1}/{total_posts}: \"{post['text'][:50]}...\"")
+        store = self._post_store()
+        if st.session_state['collection_ended'] and store:
+            frame = store.frame
+            total_posts = len(store)
+            texts = frame['text'].tolist()
+            created_at = frame['created_at'].tolist()
+            weights = frame['sample_weight'].tolist() if 'sample_weight' in store else [1.0] * total_posts
+            processed_texts = [self.preprocess_text(text) for text in texts]
+            # Posts sem texto após o pré-processamento são neutros e não vão ao modelo.
+            labels = ['neutral'] * total_posts
+            # No modo de encoder compartilhado, o modelo devolve também o embedding de cada post.
+            embeddings = [None] * total_posts
+            pending = [i for i, text in enumerate(processed_texts) if text.strip()]
+
+            # A série temporal é atualizada à medida que os posts são classificados e desenhada ao vivo.
+            series = SentimentTimeSeries(TIMESERIES_BUCKET_SECONDS)
+            st.session_state['sentiment_timeseries'] = series
+            pending_set = set(pending)
+            for i in range(total_posts):
+                if i not in pending_set:
+                    series.add(created_at[i], 'neutral', weights[i])
+            live_chart = st.empty()
+            service_caption = st.empty()
+
+            # Os posts são enviados ao modelo em blocos, o que permite inferência em lote
+            # (e a divisão entre processos no modo com vários processos).
+            chunk_size = SENTIMENT_CHUNK_SIZE * max(1, st.session_state.get('sentiment_workers', 1))
+            for start in range(0, len(pending), chunk_size):
+                chunk = pending[start:start + chunk_size]
+                status_obj.update(label=f"Analisando posts {start+1}-{start+len(chunk)}/{len(pending)}: \"{texts[chunk[0]][:50]}...\"")
                 try:
-                    processed_text = self.preprocess_text(post['text'])
-                    sentiment = "neutral" if not processed_text.strip() else self.sentiment_pipeline(processed_text)[0]['label']
-                    post_with_sentiment = post.copy()
-                    post_with_sentiment['sentiment'] = sentiment
-                    updated_data_with_sentiment.append(post_with_sentiment)
-                    st.session_state['sentiment_results'].append({'text': post['text'], 'sentiment': sentiment})
-
+                    outputs = self.sentiment_pipeline([processed_texts[i] for i in chunk], batch_size=16, truncation=True)
+                    for i, output in zip(chunk, outputs):
+                        labels[i] = output['label']
+                        embeddings[i] = output.get('embedding')
                 except Exception as e:
-                    st.error(f"Erro ao analisar o sentimento do post \"{post['text'][:50]}...\": {e}", icon=":material/error:")
-                    post_with_error = post.copy()
-                    post_with_error['sentiment'] = 'analysis_error'
-                    updated_data_with_sentiment.append(post_with_error)
+                    st.error(f"Erro ao analisar o sentimento dos posts {start+1}-{start+len(chunk)}: {e}", icon=":material/error:")
+                    for i in chunk:
+                        labels[i] = 'analysis_error'
+                for i in chunk:
+                    series.add(created_at[i], labels[i], weights[i])
+                if len(series):
+                    live_chart.line_chart(series.to_frame(normalize=True), height=200)
+                if self.sentiment_service:
+                    service_caption.caption(self._format_inference_stats(self.sentiment_service))
+
+            reply_graph = st.session_state['reply_graph']
+            for uri, sentiment in zip(frame['uri'].tolist(), labels):
+                reply_graph.annotate(uri, sentiment=sentiment)
+            # Sentimento e texto pré-processado (reaproveitado pela análise de tópicos) viram colunas dos próprios posts.
+            store.set_column('sentiment', labels, 'category')
+            store.set_column('clean_text', processed_texts, 'string')
+
+            if any(embedding is not None for embedding in embeddings):
+                st.session_state['post_embeddings'] = self._stack_post_embeddings(embeddings)
 
             status_obj.update(label="Análise de sentimentos concluída!", state="complete", expanded=False)
-            st.session_state['data'] = updated_data_with_sentiment
         else:
             st.error("Não há dados coletados para análise de sentimentos.", icon=":material/error:")
             status_obj.update(label="Nenhum dado para analisar.", state="error", expanded=True)
 
 
+    def _stack_post_embeddings(self, embeddings):
+        """
+        Monta a matriz de embeddings dos posts. Posts que não foram ao modelo (sem texto ou com erro) recebem o embedding do texto vazio.
+        """
+        import numpy as np
+
+        if any(e is None for e in embeddings):
+            filler = self.sentiment_pipeline([''], batch_size=1, truncation=True)[0]['embedding']
+            embeddings = [filler if e is None else e for e in embeddings]
+        return np.vstack(embeddings).astype(np.float32)
+
+
+    def _resolve_sentiment_model(self):
+        """
+        Modelo e backend de sentimentos da sessão. No modo 'auto', usa os perfis em
+        cache (ver `model_zoo.py`) para escolher o modelo mais fiel à referência
+        dentro do orçamento de latência; sem perfis, usa o modelo de referência.
+        Com o encoder compartilhado, o backend é sempre o PyTorch que também devolve embeddings.
+        """
+        model = st.session_state.get('sentiment_model', REFERENCE_MODEL)
+        backend = st.session_state.get('sentiment_backend', 'pytorch')
+        if model == 'auto':
+            profiles_mtime = os.path.getmtime(DEFAULT_PROFILES_PATH) if os.path.exists(DEFAULT_PROFILES_PATH) else None
+            choice = select_sentiment_model(SENTIMENT_LATENCY_BUDGET_MS, profiles_mtime)
+            model, backend = choice.split('@', 1) if choice else (REFERENCE_MODEL, backend)
+        if st.session_state.get('shared_encoder'):
+            backend = SHARED_ENCODER_BACKEND
+        return model, backend
+
+
+    def _format_inference_stats(self, service):
+        """
+        Resumo do serviço de inferência compartilhado: fila, sessões atendidas, tamanho médio dos lotes e espera na fila.
+        """
+        stats = service.stats()
+        return (f"Serviço de inferência — posts na fila: {stats['queued']} (sessões aguardando: {len(stats['queued_by_caller'])}) · "
+                f"lotes: {stats['batches']} · lote médio: {stats['mean_batch_size']} posts · "
+                f"espera p50/p99: {stats['wait_p50_ms']}/{stats['wait_p99_ms']} ms")
+
+
     def perform_topic_modeling_and_sentiment(self, status_obj):
         """
         Executa a modelagem de tópicos e a análise de sentimentos agregada por tópico.
@@ -282,15 +499,15 @@ class BskyDataCollectorApp:
         st.session_state['performing_topic_analysis'] = True
         st.session_state['topics_analyzed'] = False
 
-        if not st.session_state.get('data'):
+        store = self._post_store()
+        if not store:
             st.warning("Não há dados coletados para a análise de tópicos.", icon="⚠️")
             status_obj.update(label="Nenhum dado para análise.", state="error", expanded=True)
             st.session_state['performing_topic_analysis'] = False
             return
 
         status_obj.update(label="Preparando textos para modelagem...")
-        texts_for_bertopic = [self.preprocess_text(post.get('text', '')) for post in st.session_state['data']]
-        st.session_state['texts_for_topic_analysis'] = texts_for_bertopic
+        texts_for_bertopic = self._topic_documents(store)
 
         if not any(texts_for_bertopic):
             st.warning("Nenhum texto válido encontrado nos posts para a análise de tópicos.", icon="⚠️")
@@ -299,62 +516,139 @@ class BskyDataCollectorApp:
             return
         
         try:
-            all_stop_words = list(nltk.corpus.stopwords.words('english')) + list(nltk.corpus.stopwords.words('portuguese')) + list(nltk.corpus.stopwords.words('spanish'))
-            vectorizer_model = CountVectorizer(stop_words=all_stop_words)
+            if st.session_state.get('partition_topics'):
+                self.topic_model, topics, quality = self._fit_topics_by_language(store, texts_for_bertopic, status_obj)
+            else:
+                self.topic_model, topics, quality = self._fit_topic_model(texts_for_bertopic, status_obj)
+            self._apply_topic_model(store, self.topic_model, topics, texts_for_bertopic, quality, status_obj)
+            status_obj.update(label="Análise de tópicos e sentimentos concluída!", state="complete", expanded=False)
+
+        except Exception as e:
+            st.error(f"Erro durante a modelagem de tópicos: {e}", icon=":material/error:")
+            status_obj.update(label=f"Erro na modelagem de tópicos: {e}", state="error", expanded=True)
+        finally:
+            st.session_state['performing_topic_analysis'] = False
+
+
+    def _fit_topic_model(self, docs, status_obj):
+        """
+        Ajusta um único BERTopic multilíngue sobre todos os posts.
+        """
+        try:
+            vectorizer_model = make_vectorizer(load_stopwords())
         except Exception as e:
             st.warning(f"Não foi possível carregar stopwords: {e}. Usando BERTopic com configurações padrão.", icon="⚠️")
             vectorizer_model = None
 
-        try:
-            status_obj.update(label="Iniciando modelagem de tópicos com BERTopic... Isso pode levar alguns minutos.")
-            self.topic_model = BERTopic(language="multilingual",
-                                        vectorizer_model=vectorizer_model, 
-                                        min_topic_size=3, 
-                                        verbose=True)
+        status_obj.update(label="Iniciando modelagem de tópicos com BERTopic... Isso pode levar alguns minutos.")
+        from bertopic import BERTopic
+        topic_model = BERTopic(language="multilingual",
+                               vectorizer_model=vectorizer_model, 
+                               min_topic_size=3, 
+                               verbose=True)
+
+        # Com o encoder compartilhado, os embeddings já calculados na análise de sentimentos são reaproveitados.
+        post_embeddings = self._session_artifact('post_embeddings')
+        if post_embeddings is not None and len(post_embeddings) == len(docs):
+            topics, _ = topic_model.fit_transform(docs, embeddings=post_embeddings)
+            embedding_source = "encoder compartilhado"
+        else:
+            topics, _ = topic_model.fit_transform(docs)
+            embedding_source = "sentence-transformer multilíngue"
+        return topic_model, topics, {**topic_quality(topic_model, topics), 'embedding_source': embedding_source}
 
-            topics, _ = self.topic_model.fit_transform(texts_for_bertopic)
-            st.session_state['topic_model_instance'] = self.topic_model
 
-            status_obj.update(label="Modelagem concluída. Processando resultados...")
+    def _fit_topics_by_language(self, store, docs, status_obj):
+        """
+        Ajusta um modelo de tópicos por idioma, em processos paralelos (ver
+        `topic_partitions.py`), e reúne os tópicos sob IDs globais.
+        """
+        frame = store.frame
+        languages = frame['lang'].tolist() if 'lang' in store else [detect_language(text) for text in frame['text'].tolist()]
+        post_embeddings = self._session_artifact('post_embeddings')
+        embeddings = post_embeddings if post_embeddings is not None and len(post_embeddings) == len(docs) else None
+
+        status_obj.update(label="Ajustando um modelo de tópicos por idioma, em processos paralelos... Isso pode levar alguns minutos.")
+        topic_model, topics, summary = fit_partitioned(
+            docs, languages, embeddings, min_topic_size=3,
+            progress_callback=lambda language, done, total: status_obj.update(label=f"Tópicos de '{language}' ajustados ({done}/{total} idiomas)...")
+        )
+        for partition in summary['partitions']:
+            if 'error' in partition:
+                st.warning(f"Não foi possível ajustar os tópicos de '{partition['language']}' ({partition['posts']} posts, tratados como outliers): {partition['error']}", icon="⚠️")
+
+        source = "encoder compartilhado" if embeddings is not None else "sentence-transformers"
+        partitions = ', '.join(f"{p['language']}: {p['posts']} posts em {p.get('fit_s', '—')} s" for p in summary['partitions'])
+        quality = {
+            **topic_quality(topic_model, topics),
+            'embedding_source': f"{source}, um modelo por idioma ({partitions}; total {summary['wall_s']} s em {summary['workers']} processos)",
+            'config': {'partitions': sorted(topic_model.models)},
+        }
+        return topic_model, topics, quality
+
+
+    def _topic_documents(self, store):
+        """
+        Textos pré-processados dos posts para a modelagem de tópicos, calculados
+        uma vez e guardados como coluna do armazenamento de posts.
+        """
+        if 'clean_text' not in store:
+            store.set_column('clean_text', [self.preprocess_text(text) for text in store.frame['text'].tolist()], 'string')
+        return store.frame['clean_text'].tolist()
 
-            if len(st.session_state['data']) == len(topics):
-                for i, post_data in enumerate(st.session_state['data']):
-                    post_data['topic_id'] = topics[i]
-            
-            topic_info_df = self.topic_model.get_topic_info()
-            posts_df_for_topic_sentiment = pd.DataFrame(st.session_state['data'])
 
-            if 'sentiment' in posts_df_for_topic_sentiment.columns and 'topic_id' in posts_df_for_topic_sentiment.columns:
-                status_obj.update(label="Analisando sentimentos por tópico...")
-                sentiment_by_topic = posts_df_for_topic_sentiment[posts_df_for_topic_sentiment['topic_id'] != -1] \
-                                     .groupby('topic_id')['sentiment'].value_counts(normalize=True).unstack(fill_value=0)
-                
-                sentiment_by_topic = sentiment_by_topic.rename(columns=lambda x: f"{x.capitalize()} (%)" if x != 'analysis_error' else 'Error (%)')
-                
-                for col in sentiment_by_topic.columns:
-                    sentiment_by_topic[col] = (sentiment_by_topic[col] * 100).round(1)
+    def _apply_topic_model(self, store, topic_model, topics, docs, quality, status_obj):
+        """
+        Adota um modelo de tópicos já ajustado na sessão: tópico de cada post,
+        tabela de tópicos com o sentimento por tópico e métricas de qualidade.
+        Usado tanto pela análise de tópicos quanto pela varredura de hiperparâmetros.
+        """
+        st.session_state['topic_quality'] = quality
+        st.session_state['topic_model_instance'] = topic_model
+        st.session_state['session_memory'].touch('topic_model_instance')
+        st.session_state['topic_model_fingerprint'] = model_fingerprint(topics, docs, quality.get('config'))
 
-                if 'Topic' in topic_info_df.columns:
-                    topic_info_df = topic_info_df.merge(sentiment_by_topic, left_on='Topic', right_index=True, how='left').fillna(0)
-            
-            st.session_state['topic_info_df'] = topic_info_df
-            st.session_state['topics_analyzed'] = True
-            status_obj.update(label="Análise de tópicos e sentimentos concluída!", state="complete", expanded=False)
+        status_obj.update(label="Modelagem concluída. Processando resultados...")
 
-        except Exception as e:
-            st.error(f"Erro durante a modelagem de tópicos: {e}", icon=":material/error:")
-            status_obj.update(label=f"Erro na modelagem de tópicos: {e}", state="error", expanded=True)
-        finally:
-            st.session_state['performing_topic_analysis'] = False
+        if len(store) == len(topics):
+            store.set_column('topic_id', topics, 'int16' if max(topics, default=0) < 32_000 else 'int32')
+            for uri, topic in zip(store.frame['uri'].tolist(), topics):
+                st.session_state['reply_graph'].annotate(uri, topic=topic)
+
+        topic_info_df = topic_model.get_topic_info()
+        posts_df_for_topic_sentiment = store.frame
+
+        if 'sentiment' in posts_df_for_topic_sentiment.columns and 'topic_id' in posts_df_for_topic_sentiment.columns:
+            status_obj.update(label="Analisando sentimentos por tópico...")
+            topic_posts = posts_df_for_topic_sentiment[posts_df_for_topic_sentiment['topic_id'] != -1]
+            if 'sample_weight' in topic_posts.columns:
+                # Com amostragem, as proporções por tópico são ponderadas pelo peso amostral.
+                weights = topic_posts.groupby(['topic_id', 'sentiment'], observed=True)['sample_weight'].sum().unstack(fill_value=0)
+                sentiment_by_topic = weights.div(weights.sum(axis=1), axis=0)
+            else:
+                sentiment_by_topic = topic_posts.groupby('topic_id')['sentiment'].value_counts(normalize=True).unstack(fill_value=0)
+            sentiment_by_topic.columns = sentiment_by_topic.columns.astype(str)
+
+            sentiment_by_topic = sentiment_by_topic.rename(columns=lambda x: f"{x.capitalize()} (%)" if x != 'analysis_error' else 'Error (%)')
+
+            for col in sentiment_by_topic.columns:
+                sentiment_by_topic[col] = (sentiment_by_topic[col] * 100).round(1)
+
+            if 'Topic' in topic_info_df.columns:
+                topic_info_df = topic_info_df.merge(sentiment_by_topic, left_on='Topic', right_index=True, how='left').fillna(0)
+
+        st.session_state['topic_info_df'] = topic_info_df
+        st.session_state['topics_analyzed'] = True
 
 
     def display_data(self):
         """
         Renderiza a interface principal, exibindo dados, métricas, botões e resultados das análises.
         """
-        if len(st.session_state['data']) > 0:
-            df_collected = pd.DataFrame(st.session_state['data'])
-            st.session_state['collected_df'] = df_collected
+        store = self._post_store()
+        if store:
+            # Visão sobre o armazenamento único dos posts, sem cópia a cada execução.
+            df_collected = store.frame
             num_rows = len(df_collected)
 
             num_has_images = df_collected['has_images'].sum() if 'has_images' in df_collected.columns else 0
@@ -364,21 +658,20 @@ class BskyDataCollectorApp:
                 if not st.session_state.get('topics_analyzed_toast_shown', False) and not st.session_state.get('sentiment_analysis_toast_shown', False):
                     st.toast(f"Ação finalizada com sucesso!", icon=":material/check_circle:")
 
-            if 'sentiment' in df_collected.columns and st.session_state.get('sentiment_results') and not st.session_state.get('topics_analyzed'):
+            if 'sentiment' in df_collected.columns and not st.session_state.get('topics_analyzed'):
                 total_analyzed = len(df_collected)
-                sentiment_counts = df_collected['sentiment'].value_counts()
-                positive_count = sentiment_counts.get('positive', 0)
-                negative_count = sentiment_counts.get('negative', 0)
-                neutral_count = sentiment_counts.get('neutral', 0)
-                positive_percentage = (positive_count / total_analyzed) * 100 if total_analyzed > 0 else 0
-                negative_percentage = (negative_count / total_analyzed) * 100 if total_analyzed > 0 else 0
-                neutral_percentage = (neutral_count / total_analyzed) * 100 if total_analyzed > 0 else 0
+                sentiment_shares = self._sentiment_shares(df_collected)
+                positive_percentage = sentiment_shares.get('positive', 0) * 100
+                negative_percentage = sentiment_shares.get('negative', 0) * 100
+                neutral_percentage = sentiment_shares.get('neutral', 0) * 100
                 st.subheader("Resultados da Análise de Sentimentos")
                 col_metric1, col_metric2, col_metric3, col_metric4 = st.columns(4, gap="small", border=True)
                 with col_metric1: st.metric(label="Total de Posts Analisados", value=total_analyzed)
                 with col_metric2: st.metric(label="Posts Positivos", value=f"{positive_percentage:.1f}%")
                 with col_metric3: st.metric(label="Posts Negativos", value=f"{negative_percentage:.1f}%")
                 with col_metric4: st.metric(label="Posts Neutros", value=f"{neutral_percentage:.1f}%")
+
+                self._render_sentiment_timeseries()
             
             elif not st.session_state.get('topics_analyzed'):
                 col1_metrics, col2_metrics, col3_metrics = st.columns(3, gap="small", border=True)
@@ -386,16 +679,46 @@ class BskyDataCollectorApp:
                 with col2_metrics: st.metric(label="Posts com Imagens", value=num_has_images)
                 with col3_metrics: st.metric(label="Posts em Reply", value=num_is_reply)
 
-            st.session_state['collected_df_for_download'] = df_collected
-
-            if 'sentiment' in df_collected.columns and st.session_state.get('sentiment_results') and not st.session_state.get('topics_analyzed', False):
+            with st.expander("Uso de Memória dos Dados", icon=":material/memory:"):
+                memory_df, total_bytes = memory_report(df_collected)
+                col_mem1, col_mem2 = st.columns(2)
+                with col_mem1: st.metric("Memória Total", f"{total_bytes / 1024**2:.2f} MB")
+                with col_mem2: st.metric("Bytes por Post", f"{total_bytes / max(1, num_rows):.0f}")
+                st.dataframe(memory_df, use_container_width=True, hide_index=True)
+
+            sampler = st.session_state.get('sampler')
+            if sampler:
+                with st.expander("Estatísticas da Amostragem", icon=":material/shuffle:"):
+                    sampling_stats = pd.DataFrame([
+                        {'Estrato': stratum, 'Posts Recebidos': info['seen'], 'Posts Mantidos': info['kept'], 'Peso Amostral': round(info['weight'], 3)}
+                        for stratum, info in sampler.stats().items()
+                    ])
+                    st.dataframe(sampling_stats, use_container_width=True, hide_index=True)
+
+            ingest_filters = st.session_state.get('ingest_filters')
+            if ingest_filters:
+                with st.expander("Estatísticas dos Filtros de Coleta", icon=":material/filter_alt:"):
+                    filter_stats = ingest_filters.stats()
+                    counters = filter_stats['counters']
+                    col_f1, col_f2, col_f3 = st.columns(3)
+                    with col_f1: st.metric("Aceitos pelos filtros", counters.get('passed', 0))
+                    with col_f2: st.metric("Descartados por autor", counters.get('rejected_author_denied', 0) + counters.get('rejected_author_not_allowed', 0))
+                    with col_f3: st.metric("Descartados por texto", counters.get('rejected_text', 0))
+                    hits = [{'Filtro': f"palavra: {k}", 'Acertos': v} for k, v in filter_stats['keyword_hits'].items()]
+                    hits += [{'Filtro': f"regex: {k}", 'Acertos': v} for k, v in filter_stats['regex_hits'].items()]
+                    if hits:
+                        st.dataframe(pd.DataFrame(hits), use_container_width=True, hide_index=True)
+
+            self._render_conversations(df_collected)
+
+            if 'sentiment' in df_collected.columns and not st.session_state.get('topics_analyzed', False):
                 
                 st.sidebar.warning(
                     "- A análise de sentimentos é realizada automaticamente e pode não refletir a intenção original do autor.\n"
                     "- Menções e URLs são removidos durante a análise, mas são exibidos na tabela para registro."
                 )
                 columns_to_show = ['text', 'sentiment']
-                st.dataframe(df_collected[columns_to_show], use_container_width=True)
+                self._render_post_browser(df_collected, columns_to_show, key='sentiment_posts')
             
             elif not df_collected.empty and not st.session_state.get('topics_analyzed', False):
                 st.subheader("Dados Coletados")
@@ -404,8 +727,9 @@ class BskyDataCollectorApp:
                     "- Para executar a análise de tópicos, conclua a análise de sentimentos primeiro.\n"
                     "- **Atenção**: as análises podem levar vários minutos, dependendo da sua conexão e do número de posts coletados."
                 )
-                cols_to_display = ['text', 'created_at', 'author', 'has_images', 'reply_to']
-                st.dataframe(df_collected[cols_to_display], use_container_width=True)
+                author_col = 'author_handle' if 'author_handle' in df_collected.columns else 'author'
+                cols_to_display = ['text', 'created_at', author_col, 'has_images', 'reply_to']
+                self._render_post_browser(df_collected, cols_to_display, key='collected_posts')
 
             # Exibir botões de ação
             col1_buttons, col2_buttons, col3_buttons, col4_buttons = st.columns([1.7, 1.7, 1, 1])
@@ -413,10 +737,11 @@ class BskyDataCollectorApp:
             status_container_topics = st.empty()
 
             with col1_buttons:
-                if not st.session_state.get('sentiment_results') and 'sentiment' not in df_collected.columns:
+                if 'sentiment' not in df_collected.columns:
                     if st.button("Analisar Sentimentos", icon=":material/psychology:", use_container_width=True, type="primary", help="Clique para analisar os sentimentos dos posts coletados individualmente."):
                         with status_container_sentiment.status("Preparando para análise de sentimentos...", expanded=True) as status:
-                            self.analyze_sentiment(status)
+                            with self.profiled('sentimentos'):
+                                self.analyze_sentiment(status)
                         st.session_state['sentiment_analysis_toast_shown'] = True
                         st.rerun()
                 elif 'sentiment' in df_collected.columns:
@@ -433,143 +758,571 @@ class BskyDataCollectorApp:
 
                 if st.button("Analisar Tópicos", icon=":material/hub:", use_container_width=True, type="primary", help=help_text, disabled=disable_topic_button):
                     with status_container_topics.status("Preparando para análise de tópicos...", expanded=True) as status_topic:
-                        self.perform_topic_modeling_and_sentiment(status_topic)
+                        with self.profiled('tópicos'):
+                            self.perform_topic_modeling_and_sentiment(status_topic)
                     st.session_state['topics_analyzed_toast_shown'] = True
                     st.rerun()
 
             with col3_buttons:
-                if st.button("Reiniciar Coleta", on_click=lambda: st.session_state.update({
-                    'data': [], 'collection_ended': False, 'collecting': False, 'sentiment_results': [], 
-                    'collected_df': pd.DataFrame(), 'collected_df_for_download': pd.DataFrame(),
-                    'stop_event': multiprocessing.Event(), 'data_queue': multiprocessing.Queue(),
-                    'topic_model_instance': None, 'topic_info_df': pd.DataFrame(), 'topics_analyzed': False, 
-                    'performing_topic_analysis': False, 'texts_for_topic_analysis': [],
-                    'sentiment_analysis_toast_shown': False, 'topics_analyzed_toast_shown': False
-                }), icon=":material/refresh:", help="Reinicie a coleta. Isso apagará todos os dados!", use_container_width=True):
+                if st.button("Reiniciar Coleta", on_click=self._reset_all_states, icon=":material/refresh:", help="Reinicie a coleta. Isso apagará todos os dados!", use_container_width=True):
                     pass
 
             with col4_buttons:
-                df_to_download = pd.DataFrame(st.session_state['data']) if st.session_state['data'] else pd.DataFrame()
-                if not df_to_download.empty:
-                    st.download_button(
-                        label="Baixar Dados", data=df_to_download.to_json(orient='records', indent=4, date_format='iso'),
-                        file_name=f'bsky_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json', mime='application/json',
-                        help="Baixe os dados coletados (incluindo sentimentos e tópicos) em formato JSON.",
-                        icon=":material/download:", use_container_width=True
-                    )
+                if not df_collected.empty:
+                    with st.popover("Baixar Dados", icon=":material/download:", use_container_width=True, help="Exporte os dados coletados (incluindo sentimentos e tópicos)."):
+                        self._render_export_panel()
                 else:
                     st.button("Baixar Dados", disabled=True, use_container_width=True, help="Nenhum dado para baixar.", icon=":material/download:")
-            
+
+            if 'sentiment' in df_collected.columns and not st.session_state.get('performing_topic_analysis', False):
+                self._render_topic_sweep(store)
+
             if st.session_state.get('topics_analyzed', False) and not st.session_state.get('topic_info_df', pd.DataFrame()).empty:
                 with st.container(border=True):
-                    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 Sentimentos por Tópicos", "🗺️ Mapa de Tópicos", "🗝️ Palavras-Chave", "🔍 Pesquisa de Tópicos", "📋 Dados Coletados"])
-
-                    with tab1:
-                        st.subheader("Análise de Sentimentos por Tópico")
-
-                        st.sidebar.info(
-                            "**Sobre a Análise de Tópicos:**\n\n"
-                            "- Tópicos extraídos com BERTopic.\n"
-                            "- Tópico '-1' agrupa posts considerados outliers.\n"
-                            "- 'Palavras-Chave' são os termos mais significativos.\n"
-                            "- Sentimento por Tópico é a distribuição percentual dos posts."
-                        )
-
-                        st.metric(label="Total de Tópicos Descobertos", value=len(st.session_state.get('topic_info_df', pd.DataFrame())))
-
-                        source_topic_df = st.session_state['topic_info_df'].copy()
-                        rename_map = {'Topic': 'ID Tópico', 'Count': 'Nº Posts', 'Name': 'Palavras-Chave'}
-                        display_df = source_topic_df.rename(columns={k: v for k, v in rename_map.items() if k in source_topic_df.columns})
-
-                        if 'Palavras-Chave' in display_df.columns and 'Name' in source_topic_df.columns:
-                            display_df['Palavras-Chave'] = display_df['Palavras-Chave'].apply(lambda x: ", ".join(x.split('_')[1:]) if isinstance(x, str) and '_' in x else x)
-                        
-                        cols_for_main_display = [col for col in display_df.columns if col not in ['Representation', 'Representative_Docs', 'Representative_Samples']]
-                        st.dataframe(display_df[cols_for_main_display], use_container_width=True)
-
-                        topic_model_instance = st.session_state.get('topic_model_instance')
-                        if topic_model_instance:
-                            try:
-                                num_topics_available = len(st.session_state['topic_info_df'])
-                                if num_topics_available > 0:
-                                    with tab2:
-                                        st.subheader("Mapa de Distância Entre Tópicos")
-                                        fig_topics = topic_model_instance.visualize_topics(top_n_topics=num_topics_available, title="")
-                                        st.plotly_chart(fig_topics, use_container_width=True)
-
-                                        with st.expander("🗺️ O que este Gráfico mostra?"):
-                                            st.markdown("""
-                                            - **Cada Círculo é um Tópico**: O tamanho indica a frequência (número de posts).
-                                            - **Distância**: Círculos próximos representam tópicos semanticamente similares. Círculos distantes são sobre assuntos diferentes.
-                                            - **Interatividade**: Clique em um círculo para ver seus tópicos mais relacionados.
-                                            """)
-
-                                    with tab3:
-                                        st.subheader("Palavras Mais Importantes por Tópico")
-                                        barchart_height = max(200, (num_topics_available * 3) + 0)
-                                        fig_barchart = topic_model_instance.visualize_barchart(top_n_topics=num_topics_available, height=barchart_height, n_words=3, title="")
-                                        st.plotly_chart(fig_barchart, use_container_width=True)
-                                        
-                                        with st.expander("📊 O que este Gráfico mostra?"):
-                                            st.markdown("""
-                                            - **Cada Sub-gráfico é um Tópico**: Detalha a composição de cada tópico individualmente.
-                                            - **Comprimento das Barras**: Representa a importância de cada palavra para aquele tópico específico (score c-TF-IDF), não apenas sua frequência geral.
-                                            """)
-                                        topic_model_instance.visualize_hierarchy()
-
-                            except Exception as e:
-                                st.warning(f"Não foi possível gerar visualizações dos tópicos: {e}", icon="⚠️")
-                with tab4:        
-                    if st.session_state.get('topics_analyzed', False) and not st.session_state.get('topic_info_df', pd.DataFrame()).empty:
-                        st.subheader("Pesquisar Tópico por Palavra-Chave")
-                        search_term = st.text_input("Digite uma palavra-chave:", placeholder="Ex: economy, trump, brasil", help="Pesquise tópicos por palavras-chave. Exemplo: 'economy', 'trump', 'brasil'.")
-
-                        if search_term:
-                            if 'Palavras-Chave' in display_df.columns:
-                                results_df = display_df[display_df['Palavras-Chave'].str.contains(search_term, case=False, na=False)]
-                                if not results_df.empty:
-                                    search_result_cols = ['ID Tópico', 'Palavras-Chave', 'Nº Posts', 'Positive (%)', 'Negative (%)', 'Neutral (%)']
-                                    final_cols = [col for col in search_result_cols if col in results_df.columns]
-                                    st.write(f"Resultados da busca para \"{search_term}\":")
-                                    st.dataframe(results_df[final_cols], use_container_width=True)
-
-                                    # Expander com os posts dos tópicos encontrados
-                                    found_topic_ids = results_df['ID Tópico'].tolist()
-                                    posts_in_found_topics = df_collected[df_collected['topic_id'].isin(found_topic_ids)]
-
-                                    with st.expander(f"Ver posts dos tópicos encontrados na busca por '{search_term}'"):
-                                        if not posts_in_found_topics.empty:
-                                            posts_to_show = posts_in_found_topics[['text', 'sentiment', 'topic_id']]
-                                            st.dataframe(posts_to_show, use_container_width=True)
-                                        else:
-                                            st.info("Não foram encontrados posts para os tópicos desta busca.")
-                                else:
-                                    st.info(f"Nenhum tópico encontrado com a palavra-chave \"{search_term}\".")
-
-                    with tab5:
-                        if st.session_state.get('topics_analyzed', False) and not df_collected.empty:
-                            st.subheader("Dados Coletados Detalhados")
-                            st.dataframe(df_collected, use_container_width=True)
-
-
-        elif st.session_state['collection_ended'] and not st.session_state['data']:
+                    self._render_topic_views(df_collected)
+
+
+        elif st.session_state['collection_ended'] and not store:
             st.warning("Nenhum post foi coletado durante o período especificado ou que corresponda aos critérios.", icon="⚠️")
             if st.button("Tentar Nova Coleta", icon=":material/refresh:", use_container_width=True):
                 self._reset_all_states()
                 st.rerun()
 
 
+    def _render_conversations(self, df_collected):
+        """
+        Conversas com mais de um post coletado, com sentimento e tópico agregados por conversa.
+        """
+        reply_graph = st.session_state.get('reply_graph')
+        conversations = reply_graph.conversations(min_posts=2) if reply_graph else []
+        if not conversations:
+            return
+
+        with st.expander("Conversas", icon=":material/forum:"):
+            col_c1, col_c2, col_c3 = st.columns(3)
+            with col_c1: st.metric("Conversas com Respostas", len(conversations))
+            with col_c2: st.metric("Maior Conversa (posts)", conversations[0]['posts'])
+            with col_c3: st.metric("Posts em Conversas", sum(c['posts'] for c in conversations))
+
+            conversations_df = pd.DataFrame(conversations).dropna(axis=1, how='all')
+            conversations_df = conversations_df.rename(columns={
+                'conversation': 'Conversa (raiz)', 'posts': 'Posts', 'root_collected': 'Raiz Coletada', 'dominant_topic': 'Tópico Predominante',
+                'positive': 'Positive (%)', 'negative': 'Negative (%)', 'neutral': 'Neutral (%)', 'analysis_error': 'Error (%)',
+            })
+            st.dataframe(conversations_df.head(500), use_container_width=True, hide_index=True)
+
+            selected = st.selectbox("Ver posts da conversa", options=[c['conversation'] for c in conversations[:500]], key='conversation_selected')
+            if selected:
+                positions = [reply_graph.positions[uri] for uri in reply_graph.thread(selected) if reply_graph.positions.get(uri) is not None]
+                thread_columns = [col for col in ('text', 'created_at', 'author_handle', 'reply_to', 'sentiment', 'topic_id') if col in df_collected.columns]
+                st.dataframe(df_collected.iloc[positions][thread_columns], use_container_width=True)
+
+
+    def _cached_topic_result(self, kind, params, compute):
+        """
+        Resultado derivado do modelo de tópicos atual, em cache por impressão digital do modelo e parâmetros.
+        """
+        if not st.session_state.get('topic_result_cache'):
+            st.session_state['topic_result_cache'] = ModelResultCache()
+        key = (kind, st.session_state.get('topic_model_fingerprint'), params)
+        return st.session_state['topic_result_cache'].get_or_compute(key, compute)
+
+
+    def _render_topic_views(self, df_collected):
+        """
+        Resultados da análise de tópicos. Apenas a visualização selecionada é
+        construída a cada execução, e as figuras do BERTopic ficam em cache,
+        então trocar de visualização ou digitar na busca não refaz cálculos de
+        agrupamento.
+        """
+        st.sidebar.info(
+            "**Sobre a Análise de Tópicos:**\n\n"
+            "- Tópicos extraídos com BERTopic.\n"
+            "- Tópico '-1' agrupa posts considerados outliers.\n"
+            "- 'Palavras-Chave' são os termos mais significativos.\n"
+            "- Sentimento por Tópico é a distribuição percentual dos posts."
+        )
+
+        source_topic_df = st.session_state['topic_info_df']
+        rename_map = {'Topic': 'ID Tópico', 'Language': 'Idioma', 'Count': 'Nº Posts', 'Name': 'Palavras-Chave'}
+        display_df = source_topic_df.rename(columns={k: v for k, v in rename_map.items() if k in source_topic_df.columns})
+
+        if 'Palavras-Chave' in display_df.columns and 'Name' in source_topic_df.columns:
+            display_df['Palavras-Chave'] = display_df['Palavras-Chave'].apply(lambda x: ", ".join(x.split('_')[1:]) if isinstance(x, str) and '_' in x else x)
+
+        view = st.radio("Visualização", options=list(TOPIC_VIEWS), format_func=TOPIC_VIEWS.get, horizontal=True, key='topic_view', label_visibility='collapsed')
+        topic_model_instance = self._session_artifact('topic_model_instance')
+        num_topics_available = len(source_topic_df)
+
+        if view == 'sentiments':
+            st.subheader("Análise de Sentimentos por Tópico")
+            st.metric(label="Total de Tópicos Descobertos", value=num_topics_available)
+            quality = st.session_state.get('topic_quality')
+            if quality:
+                coherence = f" · coerência (NPMI): {quality['coherence']}" if quality.get('coherence') is not None else ""
+                st.caption(f"Embeddings: {quality['embedding_source']} · outliers: {quality['outlier_ratio']:.1%} · "
+                           f"diversidade das palavras-chave: {quality['diversity']}{coherence}")
+            cols_for_main_display = [col for col in display_df.columns if col not in ['Representation', 'Representative_Docs', 'Representative_Samples']]
+            st.dataframe(display_df[cols_for_main_display], use_container_width=True)
+
+            col_jump_topic, col_jump_sentiment, col_jump_button = st.columns([2, 2, 1], vertical_alignment="bottom")
+            with col_jump_topic:
+                jump_topic = st.selectbox("Tópico", options=source_topic_df['Topic'].tolist(), key='jump_topic')
+            with col_jump_sentiment:
+                jump_sentiment = st.selectbox("Sentimento", options=[None, *df_collected['sentiment'].cat.categories], format_func=lambda s: "Todos" if s is None else s, key='jump_sentiment')
+            with col_jump_button:
+                st.button("Ver Posts", icon=":material/arrow_forward:", use_container_width=True, on_click=self._jump_to_posts, args=(jump_topic, jump_sentiment))
+
+        elif view in ('map', 'keywords', 'hierarchy'):
+            if not topic_model_instance or num_topics_available == 0:
+                st.info("Nenhum modelo de tópicos disponível para visualização.")
+                return
+            topic_model_instance, language = self._topic_view_model(topic_model_instance)
+            if language is not None:
+                num_topics_available = len(topic_model_instance.get_topic_info())
+            try:
+                if view == 'map':
+                    st.subheader("Mapa de Distância Entre Tópicos")
+                    fig_topics = self._cached_topic_result('visualize_topics', (num_topics_available, language),
+                                                           lambda: topic_model_instance.visualize_topics(top_n_topics=num_topics_available, title=""))
+                    st.plotly_chart(fig_topics, use_container_width=True)
+
+                    with st.expander("🗺️ O que este Gráfico mostra?"):
+                        st.markdown("""
+                        - **Cada Círculo é um Tópico**: O tamanho indica a frequência (número de posts).
+                        - **Distância**: Círculos próximos representam tópicos semanticamente similares. Círculos distantes são sobre assuntos diferentes.
+                        - **Interatividade**: Clique em um círculo para ver seus tópicos mais relacionados.
+                        """)
+
+                elif view == 'keywords':
+                    st.subheader("Palavras Mais Importantes por Tópico")
+                    barchart_height = max(200, (num_topics_available * 3) + 0)
+                    fig_barchart = self._cached_topic_result('visualize_barchart', (num_topics_available, barchart_height, 3, language),
+                                                             lambda: topic_model_instance.visualize_barchart(top_n_topics=num_topics_available, height=barchart_height, n_words=3, title=""))
+                    st.plotly_chart(fig_barchart, use_container_width=True)
+
+                    with st.expander("📊 O que este Gráfico mostra?"):
+                        st.markdown("""
+                        - **Cada Sub-gráfico é um Tópico**: Detalha a composição de cada tópico individualmente.
+                        - **Comprimento das Barras**: Representa a importância de cada palavra para aquele tópico específico (score c-TF-IDF), não apenas sua frequência geral.
+                        """)
+
+                else:
+                    st.subheader("Hierarquia dos Tópicos")
+                    fig_hierarchy = self._cached_topic_result('visualize_hierarchy', language,
+                                                              lambda: topic_model_instance.visualize_hierarchy(title=""))
+                    st.plotly_chart(fig_hierarchy, use_container_width=True)
+
+                    with st.expander("🌳 O que este Gráfico mostra?"):
+                        st.markdown("""
+                        - **Dendrograma**: Tópicos unidos mais à esquerda são mais parecidos entre si.
+                        - **Uso**: Ajuda a decidir quais tópicos poderiam ser agrupados em temas mais amplos.
+                        """)
+            except Exception as e:
+                st.warning(f"Não foi possível gerar visualizações dos tópicos: {e}", icon="⚠️")
+
+        elif view == 'search':
+            st.subheader("Pesquisar Tópico por Palavra-Chave")
+            search_term = st.text_input("Digite uma palavra-chave:", placeholder="Ex: economy, trump, brasil", help="Pesquise tópicos por palavras-chave. Exemplo: 'economy', 'trump', 'brasil'.")
+
+            if search_term and 'Palavras-Chave' in display_df.columns:
+                results_df = display_df[display_df['Palavras-Chave'].str.contains(search_term, case=False, na=False)]
+                if not results_df.empty:
+                    search_result_cols = ['ID Tópico', 'Palavras-Chave', 'Nº Posts', 'Positive (%)', 'Negative (%)', 'Neutral (%)']
+                    final_cols = [col for col in search_result_cols if col in results_df.columns]
+                    st.write(f"Resultados da busca para \"{search_term}\":")
+                    st.dataframe(results_df[final_cols], use_container_width=True)
+
+                    # Expander com os posts dos tópicos encontrados
+                    found_topic_ids = results_df['ID Tópico'].tolist()
+
+                    with st.expander(f"Ver posts dos tópicos encontrados na busca por '{search_term}'"):
+                        self._render_post_browser(df_collected, ['text', 'sentiment', 'topic_id'], key='search_posts', fixed_topics=found_topic_ids)
+                else:
+                    st.info(f"Nenhum tópico encontrado com a palavra-chave \"{search_term}\".")
+
+        elif view == 'data':
+            if not df_collected.empty:
+                st.subheader("Dados Coletados Detalhados")
+                self._render_post_browser(df_collected, [col for col in df_collected.columns if col != 'clean_text'], key='topic_posts')
+
+        elif view == 'time':
+            self._render_topics_over_time(df_collected)
+
+
+    def _jump_to_posts(self, topic_id, sentiment=None):
+        """
+        Abre os dados detalhados já filtrados pelo tópico (e, opcionalmente, pelo sentimento) escolhido.
+        """
+        st.session_state['topic_posts_topics'] = [topic_id]
+        st.session_state['topic_posts_sentiments'] = [sentiment] if sentiment else []
+        st.session_state['topic_posts_page'] = 1
+        st.session_state['topic_view'] = 'data'
+
+
+    def _render_post_browser(self, df, columns, key, fixed_topics=None):
+        """
+        Tabela paginada de posts. Ordenação, filtros e recorte são feitos no
+        servidor e apenas a página visível é enviada ao navegador.
+        `fixed_topics` restringe a tabela a esses tópicos, sem exibir o filtro.
+        """
+        if not st.session_state.get('post_browsers'):
+            st.session_state['post_browsers'] = {}
+        browser = st.session_state['post_browsers'].get(key)
+        if browser is None:
+            browser = st.session_state['post_browsers'][key] = PostBrowser(df)
+        else:
+            browser.bind(df)
+
+        has_sentiment = 'sentiment' in df.columns
+        has_topics = 'topic_id' in df.columns and fixed_topics is None
+        col_sort, col_order, col_text = st.columns([2, 1, 3], vertical_alignment="bottom")
+        with col_sort:
+            sort_by = st.selectbox("Ordenar por", options=[None, *columns], format_func=lambda c: "Ordem de chegada" if c is None else c, key=f'{key}_sort')
+        with col_order:
+            ascending = not st.toggle("Decrescente", key=f'{key}_desc')
+        with col_text:
+            text = st.text_input("Buscar no texto", placeholder="Filtrar posts que contenham...", key=f'{key}_text')
+
+        sentiments, topics = [], fixed_topics or []
+        if has_sentiment or has_topics:
+            col_sentiment, col_topic = st.columns(2)
+            if has_sentiment:
+                with col_sentiment:
+                    sentiments = st.multiselect("Sentimentos", options=list(df['sentiment'].cat.categories), key=f'{key}_sentiments')
+            if has_topics:
+                with col_topic:
+                    topics = st.multiselect("Tópicos", options=sorted(df['topic_id'].unique().tolist()), key=f'{key}_topics')
+
+        positions = browser.query(sort_by=sort_by, ascending=ascending, sentiments=sentiments, topics=topics, text=text.strip())
+        if not len(positions):
+            st.info("Nenhum post corresponde aos filtros selecionados.")
+            return
+
+        # Volta à primeira página quando a consulta muda.
+        query_key = (sort_by, ascending, tuple(sentiments), tuple(topics), text.strip(), browser.signature)
+        page_size = st.session_state.get(f'{key}_page_size', PAGE_SIZES[0])
+        total_pages = max(1, -(-len(positions) // page_size))
+        if st.session_state.get(f'{key}_query') != query_key or st.session_state.get(f'{key}_page', 1) > total_pages:
+            st.session_state[f'{key}_query'] = query_key
+            st.session_state[f'{key}_page'] = 1
+
+        page = st.session_state.get(f'{key}_page', 1)
+        start = (page - 1) * page_size
+        st.dataframe(browser.page(positions, page, page_size, columns), use_container_width=True)
+
+        col_page, col_size, col_info = st.columns([1, 1, 2], vertical_alignment="bottom")
+        with col_page:
+            st.number_input("Página", min_value=1, max_value=total_pages, step=1, key=f'{key}_page')
+        with col_size:
+            st.selectbox("Posts por página", options=PAGE_SIZES, key=f'{key}_page_size')
+        with col_info:
+            st.caption(f"Posts {start + 1}–{min(start + page_size, len(positions))} de {len(positions)} ({len(df)} no total)")
+
+
+    def _render_topic_sweep(self, store):
+        """
+        Varredura de hiperparâmetros da modelagem de tópicos (ver `topic_sweep.py`):
+        as configurações da grade são ajustadas em paralelo sobre os mesmos
+        embeddings, e a escolhida pode ser adotada sem novo ajuste.
+        """
+        with st.expander("Varredura de Hiperparâmetros de Tópicos", icon=":material/tune:"):
+            col_size, col_samples, col_ngram, col_workers = st.columns(4)
+            with col_size:
+                sizes = st.multiselect("min_topic_size", options=[2, 3, 5, 10, 15, 20, 30], default=list(DEFAULT_GRID['min_topic_size']), key='sweep_min_topic_size',
+                                       help="Tamanho mínimo de um tópico (e dos agrupamentos do HDBSCAN).")
+            with col_samples:
+                samples = st.multiselect("min_samples", options=[None, 1, 2, 5, 10], default=list(DEFAULT_GRID['min_samples']), key='sweep_min_samples',
+                                         format_func=lambda v: "auto" if v is None else str(v),
+                                         help="Quanto maior, mais conservador o HDBSCAN e mais posts viram outliers. 'auto' usa o min_topic_size.")
+            with col_ngram:
+                ngrams = st.multiselect("N-gramas", options=[(1, 1), (1, 2), (1, 3)], default=list(DEFAULT_GRID['ngram_range']), key='sweep_ngram_range',
+                                        format_func=lambda r: f"{r[0]}–{r[1]}", help="Tamanho dos termos usados como palavras-chave.")
+            with col_workers:
+                max_workers = max(1, os.cpu_count() or 1)
+                workers = st.number_input("Processos", min_value=1, max_value=max_workers, value=min(4, max_workers), step=1, key='sweep_workers')
+
+            grid = {'min_topic_size': sizes, 'min_samples': samples, 'ngram_range': ngrams}
+            n_configs = len(expand_grid(grid)) if all(grid.values()) else 0
+            if st.button(f"Executar Varredura ({n_configs} configurações)", icon=":material/play_arrow:", use_container_width=True, disabled=not n_configs,
+                         help="Embeddings e redução de dimensionalidade são calculados uma vez; cada configuração ajusta apenas o agrupamento e as palavras-chave."):
+                self._run_topic_sweep(store, grid, int(workers))
+
+            sweep = self._session_artifact('topic_sweep')
+            if not sweep:
+                return
+            st.caption(f"Embeddings ({sweep['embedding_source']}): {sweep['embed_s']} s · redução (UMAP): {sweep['reduce_s']} s · "
+                       f"ajustes: {sweep['fit_wall_s']} s em {sweep['workers']} processos "
+                       f"(soma dos ajustes: {sum(r.get('fit_s', 0) for r in sweep['results']):.1f} s)")
+            st.dataframe(pd.DataFrame([{
+                'Configuração': format_config(r['config']),
+                'Tópicos': r.get('n_topics'),
+                'Outliers (%)': round(r['outlier_ratio'] * 100, 1) if 'outlier_ratio' in r else None,
+                'Coerência (NPMI)': r.get('coherence'),
+                'Diversidade': r.get('diversity'),
+                'Ajuste (s)': r.get('fit_s'),
+                'Erro': r.get('error'),
+            } for r in sweep['results']]).dropna(axis=1, how='all'), use_container_width=True, hide_index=True)
+
+            fitted = [r for r in sweep['results'] if 'error' not in r]
+            if not fitted:
+                return
+            col_choice, col_adopt = st.columns([3, 1], vertical_alignment="bottom")
+            with col_choice:
+                choice = st.selectbox("Configuração", options=range(len(fitted)), format_func=lambda i: format_config(fitted[i]['config']), key='sweep_choice')
+            with col_adopt:
+                if st.button("Adotar Modelo", icon=":material/check:", use_container_width=True, help="Usa este modelo na análise de tópicos da sessão, sem novo ajuste."):
+                    result = fitted[choice]
+                    quality = {key: result[key] for key in ('n_topics', 'outlier_ratio', 'diversity', 'coherence')}
+                    quality.update(config=result['config'], embedding_source=f"{sweep['embedding_source']} · {format_config(result['config'])}")
+                    with st.status("Adotando o modelo da varredura...", expanded=True) as status:
+                        self._apply_topic_model(store, result['model'], result['topics'], self._topic_documents(store), quality, status)
+                        status.update(label="Modelo adotado!", state="complete", expanded=False)
+                    st.session_state['topics_analyzed_toast_shown'] = True
+                    st.rerun()
+
+
+    def _run_topic_sweep(self, store, grid, workers):
+        """
+        Executa a varredura e guarda os resultados (com os modelos ajustados) na sessão.
+        """
+        docs = self._topic_documents(store)
+        if not any(docs):
+            st.warning("Nenhum texto válido encontrado nos posts para a análise de tópicos.", icon="⚠️")
+            return
+        try:
+            stop_words = load_stopwords()
+        except Exception as e:
+            st.warning(f"Não foi possível carregar stopwords: {e}. A varredura seguirá sem elas.", icon="⚠️")
+            stop_words = ()
+        # Com o encoder compartilhado, os embeddings da análise de sentimentos são reaproveitados.
+        post_embeddings = self._session_artifact('post_embeddings')
+        embeddings = post_embeddings if post_embeddings is not None and len(post_embeddings) == len(docs) else None
+
+        progress_bar = st.progress(0.0, text="Calculando embeddings e redução de dimensionalidade...")
+        try:
+            with self.profiled('varredura de tópicos'):
+                sweep = run_sweep(
+                    docs, embeddings, grid, stop_words, workers,
+                    progress_callback=lambda done, total: progress_bar.progress(done / total, text=f"Ajustando configurações ({done}/{total})...")
+                )
+        except Exception as e:
+            st.error(f"Erro na varredura de hiperparâmetros: {e}", icon=":material/error:")
+            return
+        finally:
+            progress_bar.empty()
+        sweep['embedding_source'] = "encoder compartilhado" if embeddings is not None else "sentence-transformer multilíngue"
+        st.session_state['topic_sweep'] = sweep
+        st.session_state['session_memory'].touch('topic_sweep')
+
+
+    def _topic_view_model(self, topic_model):
+        """
+        Modelo usado pelas visualizações do BERTopic. Na modelagem por idioma,
+        cada idioma tem o seu, escolhido aqui. Retorna o modelo e o idioma
+        (None sem particionamento).
+        """
+        if not isinstance(topic_model, PartitionedTopicModel) or not topic_model.models:
+            return topic_model, None
+        language = st.selectbox("Idioma", options=list(topic_model.models), key='topic_view_language')
+        st.caption(f"Os gráficos mostram os tópicos de '{language}' com IDs locais: "
+                   f"o ID na tabela unificada é o ID local + {topic_model.offsets[language]}.")
+        return topic_model.models[language], language
+
+
+    def _render_topics_over_time(self, df_collected):
+        """
+        Evolução dos tópicos ao longo do tempo. Os resultados ficam em cache por
+        modelo e intervalo, então mover o controle de intervalo não refaz o cálculo.
+        """
+        topic_model = self._session_artifact('topic_model_instance')
+        if not topic_model or 'topic_id' not in df_collected.columns or 'clean_text' not in df_collected.columns:
+            st.info("A evolução dos tópicos fica disponível após a análise de tópicos.")
+            return
+
+        st.subheader("Evolução dos Tópicos ao Longo do Tempo")
+        partitioned = topic_model
+        topic_model, language = self._topic_view_model(partitioned)
+        frame = df_collected if language is None else df_collected.iloc[partitioned.positions[language]]
+        topic_ids = frame['topic_id'].tolist()
+        if language is not None:
+            topic_ids = [t if t == -1 else t - partitioned.offsets[language] for t in topic_ids]
+        col_bin, col_top = st.columns(2)
+        with col_bin:
+            bin_seconds = st.select_slider("Intervalo", options=[60, 300, 900, 1800, 3600], value=300, key='topics_over_time_bin',
+                                           format_func=lambda sec: f"{sec // 60} min")
+        with col_top:
+            top_n = st.number_input("Tópicos exibidos", min_value=1, max_value=50, value=10, key='topics_over_time_top_n')
+
+        try:
+            topics_over_time_df = self._cached_topic_result(
+                'topics_over_time', (bin_seconds, language),
+                lambda: compute_topics_over_time(topic_model, frame['clean_text'].tolist(), topic_ids, frame['created_at'].tolist(), bin_seconds)
+            )
+        except Exception as e:
+            st.warning(f"Não foi possível calcular a evolução dos tópicos: {e}", icon="⚠️")
+            return
+        if topics_over_time_df.empty:
+            st.info("Nenhum post com data válida para calcular a evolução dos tópicos.")
+            return
+        st.plotly_chart(topic_model.visualize_topics_over_time(topics_over_time_df, top_n_topics=int(top_n), title=""), use_container_width=True)
+        with st.expander("⏱️ O que este Gráfico mostra?"):
+            st.markdown("""
+            - **Cada Linha é um Tópico**: Mostra quantos posts do tópico foram publicados em cada intervalo.
+            - **Palavras-Chave por Intervalo**: Ao passar o mouse, veja as palavras que representaram o tópico naquele momento.
+            """)
+
+
+    def _render_sentiment_timeseries(self):
+        """
+        Gráfico e exportação da série temporal de sentimentos, a partir das contagens já agregadas.
+        """
+        series = st.session_state.get('sentiment_timeseries')
+        if not series or not len(series):
+            return
+        with st.expander("📈 Sentimento ao Longo do Tempo", expanded=True):
+            options = [series.bucket_seconds * m for m in (1, 5, 15, 60)]
+            col_bin, col_mode = st.columns(2)
+            with col_bin:
+                bin_seconds = st.select_slider("Intervalo", options=options, value=options[0], key='timeseries_bin',
+                                               format_func=lambda sec: f"{sec // 60} min" if sec % 60 == 0 else f"{sec} s")
+            with col_mode:
+                as_percentage = st.toggle("Mostrar em percentual", value=True, key='timeseries_pct')
+            frame = series.to_frame(bucket_seconds=bin_seconds, normalize=as_percentage)
+            st.line_chart(frame, use_container_width=True)
+            st.download_button(
+                "Baixar Série Temporal (CSV)", data=frame.to_csv(), file_name=f'bsky_sentiment_timeseries_{bin_seconds}s.csv',
+                mime='text/csv', icon=":material/download:"
+            )
+            if series.skipped:
+                st.caption(f"{series.skipped} posts sem data válida não entram na série.")
+
+
+    def _render_export_panel(self):
+        """
+        Exportação sob demanda: o arquivo só é gerado quando solicitado, gravado
+        em disco em blocos, e reaproveitado enquanto os dados não mudarem.
+        """
+        fmt = st.selectbox("Formato", options=list(EXPORT_FORMATS), format_func=lambda f: EXPORT_FORMATS[f]['label'], key='export_format')
+        # Assinatura dos dados exportados: muda quando há novos posts ou novas análises.
+        store = st.session_state['posts']
+        signature = (fmt, len(store), store.version)
+        export = st.session_state.get('export_file')
+
+        if not export or export.signature != signature or not export.exists():
+            if st.button("Preparar Exportação", icon=":material/file_export:", use_container_width=True):
+                self._discard_export_file()
+                progress_bar = st.progress(0.0, text="Gravando arquivo...")
+                try:
+                    # O texto pré-processado é um artefato interno das análises e não é exportado.
+                    path = export_posts(
+                        store.frame, fmt, columns=[col for col in store.frame.columns if col != 'clean_text'],
+                        progress_callback=lambda done, total: progress_bar.progress(done / total, text=f"Gravando {done}/{total} posts...")
+                    )
+                except Exception as e:
+                    st.error(f"Erro ao exportar os dados: {e}", icon=":material/error:")
+                    return
+                # O arquivo é apagado com o objeto, mesmo que a sessão termine sem reiniciar a coleta.
+                st.session_state['export_file'] = ExportFile(path, signature)
+                st.rerun()
+            return
+
+        with open(export.path, 'rb') as f:
+            st.download_button(
+                label="Baixar Arquivo", data=f,
+                file_name=f'bsky_data_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{EXPORT_FORMATS[fmt]["extension"]}',
+                mime=EXPORT_FORMATS[fmt]['mime'], icon=":material/download:", use_container_width=True
+            )
+
+
+    def _discard_export_file(self):
+        """
+        Remove o arquivo de exportação anterior da sessão, se houver.
+        """
+        export = st.session_state.get('export_file')
+        if export:
+            export.discard()
+        st.session_state['export_file'] = None
+
+
+    def _session_artifact(self, key):
+        """
+        Valor da sessão que pode ter sido gravado em disco pelo orçamento de memória; é recarregado se necessário.
+        """
+        return st.session_state['session_memory'].restore(st.session_state, key)
+
+
+    def _render_memory_panel(self):
+        """
+        Aplica o orçamento de memória da sessão e exibe, na barra lateral, o uso por item da sessão.
+        """
+        session_memory = st.session_state['session_memory']
+        session_memory.enforce(st.session_state)
+        stats = session_memory.stats(st.session_state)
+
+        with st.sidebar.expander("Memória da Sessão", icon=":material/memory:"):
+            st.progress(min(1.0, stats['total'] / stats['budget']), text=f"{stats['total'] / 1024**2:.1f} MB de {stats['budget'] / 1024**2:.0f} MB")
+            sizes_df = pd.DataFrame([
+                {'Item': key, 'Memória (MB)': round(size / 1024**2, 2)}
+                for key, size in stats['sizes'].items() if size >= 1024
+            ])
+            if not sizes_df.empty:
+                st.dataframe(sizes_df, use_container_width=True, hide_index=True)
+            if stats['spilled']:
+                st.caption("Em disco: " + ", ".join(f"{key} ({size / 1024**2:.1f} MB)" for key, size in stats['spilled'].items()))
+            st.caption(f"Caches descartados: {stats['dropped']} · gravações em disco: {stats['spills']} · recarregamentos: {stats['restores']}")
+
+
+    def profiled(self, name):
+        """
+        Perfila o bloco por amostragem quando o modo de perfilamento está ativo (barra lateral ou `BSKYMOOD_PROFILE=1`).
+        """
+        return st.session_state['profile_store'].section(name, enabled=st.session_state.get('profiling_enabled', False))
+
+
+    def _render_profiler_panel(self):
+        """
+        Controle do modo de perfilamento e, se houver perfis, as funções mais custosas e o download para o speedscope.
+        """
+        st.sidebar.toggle("Perfilar Execuções", key='profiling_enabled', help="Amostra a pilha de cada execução do script e das etapas longas. Os perfis podem ser baixados e abertos em https://www.speedscope.app.")
+        store = st.session_state['profile_store']
+        if not len(store):
+            return
+
+        with st.sidebar.expander("Perfis de Execução", icon=":material/speed:"):
+            profiles = list(store.profiles)
+            index = st.selectbox(
+                "Perfil", options=range(len(profiles)), key='profile_selected',
+                format_func=lambda i: f"{profiles[i].name} · {datetime.fromtimestamp(profiles[i].started_at).strftime('%H:%M:%S')} · {profiles[i].duration:.2f} s"
+            )
+            profile = profiles[index]
+            st.caption(f"{len(profile.samples)} amostras em {profile.duration:.2f} s")
+            hot = pd.DataFrame(profile.hot_functions(limit=15))
+            if not hot.empty:
+                st.dataframe(hot.rename(columns={'function': 'Função', 'location': 'Local', 'self_s': 'Próprio (s)', 'total_s': 'Total (s)', 'self_pct': 'Próprio (%)'}),
+                             use_container_width=True, hide_index=True)
+            st.download_button(
+                "Baixar Flame Graph (speedscope)", data=profile.to_speedscope(),
+                file_name=f"bsky_profile_{profile.name}_{datetime.fromtimestamp(profile.started_at).strftime('%Y%m%d_%H%M%S')}.speedscope.json",
+                mime='application/json', icon=":material/download:", use_container_width=True
+            )
+
+
     def _reset_all_states(self):
         """
         Função auxiliar para limpar todos os estados da sessão.
         """
+        self._discard_export_file()
+        st.session_state['session_memory'].discard()
         st.session_state.update({
-            'data': [], 'collection_ended': False, 'collecting': False, 'sentiment_results': [], 
-            'collected_df': pd.DataFrame(), 'collected_df_for_download': pd.DataFrame(),
-            'stop_event': multiprocessing.Event(), 'data_queue': multiprocessing.Queue(),
+            'data': [], 'posts': None, 'collection_ended': False, 'collecting': False,
+            'stop_event': multiprocessing.Event(),
             'topic_model_instance': None, 'topic_info_df': pd.DataFrame(), 'topics_analyzed': False, 
-            'performing_topic_analysis': False, 'texts_for_topic_analysis': [],
-            'sentiment_analysis_toast_shown': False, 'topics_analyzed_toast_shown': False
+            'performing_topic_analysis': False,
+            'sentiment_analysis_toast_shown': False, 'topics_analyzed_toast_shown': False,
+            'ingest_filters': None, 'sampler': None, 'subscription': None, 'sentiment_timeseries': None,
+            'topic_model_fingerprint': None, 'topic_result_cache': None, 'post_browsers': None,
+            'reply_graph': ReplyGraph(), 'post_embeddings': None, 'topic_quality': None, 'topic_sweep': None
         })
 
 
@@ -599,8 +1352,58 @@ class BskyDataCollectorApp:
                 help="Defina por quanto tempo os posts serão coletados."
             )
 
+            registry = load_registry()
+            model_options = ['auto', *registry]
+            st.session_state['sentiment_model'] = st.sidebar.selectbox(
+                "Modelo de Sentimentos", options=model_options,
+                index=model_options.index(st.session_state['sentiment_model']) if st.session_state['sentiment_model'] in model_options else 1,
+                format_func=lambda name: f"Automático (até {SENTIMENT_LATENCY_BUDGET_MS:g} ms por post)" if name == 'auto' else f"{name} — {registry[name]['description']}",
+                help="No modo automático, o modelo e o backend são escolhidos pelos perfis gerados com `python model_zoo.py`: o mais fiel ao modelo de referência que cabe no orçamento de latência (BSKYMOOD_LATENCY_BUDGET_MS)."
+            )
+            if st.session_state['sentiment_model'] == 'auto':
+                model, backend = self._resolve_sentiment_model()
+                st.sidebar.caption(f"Selecionado: {model} ({backend})")
+
+            st.session_state['shared_encoder'] = st.sidebar.toggle(
+                "Encoder Compartilhado", value=st.session_state['shared_encoder'],
+                help="Uma única passada do modelo por post produz o sentimento e o embedding usado pela análise de tópicos, em vez de codificar os posts de novo com o sentence-transformer. Reduz o custo da análise de tópicos; os embeddings do classificador de sentimentos tendem a separar os temas com menos nitidez (veja outliers e diversidade no resultado)."
+            )
+            st.session_state['sentiment_backend'] = st.sidebar.selectbox(
+                "Backend de Sentimentos", options=SENTIMENT_BACKENDS,
+                index=SENTIMENT_BACKENDS.index(st.session_state['sentiment_backend']) if st.session_state['sentiment_backend'] in SENTIMENT_BACKENDS else 0,
+                help="'pytorch' usa o modelo original (fp32). 'onnx-int8' usa o modelo quantizado no ONNX Runtime, mais rápido e leve em CPU. A primeira execução converte e grava o modelo em cache local.",
+                disabled=st.session_state['sentiment_model'] == 'auto' or st.session_state['shared_encoder']
+            )
+            st.session_state['sentiment_workers'] = st.sidebar.number_input(
+                "Processos de Inferência", min_value=1, max_value=max(1, os.cpu_count() or 1),
+                value=min(st.session_state['sentiment_workers'], max(1, os.cpu_count() or 1)), step=1,
+                help="Divide a análise de sentimentos entre vários processos, cada um com sua própria cópia do modelo. Use 1 para desativar."
+            )
+            st.session_state['partition_topics'] = st.sidebar.toggle(
+                "Tópicos por Idioma", value=st.session_state['partition_topics'],
+                help="Ajusta um modelo de tópicos por idioma (inglês, português e espanhol), em processos paralelos e com as stopwords de cada idioma. Os tópicos não misturam idiomas e o tempo acompanha o maior idioma, e não o total de posts. Idiomas com poucos posts são reunidos em um modelo multilíngue."
+            )
+
+            with st.sidebar.expander("Filtros de Coleta", icon=":material/filter_alt:"):
+                keywords_raw = st.text_area("Palavras-chave", placeholder="economia, eleições, brasil", help="Coleta apenas posts que contenham ao menos uma das palavras (separadas por vírgula ou linha).")
+                regexes_raw = st.text_area("Expressões regulares", placeholder="\\bcopa( do mundo)?\\b", help="Uma expressão por linha. Posts que casem com qualquer uma são coletados.")
+                allow_raw = st.text_area("Somente estes autores", placeholder="did:plc:... ou handle.bsky.social", help="Se preenchido, coleta apenas posts destes autores.")
+                deny_raw = st.text_area("Ignorar estes autores", placeholder="did:plc:... ou handle.bsky.social", help="Posts destes autores são descartados.")
+
+            with st.sidebar.expander("Amostragem", icon=":material/shuffle:"):
+                sampling_mode = st.selectbox("Modo", options=list(SAMPLING_MODES), format_func=SAMPLING_MODES.get, help="Mantém um número fixo de posts, independentemente do volume recebido. Percentuais são ponderados pelo peso amostral. Na amostragem estratificada, a capacidade não usada por um estrato é redistribuída entre os demais.")
+                sampling_capacity = st.number_input("Capacidade (posts)", min_value=100, max_value=1_000_000, value=5_000, step=500, disabled=sampling_mode is None)
+                sampling_seed = st.number_input("Semente", min_value=0, value=42, step=1, disabled=sampling_mode is None, help="Mesma semente e mesmo fluxo de posts produzem a mesma amostra.")
+
             if st.sidebar.button("Iniciar Coleta", icon=":material/play_circle:", use_container_width=True, type="primary"):
                 self._reset_all_states()
+                if sampling_mode:
+                    st.session_state['sampler'] = ReservoirSampler(int(sampling_capacity), sampling_mode, seed=int(sampling_seed))
+                try:
+                    st.session_state['ingest_filters'] = self._build_ingest_filters(keywords_raw, regexes_raw, allow_raw, deny_raw)
+                except Exception as e:
+                    st.sidebar.error(f"Filtros de coleta inválidos: {e}", icon=":material/error:")
+                    st.stop()
                 st.session_state['collecting'] = True
                 st.session_state['stop_event'].clear()
                 st.rerun()
@@ -609,9 +1412,14 @@ class BskyDataCollectorApp:
             self.collect_data()
 
         if not st.session_state['collecting']:
-            self.display_data()
+            with self.profiled('renderização'):
+                self.display_data()
+            self._render_memory_panel()
+
+        self._render_profiler_panel()
 
 
 if __name__ == "__main__":
     app = BskyDataCollectorApp()
-    app.run()
\ No newline at end of file
+    with app.profiled('execução'):
+        app.run()
\ No newline at end of file
@@ -0,0 +1,307 @@
+"""
+Orçamento de memória por sessão.
+
+Cada sessão do Streamlit guarda os posts, DataFrames, caches de figuras e o
+modelo de tópicos ajustado. Com vários analistas no mesmo servidor, esses
+artefatos são contabilizados por sessão e, quando o orçamento é excedido,
+caches recomputáveis são descartados e artefatos frios (embeddings dos
+posts, modelo de tópicos) são gravados em disco e recarregados de
+forma transparente quando voltam a ser usados.
+"""
+
+import os
+import pickle
+import shutil
+import sys
+import time
+import uuid
+import weakref
+from contextlib import contextmanager
+from itertools import islice
+
+from inference import DEFAULT_CACHE_DIR
+
+DEFAULT_SPILL_DIR = os.path.join(DEFAULT_CACHE_DIR, 'spill')
+DEFAULT_BUDGET_MB = 1024
+# Caches que podem ser descartados e recalculados sob demanda, na ordem de descarte.
+DROPPABLE_KEYS = ('topic_result_cache', 'post_browsers')
+# Artefatos que podem ser gravados em disco, do mais frio para o mais quente.
+SPILLABLE_KEYS = ('post_embeddings', 'topic_sweep', 'topic_model_instance')
+# Diretórios de sessões encerradas sem limpeza (ex.: servidor reiniciado) são removidos após este prazo.
+STALE_SPILL_SECONDS = 24 * 60 * 60
+# Profundidade da estimativa de artefatos opacos (modelos de tópicos, varredura), que guardam
+# matrizes e vocabulários alguns níveis abaixo do objeto.
+OPAQUE_SIZE_DEPTH = 8
+
+
+def estimate_size(value, sample=200, depth=4):
+    """
+    Estimativa do tamanho em bytes de um valor da sessão. Coleções grandes são
+    estimadas a partir de uma amostra dos itens, e objetos pelos seus atributos.
+    """
+    if hasattr(value, 'memory_usage') and hasattr(value, 'columns'):
+        return int(value.memory_usage(deep=True).sum())
+    if hasattr(value, 'nbytes') and hasattr(value, 'dtype'):
+        return int(value.nbytes)
+    if depth == 0 or value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        # Os primeiros itens servem de amostra, sem percorrer o dicionário inteiro.
+        items = list(islice(value.items(), sample))
+        return sys.getsizeof(value) + _scaled_size([item for pair in items for item in pair], len(value) * 2, sample, depth)
+    if isinstance(value, (set, frozenset)):
+        return sys.getsizeof(value) + _scaled_size(list(islice(value, sample)), len(value), sample, depth)
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + _scaled_size(value[::max(1, len(value) // sample)], len(value), sample, depth)
+    if hasattr(value, '__dict__'):
+        return sys.getsizeof(value) + estimate_size(vars(value), sample, depth - 1)
+    return sys.getsizeof(value)
+
+
+def _scaled_size(sampled, total, sample, depth):
+    # Tamanho médio dos itens amostrados, extrapolado para o total de itens.
+    if not sampled:
+        return 0
+    return int(sum(estimate_size(item, sample, depth - 1) for item in sampled) / len(sampled) * total)
+
+
+def _embedding_holders(value):
+    # Modelos BERTopic dentro de um artefato: o próprio modelo, os modelos por idioma ou os da varredura.
+    if hasattr(value, 'embedding_model'):
+        return [value]
+    if isinstance(getattr(value, 'models', None), dict):
+        return [model for model in value.models.values() if hasattr(model, 'embedding_model')]
+    if isinstance(value, dict) and isinstance(value.get('results'), list):
+        return [result['model'] for result in value['results'] if hasattr(result.get('model'), 'embedding_model')]
+    return []
+
+
+@contextmanager
+def detached_embedding_models(value):
+    """
+    Desanexa temporariamente os modelos de embeddings (sentence-transformers)
+    dos modelos de tópicos do artefato, para que não sejam serializados.
+    Produz os modelos desanexados, na ordem de `_embedding_holders`.
+    """
+    holders = _embedding_holders(value)
+    models = [holder.embedding_model for holder in holders]
+    for holder in holders:
+        holder.embedding_model = None
+    try:
+        yield models
+    finally:
+        for holder, model in zip(holders, models):
+            holder.embedding_model = model
+
+
+def parameter_size(model):
+    """
+    Bytes dos pesos de um modelo de embeddings, pela contagem de parâmetros
+    (o backend do BERTopic guarda o modelo PyTorch em `embedding_model`).
+    """
+    for module in (model, getattr(model, 'embedding_model', None)):
+        if hasattr(module, 'parameters'):
+            return sum(p.numel() * p.element_size() for p in module.parameters())
+    return estimate_size(model)
+
+
+def _embedding_models_size(models):
+    # Modelos compartilhados entre modelos de tópicos são contados uma vez.
+    return sum(parameter_size(model) for model in {id(model): model for model in models if model is not None}.values())
+
+
+class SpilledArtifact:
+    """
+    Marcador deixado na sessão no lugar de um artefato gravado em disco.
+    """
+
+    def __init__(self, key, path, size):
+        self.key = key
+        self.path = path
+        self.size = size
+        self.spilled_at = time.time()
+
+    def __repr__(self):
+        return f"SpilledArtifact({self.key!r}, {self.size} bytes)"
+
+
+def prune_stale_spills(spill_dir=DEFAULT_SPILL_DIR, max_age=STALE_SPILL_SECONDS):
+    """
+    Remove diretórios de descarte de sessões antigas.
+    """
+    if not os.path.isdir(spill_dir):
+        return
+    now = time.time()
+    for name in os.listdir(spill_dir):
+        path = os.path.join(spill_dir, name)
+        if os.path.isdir(path) and now - os.path.getmtime(path) > max_age:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class SessionMemory:
+    """
+    Contabilidade de memória de uma sessão, com orçamento configurável.
+
+    `enforce` mede os valores da sessão e, enquanto o total exceder o
+    orçamento, descarta caches recomputáveis e grava em disco o artefato
+    menos usado recentemente. `restore` traz de volta um artefato gravado,
+    que não volta ao disco antes do próximo `enforce`. Os modelos de
+    embeddings dos modelos de tópicos não são gravados em disco: ficam em
+    memória e são contados pela quantidade de parâmetros.
+    Os arquivos da sessão são apagados quando ela é encerrada.
+    """
+
+    def __init__(self, budget_bytes, spill_dir=DEFAULT_SPILL_DIR):
+        self.budget_bytes = budget_bytes
+        self.spill_dir = os.path.join(spill_dir, uuid.uuid4().hex)
+        self.spilled = {}
+        self.last_access = {}
+        self.dropped = 0
+        self.spills = 0
+        self.restores = 0
+        # Tamanhos de objetos opacos, medidos uma vez por objeto: (referência fraca, estimado, modelos de embeddings).
+        self._opaque_sizes = {}
+        # Modelos de embeddings dos artefatos gravados em disco, mantidos em memória para serem reanexados.
+        self._embedding_models = {}
+        # Artefatos recarregados desde o último `enforce`, que não voltam ao disco na mesma execução.
+        self._restored = set()
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.spill_dir, True)
+        prune_stale_spills(spill_dir)
+
+    def touch(self, key):
+        self.last_access[key] = time.time()
+
+    def _opaque_size(self, key, value):
+        # O modelo de tópicos é estimado pelos seus atributos, sem serializá-lo na execução do script,
+        # e o modelo de embeddings pela contagem de parâmetros; uma vez por objeto. A referência fraca
+        # garante que um objeto novo no mesmo endereço de memória não herde o tamanho do anterior.
+        cached = self._opaque_sizes.get(key)
+        if cached and cached[0]() is value:
+            return cached[1:]
+        with detached_embedding_models(value) as embedding_models:
+            size = estimate_size(value, depth=OPAQUE_SIZE_DEPTH)
+        embedding_size = _embedding_models_size(embedding_models)
+        try:
+            self._opaque_sizes[key] = (weakref.ref(value), size, embedding_size)
+        except TypeError:
+            # Dicionários (ex.: a varredura) não aceitam referências fracas e são estimados a cada execução.
+            self._opaque_sizes.pop(key, None)
+        return size, embedding_size
+
+    def usage(self, state):
+        """
+        Bytes estimados de cada valor da sessão (artefatos em disco não contam).
+        Os modelos de embeddings dos modelos de tópicos aparecem em uma entrada
+        própria (`<chave>.embedding_model`), pois não são gravados em disco.
+        """
+        sizes = {}
+        for key in list(state.keys()):
+            value = state[key]
+            if isinstance(value, (SpilledArtifact, SessionMemory)):
+                continue
+            if key not in SPILLABLE_KEYS or isinstance(value, (list, tuple)) or hasattr(value, 'nbytes'):
+                sizes[key] = estimate_size(value)
+                continue
+            sizes[key], embedding_size = self._opaque_size(key, value)
+            if embedding_size:
+                sizes[f'{key}.embedding_model'] = embedding_size
+        for key, models in self._embedding_models.items():
+            sizes[f'{key}.embedding_model'] = _embedding_models_size(models)
+        return sizes
+
+    def enforce(self, state):
+        """
+        Aplica o orçamento à sessão. Retorna as chaves descartadas ou gravadas em disco.
+        """
+        sizes = self.usage(state)
+        total = sum(sizes.values())
+        evicted = []
+        for key in DROPPABLE_KEYS:
+            if total <= self.budget_bytes:
+                return evicted
+            if state.get(key):
+                total -= sizes.get(key, 0)
+                state[key] = None
+                self.dropped += 1
+                evicted.append(key)
+
+        candidates = sorted(
+            (key for key in SPILLABLE_KEYS
+             if state.get(key) and not isinstance(state[key], SpilledArtifact) and key not in self._restored),
+            key=lambda k: self.last_access.get(k, 0),
+        )
+        self._restored.clear()
+        for key in candidates:
+            if total <= self.budget_bytes:
+                break
+            if self.spill(state, key, sizes.get(key, 0)):
+                total -= sizes.get(key, 0)
+                evicted.append(key)
+        return evicted
+
+    def spill(self, state, key, size=0):
+        """
+        Grava um artefato em disco e deixa um marcador no seu lugar na sessão.
+        """
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f'{key}.pkl')
+        try:
+            with open(path, 'wb') as f, detached_embedding_models(state[key]) as embedding_models:
+                pickle.dump(state[key], f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            print(f"Não foi possível gravar '{key}' em disco: {e}")
+            if os.path.exists(path):
+                os.remove(path)
+            return False
+        if any(model is not None for model in embedding_models):
+            self._embedding_models[key] = embedding_models
+        state[key] = SpilledArtifact(key, path, size)
+        self.spilled[key] = state[key]
+        self._opaque_sizes.pop(key, None)
+        self.spills += 1
+        return True
+
+    def restore(self, state, key):
+        """
+        Retorna o valor da chave, recarregando-o do disco se tiver sido gravado.
+        """
+        value = state.get(key)
+        if isinstance(value, SpilledArtifact):
+            with open(value.path, 'rb') as f:
+                value = pickle.load(f)
+            os.remove(state[key].path)
+            embedding_models = iter(self._embedding_models.pop(key, ()))
+            for holder in _embedding_holders(value):
+                holder.embedding_model = next(embedding_models, None)
+            state[key] = value
+            self.spilled.pop(key, None)
+            self._restored.add(key)
+            self.restores += 1
+        self.touch(key)
+        return value
+
+    def discard(self):
+        """
+        Apaga os arquivos gravados em disco (ex.: ao reiniciar a coleta).
+        """
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+        self.spilled = {}
+        self.last_access = {}
+        self._opaque_sizes = {}
+        self._embedding_models = {}
+        self._restored = set()
+
+    def stats(self, state):
+        """
+        Resumo para o painel de memória: uso por chave, total, orçamento e contadores.
+        """
+        sizes = self.usage(state)
+        return {
+            'sizes': dict(sorted(sizes.items(), key=lambda item: item[1], reverse=True)),
+            'total': sum(sizes.values()),
+            'budget': self.budget_bytes,
+            'spilled': {key: artifact.size for key, artifact in self.spilled.items()},
+            'dropped': self.dropped,
+            'spills': self.spills,
+            'restores': self.restores,
+        }
@@ -0,0 +1,256 @@
+"""
+Registro de modelos de sentimentos e perfis de desempenho de cada um.
+
+Cada combinação de modelo e backend pode ser avaliada em um conjunto local de
+posts rotulados: vazão, latência por post (p50/p99), pico de memória,
+concordância com o modelo de referência e acurácia. Os perfis ficam em cache
+e permitem escolher automaticamente o modelo mais fiel à referência que
+cabe em um orçamento de latência.
+
+Uso:
+    python model_zoo.py                          # perfila todos os modelos e backends
+    python model_zoo.py --models distilbert-multilingual --backends onnx-int8
+    python model_zoo.py --budget-ms 40           # recomenda um modelo para 40 ms (p99)
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from inference import DEFAULT_CACHE_DIR, SENTIMENT_BACKENDS, SENTIMENT_MODEL, load_sentiment_backend
+
+REFERENCE_MODEL = 'distilbert-multilingual'
+REFERENCE_BACKEND = 'pytorch'
+# Modelos conhecidos. `labels` converte os rótulos do modelo para positive/negative/neutral.
+DEFAULT_MODELS = {
+    'distilbert-multilingual': {
+        'model': SENTIMENT_MODEL,
+        'labels': {},
+        'description': "DistilBERT multilíngue (referência)",
+    },
+    'xlm-roberta-twitter': {
+        'model': 'cardiffnlp/twitter-xlm-roberta-base-sentiment',
+        'labels': {'Negative': 'negative', 'Neutral': 'neutral', 'Positive': 'positive'},
+        'description': "XLM-RoBERTa ajustado em tweets (maior e mais lento)",
+    },
+    'multilingual-5-classes': {
+        'model': 'tabularisai/multilingual-sentiment-analysis',
+        'labels': {'Very Negative': 'negative', 'Negative': 'negative', 'Neutral': 'neutral', 'Positive': 'positive', 'Very Positive': 'positive'},
+        'description': "DistilBERT multilíngue com 5 classes, agrupadas em 3",
+    },
+}
+DEFAULT_EVAL_SET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sentiment_eval.jsonl')
+DEFAULT_PROFILES_PATH = os.path.join(DEFAULT_CACHE_DIR, 'model_profiles.json')
+
+
+def load_registry(path=None):
+    """
+    Modelos disponíveis: os padrão, acrescidos (ou sobrescritos) pelos do arquivo JSON
+    em `path` ou em `BSKYMOOD_MODEL_REGISTRY` (`{"nome": {"model": ..., "labels": {...}}}`).
+    """
+    registry = {name: dict(entry) for name, entry in DEFAULT_MODELS.items()}
+    path = path or os.environ.get('BSKYMOOD_MODEL_REGISTRY')
+    if path:
+        with open(path, encoding='utf-8') as f:
+            for name, entry in json.load(f).items():
+                registry[name] = {'labels': {}, 'description': entry.get('model', name), **entry}
+    return registry
+
+
+class LabelMappedPipeline:
+    """
+    Converte os rótulos de um backend para o vocabulário do aplicativo (positive/negative/neutral).
+    """
+
+    def __init__(self, pipeline, labels=None):
+        self.pipeline = pipeline
+        self.labels = labels or {}
+
+    def __call__(self, texts, **kwargs):
+        outputs = self.pipeline(texts, **kwargs)
+        return [{**output, 'label': self.labels.get(output['label'], output['label'].lower())} for output in outputs]
+
+
+def load_registered_model(name, backend='pytorch', num_threads=None, num_workers=1, registry=None):
+    """
+    Carrega um modelo do registro no backend pedido, com os rótulos já convertidos.
+    """
+    registry = registry or load_registry()
+    if name not in registry:
+        raise ValueError(f"Modelo de sentimentos desconhecido: {name}. Opções: {', '.join(registry)}")
+    entry = registry[name]
+    pipeline = load_sentiment_backend(backend, entry['model'], num_threads=num_threads, num_workers=num_workers)
+    return LabelMappedPipeline(pipeline, entry.get('labels'))
+
+
+def load_eval_set(path=None):
+    """
+    Lê o conjunto de avaliação (JSONL com `text` e, opcionalmente, `label`).
+    Retorna os textos e os rótulos (None se o conjunto não for rotulado).
+    """
+    texts, labels = [], []
+    with open(path or DEFAULT_EVAL_SET, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                texts.append(row['text'])
+                labels.append(row.get('label'))
+    return texts, (labels if all(labels) else None)
+
+
+def _eval_fingerprint(texts):
+    return hashlib.sha1('\n'.join(texts).encode('utf-8')).hexdigest()[:16]
+
+
+def _profile_worker(entry, backend, texts, batch_size, num_threads):
+    """
+    Executado em um processo novo, para que o pico de memória medido seja apenas o do modelo.
+    """
+    import resource
+
+    t0 = time.perf_counter()
+    pipeline = LabelMappedPipeline(load_sentiment_backend(backend, entry['model'], num_threads=num_threads), entry.get('labels'))
+    load_s = time.perf_counter() - t0
+
+    latencies, labels = [], []
+    for text in texts:
+        t0 = time.perf_counter()
+        labels.append(pipeline([text], truncation=True)[0]['label'])
+        latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    pipeline(texts, batch_size=batch_size, truncation=True)
+    batch_s = time.perf_counter() - t0
+
+    latencies.sort()
+    return {
+        'labels': labels,
+        'load_s': round(load_s, 3),
+        'p50_ms': round(statistics.median(latencies) * 1000, 3),
+        'p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3),
+        'posts_per_s': round(len(texts) / batch_s, 2) if batch_s > 0 else None,
+        # ru_maxrss é dado em KB no Linux.
+        'peak_memory_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def _read_profiles(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_profiles(path, profiles):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def profile_models(candidates=None, eval_path=None, batch_size=16, num_threads=None, force=False, cached_only=False,
+                   profiles_path=DEFAULT_PROFILES_PATH, registry=None, progress_callback=None):
+    """
+    Perfila as combinações `(modelo, backend)` em `candidates` (padrão: todas)
+    no conjunto de avaliação. Perfis já calculados para o mesmo conjunto,
+    modelo e máquina são lidos do cache, a menos que `force=True`; com
+    `cached_only=True`, nada é calculado.
+    Retorna `{"modelo@backend": perfil}`.
+    """
+    registry = registry or load_registry()
+    candidates = list(candidates or [(name, backend) for name in registry for backend in SENTIMENT_BACKENDS])
+    reference = (REFERENCE_MODEL, REFERENCE_BACKEND)
+    if reference not in candidates:
+        # A concordância é medida contra a referência, que precisa ser perfilada também.
+        candidates.insert(0, reference)
+
+    texts, gold = load_eval_set(eval_path)
+    fingerprint = _eval_fingerprint(texts)
+    cache = _read_profiles(profiles_path)
+    profiles = {}
+    for done, (name, backend) in enumerate(candidates, start=1):
+        entry = registry[name]
+        key = f"{name}@{backend}"
+        cache_key = f"{key}|{entry['model']}|{fingerprint}|cpu{os.cpu_count()}|threads{num_threads or 'auto'}"
+        if cache_key in cache and not force:
+            profiles[key] = cache[cache_key]
+        elif not cached_only:
+            if progress_callback:
+                progress_callback(done, len(candidates), key)
+            try:
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                    profile = pool.submit(_profile_worker, entry, backend, texts, batch_size, num_threads).result()
+            except Exception as e:
+                # Falhas (ex.: modelo indisponível) não vão para o cache.
+                profiles[key] = {'error': str(e)}
+                continue
+            profile.update({'model': name, 'backend': backend, 'profiled_at': time.strftime('%Y-%m-%dT%H:%M:%S')})
+            cache[cache_key] = profiles[key] = profile
+    if not cached_only:
+        _write_profiles(profiles_path, cache)
+
+    reference_labels = profiles.get(f"{REFERENCE_MODEL}@{REFERENCE_BACKEND}", {}).get('labels')
+    summary = {}
+    for key, profile in profiles.items():
+        summary[key] = {k: v for k, v in profile.items() if k != 'labels'}
+        labels = profile.get('labels')
+        if labels is None:
+            continue
+        if reference_labels:
+            summary[key]['agreement'] = round(sum(a == b for a, b in zip(labels, reference_labels)) / len(labels), 4)
+        if gold:
+            summary[key]['accuracy'] = round(sum(a == b for a, b in zip(labels, gold)) / len(labels), 4)
+    return summary
+
+
+def select_model(profiles, latency_budget_ms, latency_metric='p99_ms'):
+    """
+    Entre os perfis que cabem no orçamento de latência, escolhe o de maior
+    concordância com a referência (ou acurácia), desempatando pela vazão.
+    Retorna a chave `"modelo@backend"` ou None se nenhum couber.
+    """
+    fits = {
+        key: profile for key, profile in profiles.items()
+        if 'error' not in profile and profile.get(latency_metric) is not None and profile[latency_metric] <= latency_budget_ms
+    }
+    if not fits:
+        return None
+    return max(fits, key=lambda key: (fits[key].get('agreement', fits[key].get('accuracy', 0)), fits[key].get('posts_per_s') or 0))
+
+
+def main(argv=None):
+    registry = load_registry()
+    parser = argparse.ArgumentParser(description="Perfis de latência e concordância dos modelos de sentimentos do BskyMood.")
+    parser.add_argument('--models', nargs='+', choices=list(registry), default=list(registry), help="Modelos a perfilar.")
+    parser.add_argument('--backends', nargs='+', choices=SENTIMENT_BACKENDS, default=list(SENTIMENT_BACKENDS), help="Backends a perfilar.")
+    parser.add_argument('--eval', default=None, help="Conjunto de avaliação em JSONL (padrão: sentiment_eval.jsonl).")
+    parser.add_argument('--threads', type=int, default=None, help="Threads de inferência por modelo.")
+    parser.add_argument('--budget-ms', type=float, default=None, help="Orçamento de latência (p99, ms) para recomendar um modelo.")
+    parser.add_argument('--force', action='store_true', help="Refaz os perfis, ignorando o cache.")
+    args = parser.parse_args(argv)
+
+    profiles = profile_models(
+        [(name, backend) for name in args.models for backend in args.backends], eval_path=args.eval,
+        num_threads=args.threads, force=args.force, registry=registry,
+        progress_callback=lambda done, total, key: print(f"[{done}/{total}] {key}...", flush=True),
+    )
+    for key, profile in profiles.items():
+        if 'error' in profile:
+            print(f"{key}: erro — {profile['error']}")
+            continue
+        print(f"{key}: p50 {profile['p50_ms']} ms · p99 {profile['p99_ms']} ms · {profile['posts_per_s']} posts/s · "
+              f"pico {profile['peak_memory_mb']} MB · concordância {profile.get('agreement')} · acurácia {profile.get('accuracy')}")
+    if args.budget_ms is not None:
+        choice = select_model(profiles, args.budget_ms)
+        print(f"Recomendado para {args.budget_ms} ms (p99): {choice or 'nenhum modelo cabe no orçamento'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Perfilador por amostragem das execuções do script.
+
+O Streamlit reexecuta o script inteiro a cada interação. Com o modo de
+perfilamento ativo, cada execução e cada etapa longa (sentimentos, tópicos,
+renderização) são amostradas por uma thread auxiliar, que registra a pilha
+da thread do script a intervalos fixos. Os últimos perfis ficam em memória e
+podem ser baixados no formato do speedscope (https://www.speedscope.app),
+que os exibe como flame graphs, junto com as funções mais custosas.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+DEFAULT_INTERVAL = 0.005
+DEFAULT_HISTORY = 10
+MAX_STACK_DEPTH = 256
+
+
+class Profile:
+    """
+    Amostras de pilha de uma execução: cada amostra é uma tupla de quadros
+    (da raiz até a função em execução) e o tempo que ela representa.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.time()
+        self.duration = 0.0
+        self.frames = {}
+        self.samples = []
+        self.weights = []
+
+    def _frame_index(self, code):
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self.frames.get(key)
+        if index is None:
+            index = self.frames[key] = len(self.frames)
+        return index
+
+    def add_sample(self, frame, weight):
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            stack.append(self._frame_index(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+        self.samples.append(tuple(stack))
+        self.weights.append(weight)
+
+    def hot_functions(self, limit=20):
+        """
+        Funções ordenadas pelo tempo próprio (no topo da pilha), com o tempo total (em qualquer posição da pilha).
+        """
+        names = {index: key for key, index in self.frames.items()}
+        self_time, total_time = Counter(), Counter()
+        for stack, weight in zip(self.samples, self.weights):
+            if not stack:
+                continue
+            self_time[stack[-1]] += weight
+            for index in set(stack):
+                total_time[index] += weight
+        sampled = sum(self.weights) or 1.0
+        rows = []
+        for index, seconds in self_time.most_common(limit):
+            name, filename, line = names[index]
+            rows.append({
+                'function': name,
+                'location': f"{os.path.basename(filename)}:{line}",
+                'self_s': round(seconds, 4),
+                'total_s': round(total_time[index], 4),
+                'self_pct': round(seconds / sampled * 100, 1),
+            })
+        return rows
+
+    def to_speedscope(self):
+        """
+        Perfil no formato de arquivo do speedscope (perfil amostrado, em segundos).
+        """
+        frames = [None] * len(self.frames)
+        for (name, filename, line), index in self.frames.items():
+            frames[index] = {'name': name, 'file': filename, 'line': line}
+        return json.dumps({
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': self.name,
+            'exporter': 'bskymood',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': self.name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': round(self.duration, 6),
+                'samples': [list(stack) for stack in self.samples],
+                'weights': self.weights,
+            }],
+        })
+
+
+class SamplingProfiler:
+    """
+    Amostra a pilha de uma thread (por padrão, a que inicia o perfilador) a cada `interval` segundos.
+    """
+
+    def __init__(self, name, interval=DEFAULT_INTERVAL, thread_id=None):
+        self.profile = Profile(name)
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name=f'bsky-profiler-{name}', daemon=True)
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.profile.add_sample(frame, now - last)
+            last = now
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._sampler.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._sampler.join()
+        self.profile.duration = time.perf_counter() - self._started
+        return self.profile
+
+
+class ProfileStore:
+    """
+    Últimos `max_profiles` perfis de uma sessão, do mais recente para o mais antigo.
+    """
+
+    def __init__(self, max_profiles=DEFAULT_HISTORY, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.profiles = deque(maxlen=max_profiles)
+
+    def __len__(self):
+        return len(self.profiles)
+
+    @contextmanager
+    def section(self, name, enabled=True):
+        """
+        Perfila o bloco, se `enabled`. O perfil é guardado mesmo se o bloco for
+        interrompido (ex.: `st.rerun()`, que encerra a execução com uma exceção).
+        """
+        if not enabled:
+            yield None
+            return
+        profiler = SamplingProfiler(name, self.interval).start()
+        try:
+            yield profiler.profile
+        finally:
+            self.profiles.appendleft(profiler.stop())
@@ -0,0 +1,133 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from analytics import PostStore, SentimentTimeSeries, build_posts_frame, memory_report, parse_timestamp
+
+
+def test_parse_timestamp_accepts_iso_strings_and_datetimes():
+    expected = datetime(2025, 1, 1, 12, tzinfo=timezone.utc).timestamp()
+
+    assert parse_timestamp('2025-01-01T12:00:00Z') == expected
+    assert parse_timestamp('2025-01-01T12:00:00') == expected
+    assert parse_timestamp(datetime(2025, 1, 1, 12, tzinfo=timezone.utc)) == expected
+    assert parse_timestamp('ontem') is None
+    assert parse_timestamp(None) is None
+
+
+def test_posts_are_counted_in_their_base_bucket():
+    series = SentimentTimeSeries(bucket_seconds=60)
+    series.add('2025-01-01T00:00:10Z', 'positive')
+    series.add('2025-01-01T00:00:50Z', 'negative', weight=2.5)
+    series.add('2025-01-01T00:01:05Z', 'positive')
+    series.add('sem data', 'positive')
+
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp()
+    assert series.buckets == {start: {'positive': 1.0, 'negative': 2.5}, start + 60: {'positive': 1.0}}
+    assert series.skipped == 1
+    assert len(series) == 2
+
+
+def _series():
+    series = SentimentTimeSeries(bucket_seconds=60)
+    for minute, sentiment in [(0, 'positive'), (1, 'negative'), (2, 'positive'), (5, 'neutral'), (6, 'positive')]:
+        series.add(f'2025-01-01T00:{minute:02d}:30Z', sentiment)
+    return series
+
+
+def test_rebucketing_merges_base_buckets():
+    pytest.importorskip('pandas')
+
+    frame = _series().to_frame(bucket_seconds=300)
+
+    assert [ts.strftime('%H:%M') for ts in frame.index] == ['00:00', '00:05']
+    assert list(frame.columns) == ['positive', 'negative', 'neutral']
+    assert frame.to_dict('list') == {'positive': [2.0, 1.0], 'negative': [1.0, 0.0], 'neutral': [0.0, 1.0]}
+
+
+def test_normalized_frame_gives_percentages_per_bucket():
+    pytest.importorskip('pandas')
+
+    frame = _series().to_frame(bucket_seconds=300, normalize=True)
+
+    assert frame.iloc[0].tolist() == [66.7, 33.3, 0.0]
+    assert frame.iloc[1].tolist() == [50.0, 0.0, 50.0]
+
+
+def test_rebucketing_requires_a_multiple_of_the_base_bucket():
+    pytest.importorskip('pandas')
+
+    with pytest.raises(ValueError):
+        _series().to_frame(bucket_seconds=90)
+
+
+def _records():
+    return [
+        {'text': 'bom dia', 'created_at': '2025-01-01T00:00:00Z', 'author': 'did:plc:a', 'uri': 'at://a/1',
+         'has_images': None, 'reply_to': None, 'sentiment': 'positive', 'topic_id': None, 'sample_weight': 2.0},
+        {'text': 'boa noite', 'created_at': 'data inválida', 'author': 'did:plc:a', 'uri': 'at://a/2',
+         'has_images': True, 'reply_to': 'at://a/1', 'sentiment': 'neutral', 'topic_id': 3, 'sample_weight': 1.5},
+    ]
+
+
+def test_posts_frame_uses_compact_dtypes():
+    pd = pytest.importorskip('pandas')
+
+    df = build_posts_frame(_records())
+
+    assert df['author'].dtype == 'category'
+    assert df['sentiment'].dtype == 'category'
+    for col in ('text', 'uri', 'reply_to'):
+        assert isinstance(df[col].dtype, pd.StringDtype)
+    assert pd.api.types.is_datetime64_any_dtype(df['created_at'])
+    assert str(df['created_at'].dt.tz) == 'UTC'
+    assert pd.isna(df['created_at'].iloc[1])
+    assert df['has_images'].dtype == bool
+    assert df['has_images'].tolist() == [False, True]
+    assert df['topic_id'].dtype == 'int16'
+    assert df['topic_id'].tolist() == [-1, 3]
+    assert df['sample_weight'].dtype == 'float32'
+
+
+def test_empty_posts_frame():
+    pytest.importorskip('pandas')
+
+    assert build_posts_frame([]).empty
+
+
+def test_memory_report_covers_every_column():
+    pytest.importorskip('pandas')
+    df = build_posts_frame(_records())
+
+    report, total = memory_report(df)
+
+    assert sorted(report['Coluna']) == sorted(df.columns)
+    assert list(report.columns) == ['Coluna', 'Tipo', 'Memória (KB)']
+    assert total == int(df.memory_usage(deep=True, index=False).sum())
+    assert report['Memória (KB)'].is_monotonic_decreasing
+
+
+def test_post_store_adds_columns_in_place_and_bumps_the_version():
+    pd = pytest.importorskip('pandas')
+    store = PostStore.from_records(_records())
+    frame = store.frame
+
+    store.set_column('clean_text', ['bom dia', 'boa noite'], 'string')
+    store.set_column('sentiment', ['negative', 'negative'], 'category')
+
+    assert store.frame is frame
+    assert len(store) == 2
+    assert 'clean_text' in store
+    assert isinstance(frame['clean_text'].dtype, pd.StringDtype)
+    assert frame['sentiment'].tolist() == ['negative', 'negative']
+    assert store.version == 2
+    assert frame.attrs['version'] == 2
+
+
+def test_post_store_rejects_misaligned_columns():
+    pytest.importorskip('pandas')
+    store = PostStore.from_records(_records())
+
+    with pytest.raises(ValueError):
+        store.set_column('topic_id', [1])
+    assert store.version == 0
@@ -0,0 +1,71 @@
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('numpy')
+
+from browser import PostBrowser, frame_signature
+
+
+def _frame():
+    return pd.DataFrame({
+        'text': ['Copa hoje', 'chuva', 'a copa acabou', 'eleições', 'mais copa', 'trânsito'],
+        'sentiment': ['positive', 'negative', 'negative', 'neutral', 'positive', 'negative'],
+        'topic_id': [0, 1, 0, 2, 0, 1],
+        'likes': [5, 1, 3, 8, 2, 7],
+    })
+
+
+def test_query_filters_and_sorts_positions():
+    browser = PostBrowser(_frame())
+
+    assert browser.query().tolist() == [0, 1, 2, 3, 4, 5]
+    assert browser.query(sort_by='likes', ascending=False).tolist() == [3, 5, 0, 2, 4, 1]
+    assert browser.query(sentiments=['negative']).tolist() == [1, 2, 5]
+    assert browser.query(topics=[0], text='COPA').tolist() == [0, 2, 4]
+    assert browser.query(sort_by='likes', sentiments=['positive', 'negative'], topics=[0]).tolist() == [4, 2, 0]
+
+
+def test_page_slices_the_query_result():
+    browser = PostBrowser(_frame())
+    positions = browser.query(sort_by='likes')
+
+    first = browser.page(positions, 1, 4, columns=['text', 'likes'])
+    last = browser.page(positions, 2, 4)
+
+    assert first['likes'].tolist() == [1, 2, 3, 5]
+    assert list(first.columns) == ['text', 'likes']
+    assert last['likes'].tolist() == [7, 8]
+    assert browser.page(positions, 3, 4).empty
+
+
+def test_repeated_query_is_served_from_cache():
+    browser = PostBrowser(_frame())
+
+    first = browser.query(sort_by='likes', text='copa')
+
+    assert browser.query(sort_by='likes', text='copa') is first
+    assert browser.query(sort_by='likes', text='chuva') is not first
+
+
+def test_bind_keeps_caches_for_the_same_content():
+    df = _frame()
+    browser = PostBrowser(df)
+    positions = browser.query(sort_by='likes')
+
+    browser.bind(df.copy())
+
+    assert browser.query(sort_by='likes') is positions
+
+
+def test_bind_invalidates_caches_when_a_column_is_replaced():
+    df = _frame()
+    browser = PostBrowser(df)
+    assert browser.query(sentiments=['positive']).tolist() == [0, 4]
+
+    # Como em `PostStore.set_column`: a coluna é substituída e a versão, incrementada.
+    df['sentiment'] = ['positive'] * len(df)
+    df.attrs['version'] = 1
+    assert frame_signature(df) != browser.signature
+    browser.bind(df)
+
+    assert browser.query(sentiments=['positive']).tolist() == [0, 1, 2, 3, 4, 5]
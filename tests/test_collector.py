@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('atproto')
+pytest.importorskip('langdetect')
+
+from collector import count_post_creates, frame_has_post_creates, frame_repo
+
+
+def _frame(frame_type='#commit', ops=(), repo='did:plc:autor'):
+    return SimpleNamespace(type=frame_type, body={'repo': repo, 'ops': list(ops)})
+
+
+def _op(action, path):
+    return {'action': action, 'path': path, 'cid': None}
+
+
+def test_commit_creating_a_post_is_kept():
+    frame = _frame(ops=[_op('create', 'app.bsky.feed.like/3k'), _op('create', 'app.bsky.feed.post/3k')])
+
+    assert frame_has_post_creates(frame)
+    assert frame_repo(frame) == 'did:plc:autor'
+
+
+@pytest.mark.parametrize('ops', [
+    [],
+    [_op('create', 'app.bsky.feed.like/3k')],
+    [_op('create', 'app.bsky.graph.follow/3k'), _op('create', 'app.bsky.feed.repost/3k')],
+    [_op('delete', 'app.bsky.feed.post/3k')],
+    [_op('update', 'app.bsky.feed.post/3k')],
+    [_op('create', 'app.bsky.feed.postgate/3k')],
+])
+def test_commits_without_post_creates_are_dropped(ops):
+    assert not frame_has_post_creates(_frame(ops=ops))
+
+
+@pytest.mark.parametrize('frame_type', ['#identity', '#account', '#handle', '#tombstone', None])
+def test_non_commit_frames_are_dropped(frame_type):
+    assert not frame_has_post_creates(_frame(frame_type, ops=[_op('create', 'app.bsky.feed.post/3k')]))
+
+
+def test_frames_without_a_body_are_dropped():
+    frame = SimpleNamespace(type='#commit', body=None)
+
+    assert not frame_has_post_creates(frame)
+    assert frame_repo(frame) is None
+
+
+def test_post_creates_are_counted_per_frame():
+    frame = _frame(ops=[_op('create', 'app.bsky.feed.post/1'), _op('create', 'app.bsky.feed.like/2'),
+                        _op('create', 'app.bsky.feed.post/3'), _op('delete', 'app.bsky.feed.post/4')])
+
+    assert count_post_creates(frame) == 2
+    assert count_post_creates(_frame('#identity', ops=[_op('create', 'app.bsky.feed.post/1')])) == 0
+    assert count_post_creates(SimpleNamespace(type='#commit', body=None)) == 0
@@ -0,0 +1,77 @@
+from conversations import ReplyGraph
+
+
+def _post(uri, reply_to=None, **extra):
+    return {'uri': uri, 'reply_to': reply_to, **extra}
+
+
+def test_subtree_sizes_count_descendants():
+    graph = ReplyGraph()
+    graph.add_posts([_post('a'), _post('b', 'a'), _post('c', 'b'), _post('d', 'a')])
+
+    assert graph.subtree_size == {'a': 4, 'b': 2, 'c': 1, 'd': 1}
+    assert graph.thread('c') == ['a', 'b', 'c', 'd']
+
+
+def test_reply_before_parent_is_counted_in_parent_subtree():
+    graph = ReplyGraph()
+    graph.add('b', 'a', position=0)
+    graph.add('a', None, position=1)
+
+    assert graph.subtree_size['a'] == 2
+    assert graph.positions == {'b': 0, 'a': 1}
+
+
+def test_uncollected_parent_groups_replies():
+    graph = ReplyGraph()
+    graph.add_posts([_post('b', 'missing'), _post('c', 'missing')])
+
+    assert graph.root('b') == graph.root('c') == 'missing'
+    assert graph.thread('b') == ['b', 'c']
+    [row] = graph.conversations()
+    assert row['conversation'] == 'missing'
+    assert row['posts'] == 2
+    assert row['root_collected'] is False
+
+
+def test_root_cache_is_invalidated_when_a_root_gains_a_parent():
+    graph = ReplyGraph()
+    graph.add_posts([_post('b', 'a'), _post('c', 'b')])
+    assert graph.root('c') == 'a'
+
+    # 'a' chega depois, respondendo a 'z': a raiz em cache de 'b' e 'c' muda.
+    graph.add('a', 'z')
+
+    assert graph.root('c') == 'z'
+    assert graph.root('b') == 'z'
+    assert graph.subtree_size['z'] == 3
+
+
+def test_duplicate_and_empty_uris_are_ignored():
+    graph = ReplyGraph()
+    graph.add_posts([_post('a'), _post('a'), _post(None)])
+
+    assert len(graph) == 1
+    assert graph.subtree_size['a'] == 1
+
+
+def test_conversations_weight_sentiments_and_pick_dominant_topic():
+    graph = ReplyGraph()
+    graph.add_posts([
+        _post('a', sample_weight=1.0),
+        _post('b', 'a', sample_weight=3.0),
+        _post('c', 'a', sample_weight=1.0),
+        _post('x'),
+    ])
+    graph.annotate('a', sentiment='positive', topic=2)
+    graph.annotate('b', sentiment='negative', topic=2)
+    graph.annotate('c', sentiment='positive', topic=-1)
+
+    [row] = graph.conversations()
+    assert row['posts'] == 3
+    assert row['dominant_topic'] == 2
+    assert row['positive'] == 40.0
+    assert row['negative'] == 60.0
+
+    graph.annotate('c', sentiment='negative')
+    assert graph.conversations()[0]['negative'] == 80.0
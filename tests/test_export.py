@@ -0,0 +1,56 @@
+import gc
+import gzip
+import json
+import os
+import time
+
+from export import ExportFile, export_posts, prune_stale_exports
+
+
+def test_ndjson_export_writes_every_row_in_chunks(tmp_path):
+    rows = [{'text': f'post {i}', 'topic_id': i % 3} for i in range(7)]
+    progress = []
+
+    path = export_posts(rows, 'ndjson.gz', chunk_size=3, directory=tmp_path,
+                        progress_callback=lambda done, total: progress.append((done, total)))
+
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == rows
+    assert progress == [(3, 7), (6, 7), (7, 7)]
+
+
+def test_json_export_is_a_single_array(tmp_path):
+    rows = [{'text': 'a'}, {'text': 'b', 'reply_to': 'at://x'}]
+
+    path = export_posts(rows, 'json.gz', chunk_size=1, directory=tmp_path)
+
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        assert json.load(f) == rows
+
+
+def test_export_file_is_removed_with_the_object(tmp_path):
+    path = export_posts([{'text': 'a'}], 'ndjson', directory=tmp_path)
+    export = ExportFile(path, signature=('ndjson', 1, 0))
+    assert export.exists()
+
+    del export
+    gc.collect()
+
+    assert not os.path.exists(path)
+
+
+def test_stale_export_files_are_pruned(tmp_path):
+    stale = tmp_path / 'bsky_export_old.ndjson'
+    fresh = tmp_path / 'bsky_export_new.ndjson'
+    other = tmp_path / 'outro_arquivo.ndjson'
+    for file in (stale, fresh, other):
+        file.write_text('{}\n')
+    old = time.time() - 2 * 24 * 60 * 60
+    os.utime(stale, (old, old))
+    os.utime(other, (old, old))
+
+    prune_stale_exports(tmp_path)
+
+    assert not stale.exists()
+    assert fresh.exists()
+    assert other.exists()
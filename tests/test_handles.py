@@ -0,0 +1,77 @@
+import time
+from types import SimpleNamespace
+
+from handles import HandleCache, resolve_handles
+
+
+def test_handles_and_unresolvable_dids_are_cached():
+    cache = HandleCache(path=None)
+    cache.set_many({'did:plc:a': 'alice.bsky.social', 'did:plc:b': None})
+
+    assert cache.get_many(['did:plc:a', 'did:plc:b', 'did:plc:c']) == {'did:plc:a': 'alice.bsky.social', 'did:plc:b': None}
+
+
+def test_negative_entries_expire_before_resolved_ones(monkeypatch):
+    cache = HandleCache(path=None, ttl=100, negative_ttl=10)
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now)
+    cache.set_many({'did:plc:a': 'alice.bsky.social', 'did:plc:b': None})
+
+    monkeypatch.setattr(time, 'time', lambda: now + 50)
+    assert cache.get_many(['did:plc:a', 'did:plc:b']) == {'did:plc:a': 'alice.bsky.social'}
+
+    monkeypatch.setattr(time, 'time', lambda: now + 150)
+    assert cache.get_many(['did:plc:a']) == {}
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = HandleCache(path=None, capacity=2)
+    cache.set_many({'did:plc:a': 'a.bsky.social', 'did:plc:b': 'b.bsky.social'})
+    cache.get_many(['did:plc:a'])
+    cache.set_many({'did:plc:c': 'c.bsky.social'})
+
+    assert cache.get_many(['did:plc:a', 'did:plc:b', 'did:plc:c']) == {'did:plc:a': 'a.bsky.social', 'did:plc:c': 'c.bsky.social'}
+
+
+def test_handles_persist_across_instances(tmp_path):
+    path = str(tmp_path / 'handles.sqlite3')
+    HandleCache(path=path).set_many({'did:plc:a': 'alice.bsky.social'})
+
+    reopened = HandleCache(path=path)
+
+    assert len(reopened) == 0
+    assert reopened.get_many(['did:plc:a']) == {'did:plc:a': 'alice.bsky.social'}
+    assert len(reopened) == 1
+
+
+class StandInResolver:
+    """
+    Resolvedor de teste com a interface de `atproto.IdResolver`; DIDs fora de `handles` falham.
+    """
+
+    def __init__(self, handles):
+        self.handles = handles
+        self.requests = []
+        self.did = self
+
+    def resolve_atproto_data(self, did):
+        self.requests.append(did)
+        if did not in self.handles:
+            raise LookupError(did)
+        return SimpleNamespace(handle=self.handles[did])
+
+
+def test_resolve_handles_deduplicates_and_skips_cached_dids():
+    cache = HandleCache(path=None)
+    cache.set_many({'did:plc:a': 'alice.bsky.social'})
+    resolver = StandInResolver({'did:plc:b': 'bob.bsky.social'})
+
+    handles, stats = resolve_handles(['did:plc:a', 'did:plc:b', 'did:plc:b', None, 'did:plc:x'], cache, resolver=resolver)
+
+    assert handles == {'did:plc:a': 'alice.bsky.social', 'did:plc:b': 'bob.bsky.social', 'did:plc:x': None}
+    assert sorted(resolver.requests) == ['did:plc:b', 'did:plc:x']
+    assert stats == {'unique_authors': 3, 'cache_hits': 1, 'resolved': 1, 'failed': 1}
+    # A falha também fica em cache (TTL negativo) e não gera nova requisição.
+    resolve_handles(['did:plc:x'], cache, resolver=resolver)
+    assert len(resolver.requests) == 2
@@ -0,0 +1,160 @@
+import threading
+import time
+
+import pytest
+
+from inference import SHARED_ENCODER_BACKEND, MicroBatchingService, balance_shards, compare_backends, export_quantized_onnx, load_sentiment_backend
+
+
+class RecordingPipeline:
+    """
+    Pipeline de teste: devolve o texto em maiúsculas e registra os lotes. O
+    primeiro lote fica bloqueado até `release()`, para que as filas se formem.
+    """
+
+    def __init__(self):
+        self.batches = []
+        self._gate = threading.Event()
+
+    def release(self):
+        self._gate.set()
+
+    def __call__(self, texts, **kwargs):
+        if not self.batches:
+            self.batches.append(list(texts))
+            self._gate.wait(5)
+        else:
+            self.batches.append(list(texts))
+        return [text.upper() for text in texts]
+
+
+def _submit_in_thread(service, caller, texts, results):
+    thread = threading.Thread(target=lambda: results.__setitem__(caller, service.submit(caller, texts)))
+    thread.start()
+    return thread
+
+
+def _wait_queued(service, count):
+    deadline = time.time() + 5
+    while service.stats()['queued'] < count:
+        assert time.time() < deadline, "os textos não chegaram à fila"
+        time.sleep(0.005)
+
+
+def test_results_keep_submission_order_across_batches():
+    pipeline = RecordingPipeline()
+    pipeline.release()
+    service = MicroBatchingService(pipeline, max_batch_size=3, max_latency=0.01)
+    texts = [f"post {i}" for i in range(10)]
+
+    assert service.submit('session', texts) == [text.upper() for text in texts]
+    assert all(len(batch) <= 3 for batch in pipeline.batches)
+    assert service.client('session')('único') == ['ÚNICO']
+
+
+def test_batches_round_robin_between_callers():
+    pipeline = RecordingPipeline()
+    service = MicroBatchingService(pipeline, max_batch_size=4, max_latency=0.01)
+    results = {}
+    threads = [_submit_in_thread(service, 'warmup', ['w'], results)]
+    # Enquanto o primeiro lote está bloqueado, 'a' e 'b' enfileiram seus textos.
+    while not pipeline.batches:
+        time.sleep(0.005)
+    threads.append(_submit_in_thread(service, 'a', [f'a{i}' for i in range(6)], results))
+    _wait_queued(service, 6)
+    threads.append(_submit_in_thread(service, 'b', ['b0', 'b1'], results))
+    _wait_queued(service, 8)
+    pipeline.release()
+    for thread in threads:
+        thread.join(5)
+
+    assert pipeline.batches == [['w'], ['a0', 'b0', 'a1', 'b1'], ['a2', 'a3', 'a4', 'a5']]
+    assert results['a'] == ['A0', 'A1', 'A2', 'A3', 'A4', 'A5']
+    assert results['b'] == ['B0', 'B1']
+    stats = service.stats()
+    assert stats['batches'] == 3
+    assert stats['queued'] == 0
+
+
+def test_pipeline_errors_are_raised_to_the_caller():
+    def failing(texts, **kwargs):
+        raise RuntimeError("modelo indisponível")
+
+    service = MicroBatchingService(failing, max_batch_size=4, max_latency=0.01)
+    with pytest.raises(RuntimeError, match="modelo indisponível"):
+        service.submit('session', ['post'])
+
+
+def test_reset_stats_starts_a_new_measurement():
+    pipeline = RecordingPipeline()
+    pipeline.release()
+    service = MicroBatchingService(pipeline, max_batch_size=2, max_latency=0.01)
+    service.submit('session', ['a', 'b', 'c'])
+    service.reset_stats()
+
+    stats = service.stats()
+    assert (stats['batches'], stats['items'], stats['callers'], stats['mean_batch_size'], stats['wait_p50_ms']) == (0, 0, 0, 0, None)
+    service.submit('session', ['d'])
+    assert service.stats()['items'] == 1
+
+
+def _labeler(rule):
+    # Backend de teste com a interface do `transformers.pipeline`.
+    def backend(texts, **kwargs):
+        texts = [texts] if isinstance(texts, str) else texts
+        return [{'label': rule(text), 'score': 1.0} for text in texts]
+    return backend
+
+
+def test_compare_backends_reports_label_agreement():
+    texts = ['bom dia', 'que horror', '', 'tanto faz', 'ótimo']
+    reference = _labeler(lambda text: 'negative' if 'horror' in text else 'positive')
+    candidate = _labeler(lambda text: 'negative' if 'horror' in text or 'faz' in text else 'positive')
+
+    result = compare_backends(texts, reference, candidate)
+
+    assert result['n_texts'] == 4
+    assert result['agreement'] == 0.75
+    assert set(result['reference']) == set(result['candidate']) == {'p50_ms', 'p99_ms', 'sequential_posts_per_s', 'batched_posts_per_s'}
+
+
+def test_compare_backends_requires_non_empty_texts():
+    with pytest.raises(ValueError):
+        compare_backends(['', '  '], _labeler(str), _labeler(str))
+
+
+def test_complete_onnx_cache_is_reused_without_converting(tmp_path):
+    # Com `model.int8.onnx` presente, nada é importado nem convertido (torch e onnxruntime não são necessários).
+    target_dir = tmp_path / 'onnx' / 'org__modelo'
+    target_dir.mkdir(parents=True)
+    (target_dir / 'model.int8.onnx').write_bytes(b'onnx')
+
+    assert export_quantized_onnx('org/modelo', cache_dir=str(tmp_path)) == str(target_dir)
+
+
+def test_balance_shards_covers_every_index_once():
+    lengths = [5, 80, 12, 33, 7, 64, 21, 2, 48]
+
+    shards = balance_shards(lengths, 3)
+
+    assert sorted(i for shard in shards for i in shard) == list(range(len(lengths)))
+    for shard in shards:
+        assert [lengths[i] for i in shard] == sorted(lengths[i] for i in shard)
+
+
+def test_balance_shards_evens_out_token_totals():
+    lengths = [100, 90, 60, 50, 40, 30, 20, 10]
+
+    loads = sorted(sum(lengths[i] for i in shard) for shard in balance_shards(lengths, 2))
+
+    assert loads == [200, 200]
+
+
+def test_balance_shards_drops_empty_shards():
+    assert balance_shards([3, 1], 4) == [[0], [1]]
+    assert balance_shards([], 2) == []
+
+
+def test_unknown_backend_error_lists_every_backend():
+    with pytest.raises(ValueError, match=SHARED_ENCODER_BACKEND):
+        load_sentiment_backend('tensorrt')
@@ -0,0 +1,75 @@
+import pytest
+
+pytest.importorskip('regex')
+
+from ingest import IngestFilters, ReservoirSampler
+
+
+def _stream(n, langs=('pt', 'en')):
+    return [{'uri': f'post-{i}', 'lang': langs[i % len(langs)], 'reply_to': 'post-0' if i % 3 == 0 else None}
+            for i in range(n)]
+
+
+def _fill(sampler, posts):
+    for post in posts:
+        sampler.add(dict(post))
+    return sampler
+
+
+def test_same_seed_and_stream_give_same_sample():
+    first = _fill(ReservoirSampler(50, 'lang', seed=7), _stream(1_000)).items()
+    second = _fill(ReservoirSampler(50, 'lang', seed=7), _stream(1_000)).items()
+    other = _fill(ReservoirSampler(50, 'lang', seed=8), _stream(1_000)).items()
+
+    assert [post['uri'] for post in first] == [post['uri'] for post in second]
+    assert [post['uri'] for post in first] != [post['uri'] for post in other]
+
+
+def test_sample_is_bounded_and_in_arrival_order():
+    items = _fill(ReservoirSampler(100, seed=1), _stream(5_000)).items()
+
+    assert len(items) == 100
+    positions = [int(post['uri'].split('-')[1]) for post in items]
+    assert positions == sorted(positions)
+
+
+def test_small_streams_are_kept_whole_with_unit_weight():
+    sampler = _fill(ReservoirSampler(100, 'reply', seed=1), _stream(30))
+
+    assert len(sampler.items()) == 30
+    assert {stratum: info['weight'] for stratum, info in sampler.stats().items()} == {'reply': 1.0, 'original': 1.0}
+
+
+def test_stratum_weights_are_seen_over_kept():
+    sampler = _fill(ReservoirSampler(90, 'lang', seed=3), _stream(3_000))
+
+    stats = sampler.stats()
+    assert {stratum: (info['seen'], info['kept']) for stratum, info in stats.items()} == {'pt': (1_500, 45), 'en': (1_500, 45)}
+    for post in sampler.items():
+        info = stats[post['sample_stratum']]
+        assert post['sample_weight'] == info['seen'] / info['kept']
+    # Os pesos somados estimam o total de posts vistos.
+    assert sum(post['sample_weight'] for post in sampler.items()) == pytest.approx(3_000)
+
+
+def test_unused_stratum_capacity_goes_to_the_other_strata():
+    sampler = _fill(ReservoirSampler(90, 'lang', seed=3), _stream(3_000))
+    _fill(sampler, [{'uri': f'es-{i}', 'lang': 'es'} for i in range(10)])
+
+    kept = {stratum: info['kept'] for stratum, info in sampler.stats().items()}
+    assert kept == {'pt': 40, 'en': 40, 'es': 10}
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        ReservoirSampler(10, 'author')
+
+
+def test_author_rejections_are_counted_in_posts():
+    filters = IngestFilters(keywords=['copa'], deny_authors=['did:plc:spam'])
+
+    assert not filters.accept_author('did:plc:spam', posts=3)
+    assert filters.accept_author('did:plc:outro', posts=2)
+    assert filters.accept_text("vamos ver a copa")
+    assert not filters.accept_text("nada a ver")
+    assert filters.stats()['counters'] == {'rejected_author_denied': 3, 'passed': 1, 'rejected_text': 1}
@@ -0,0 +1,112 @@
+import os
+
+from memory import SessionMemory, SpilledArtifact
+
+
+class Parameter:
+    def __init__(self, n):
+        self.n = n
+
+    def numel(self):
+        return self.n
+
+    def element_size(self):
+        return 4
+
+
+class StandInEncoder:
+    """
+    Modelo de embeddings de teste: tem parâmetros, mas não pode ser serializado.
+    """
+
+    def parameters(self):
+        return [Parameter(1_000)]
+
+    def __reduce__(self):
+        raise AssertionError("o modelo de embeddings não deve ser serializado")
+
+
+class StandInTopicModel:
+    def __init__(self, n_words=2_000):
+        self.embedding_model = StandInEncoder()
+        self.vocabulary = [f'palavra{i}' for i in range(n_words)]
+
+
+def _memory(tmp_path, budget=1):
+    return SessionMemory(budget, spill_dir=str(tmp_path))
+
+
+def test_spill_and_restore_round_trip(tmp_path):
+    memory = _memory(tmp_path)
+    embeddings = [[float(i)] * 8 for i in range(500)]
+    state = {'post_embeddings': embeddings, 'data': None}
+
+    assert memory.enforce(state) == ['post_embeddings']
+    artifact = state['post_embeddings']
+    assert isinstance(artifact, SpilledArtifact)
+    assert os.path.exists(artifact.path)
+    assert 'post_embeddings' not in memory.usage(state)
+
+    assert memory.restore(state, 'post_embeddings') == embeddings
+    assert state['post_embeddings'] == embeddings
+    assert not os.path.exists(artifact.path)
+    stats = memory.stats(state)
+    assert (stats['spills'], stats['restores'], stats['spilled']) == (1, 1, {})
+
+
+def test_droppable_caches_go_before_spilling(tmp_path):
+    state = {'topic_result_cache': {'figura': 'x' * 10_000}, 'post_embeddings': [1.0] * 10}
+    memory = _memory(tmp_path, budget=2_000)
+
+    assert memory.enforce(state) == ['topic_result_cache']
+    assert state['topic_result_cache'] is None
+    assert state['post_embeddings'] == [1.0] * 10
+
+
+def test_restored_artifact_is_not_spilled_again_in_the_same_run(tmp_path):
+    memory = _memory(tmp_path)
+    state = {'post_embeddings': [1.0] * 1_000}
+    memory.enforce(state)
+    memory.restore(state, 'post_embeddings')
+
+    assert memory.enforce(state) == []
+    assert memory.enforce(state) == ['post_embeddings']
+
+
+def test_topic_model_is_spilled_without_its_embedding_model(tmp_path):
+    memory = _memory(tmp_path)
+    model = StandInTopicModel()
+    encoder = model.embedding_model
+    state = {'topic_model_instance': model}
+
+    sizes = memory.usage(state)
+    assert sizes['topic_model_instance.embedding_model'] == 4_000
+    assert memory.enforce(state) == ['topic_model_instance']
+    # O modelo de embeddings continua em memória enquanto o modelo de tópicos está em disco.
+    assert memory.usage(state) == {'topic_model_instance.embedding_model': 4_000}
+
+    restored = memory.restore(state, 'topic_model_instance')
+    assert restored.embedding_model is encoder
+    assert restored.vocabulary == model.vocabulary
+
+
+def test_new_object_is_measured_again(tmp_path):
+    memory = _memory(tmp_path, budget=10**9)
+    state = {'topic_model_instance': StandInTopicModel(n_words=10)}
+    small = memory.usage(state)['topic_model_instance']
+
+    state['topic_model_instance'] = StandInTopicModel(n_words=5_000)
+
+    assert memory.usage(state)['topic_model_instance'] > small
+
+
+def test_discard_removes_spilled_files(tmp_path):
+    memory = _memory(tmp_path)
+    state = {'post_embeddings': [1.0] * 1_000}
+    memory.enforce(state)
+    path = state['post_embeddings'].path
+
+    memory.discard()
+
+    assert not os.path.exists(path)
+    assert memory.spilled == {}
@@ -0,0 +1,56 @@
+import pytest
+
+from topic_partitions import MIXED_PARTITION, PartitionedTopicModel, partition_by_language
+
+
+class StandInTopicModel:
+    def __init__(self, language, counts):
+        self.language = language
+        self.counts = counts
+
+    def get_topic(self, topic_id):
+        return [(f'{self.language}{topic_id}', 1.0)]
+
+    def get_topic_info(self):
+        import pandas as pd
+        return pd.DataFrame([{'Topic': t, 'Count': c, 'Name': f'{t}_{self.language}'} for t, c in self.counts.items()])
+
+
+def test_small_and_unknown_languages_go_to_the_mixed_partition():
+    languages = ['pt'] * 4 + ['en'] * 3 + ['es'] + [None, 'de']
+
+    partitions = partition_by_language(languages, min_posts=3)
+
+    assert list(partitions) == ['pt', 'en', MIXED_PARTITION]
+    assert partitions['pt'] == [0, 1, 2, 3]
+    assert partitions['en'] == [4, 5, 6]
+    assert partitions[MIXED_PARTITION] == [7, 8, 9]
+
+
+def test_local_topics_get_consecutive_global_ids():
+    partitioned = PartitionedTopicModel()
+
+    pt_topics = partitioned.add('pt', StandInTopicModel('pt', {}), [0, 1, -1, 1], [0, 1, 2, 3])
+    en_topics = partitioned.add('en', StandInTopicModel('en', {}), [2, 0, -1], [4, 5, 6])
+
+    assert pt_topics == [0, 1, -1, 1]
+    assert en_topics == [4, 2, -1]
+    assert partitioned.offsets == {'pt': 0, 'en': 2}
+    assert partitioned.topic_languages == {0: 'pt', 1: 'pt', 2: 'en', 3: 'en', 4: 'en'}
+    assert partitioned.get_topic(3) == [('en1', 1.0)]
+    assert partitioned.get_topic(1) == [('pt1', 1.0)]
+    assert partitioned.get_topic(7) is False
+
+
+def test_topic_info_is_unified_with_global_ids_and_pooled_outliers():
+    pytest.importorskip('pandas')
+    partitioned = PartitionedTopicModel()
+    partitioned.add('pt', StandInTopicModel('pt', {-1: 2, 0: 5, 1: 3}), [0, 1], [0, 1])
+    partitioned.add('en', StandInTopicModel('en', {-1: 1, 0: 4}), [0], [2])
+    partitioned.unassigned = 6
+
+    info = partitioned.get_topic_info()
+
+    assert info['Topic'].tolist() == [-1, 0, 1, 2]
+    assert info['Language'].tolist() == ['pt, en', 'pt', 'pt', 'en']
+    assert info['Count'].tolist() == [9, 5, 3, 4]
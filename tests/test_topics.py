@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+from topic_sweep import expand_grid, format_config
+from topics import topic_coherence, topic_quality
+
+
+class StandInTopicModel:
+    """
+    Modelo de tópicos de teste com a parte da interface do BERTopic usada pelas métricas.
+    """
+
+    def __init__(self, topic_words):
+        self.topic_words = topic_words
+        self.vectorizer_model = SimpleNamespace(build_analyzer=lambda: str.split)
+
+    def get_topic(self, topic_id):
+        words = self.topic_words.get(topic_id)
+        return [(word, 1.0) for word in words] if words is not None else False
+
+
+def test_topic_quality_counts_topics_outliers_and_diversity():
+    model = StandInTopicModel({0: ['copa', 'gol', 'jogo'], 1: ['chuva', 'frio', 'jogo']})
+
+    quality = topic_quality(model, [0, 0, 1, -1, 1, -1, 0, 0])
+
+    assert quality == {'n_topics': 2, 'outlier_ratio': 0.25, 'diversity': round(5 / 6, 4)}
+
+
+def test_topic_quality_without_topics():
+    assert topic_quality(StandInTopicModel({}), [-1, -1]) == {'n_topics': 0, 'outlier_ratio': 1.0, 'diversity': None}
+    assert topic_quality(StandInTopicModel({}), []) == {'n_topics': 0, 'outlier_ratio': 0.0, 'diversity': None}
+
+
+def test_topic_coherence_is_mean_npmi_of_topic_word_pairs():
+    docs = ['copa gol', 'copa gol jogo', 'chuva frio', 'chuva']
+    model = StandInTopicModel({0: ['copa', 'gol'], 1: ['chuva', 'frio']})
+
+    # copa/gol aparecem sempre juntos (NPMI 1.0); chuva/frio, em metade dos documentos com chuva (NPMI 0.5).
+    assert topic_coherence(model, docs, [0, 0, 1, 1]) == 0.75
+
+
+def test_words_that_never_cooccur_score_minus_one():
+    model = StandInTopicModel({0: ['copa', 'chuva']})
+
+    assert topic_coherence(model, ['copa', 'chuva'], [0, 0]) == -1.0
+
+
+def test_topic_coherence_without_topics_is_none():
+    assert topic_coherence(StandInTopicModel({}), ['copa'], [-1]) is None
+
+
+def test_expand_grid_yields_every_combination():
+    configs = expand_grid({'min_topic_size': (3, 5), 'min_samples': (None,), 'ngram_range': ((1, 1), (1, 2))})
+
+    assert len(configs) == 4
+    assert configs[0] == {'min_topic_size': 3, 'min_samples': None, 'ngram_range': (1, 1)}
+    assert configs[-1] == {'min_topic_size': 5, 'min_samples': None, 'ngram_range': (1, 2)}
+    assert len(expand_grid()) == 12
+
+
+def test_format_config():
+    assert format_config({'min_topic_size': 5, 'min_samples': None, 'ngram_range': (1, 2)}) == \
+        "min_topic_size=5 · min_samples=auto · n-gramas 1–2"
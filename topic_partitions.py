@@ -0,0 +1,187 @@
+"""
+Modelagem de tópicos particionada por idioma.
+
+Em vez de um único BERTopic multilíngue sobre todos os posts, o corpus é
+dividido pelo idioma detectado na coleta e cada partição é ajustada em um
+processo próprio, com as stopwords do seu idioma. O custo do UMAP e do
+HDBSCAN cresce mais que linearmente com o número de documentos, então várias
+partições menores custam menos que uma grande, e o tempo total acompanha a
+maior partição. Os tópicos de cada idioma são reunidos em uma tabela única,
+com IDs globais e a indicação do idioma.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from topics import STOPWORD_LANGUAGES, load_stopwords, make_vectorizer
+
+# Idiomas detectados na coleta (ver `collector.SUPPORTED_LANGUAGES`) e as listas de stopwords do NLTK de cada um.
+LANGUAGE_STOPWORDS = {'en': ('english',), 'pt': ('portuguese',), 'es': ('spanish',)}
+# Partição que reúne os posts de idiomas com poucos posts (ou sem idioma) em um ajuste multilíngue.
+MIXED_PARTITION = 'multi'
+MIN_PARTITION_POSTS = 50
+
+
+def partition_by_language(languages, min_posts=MIN_PARTITION_POSTS):
+    """
+    Posições dos posts de cada idioma, da maior partição para a menor. Idiomas
+    com menos de `min_posts` posts vão para a partição multilíngue.
+    """
+    groups = {}
+    for position, language in enumerate(languages):
+        groups.setdefault(language if language in LANGUAGE_STOPWORDS else MIXED_PARTITION, []).append(position)
+    mixed = groups.pop(MIXED_PARTITION, [])
+    partitions = {}
+    for language, positions in groups.items():
+        if len(positions) >= min_posts:
+            partitions[language] = positions
+        else:
+            mixed.extend(positions)
+    if mixed:
+        partitions[MIXED_PARTITION] = sorted(mixed)
+    return dict(sorted(partitions.items(), key=lambda item: len(item[1]), reverse=True))
+
+
+def partition_stopwords(language):
+    """
+    Stopwords de uma partição; a multilíngue usa as de todos os idiomas.
+    """
+    return load_stopwords(LANGUAGE_STOPWORDS.get(language, STOPWORD_LANGUAGES))
+
+
+def fit_partition(language, docs, embeddings, stop_words, min_topic_size, num_threads=None):
+    """
+    Ajusta o BERTopic de uma partição. Posts em inglês usam o modelo de
+    embeddings inglês do BERTopic, mais leve; os demais, o multilíngue.
+    O modelo de embeddings é desanexado antes de o modelo voltar ao processo
+    principal, para não ser serializado junto (as visualizações não o usam).
+    """
+    from bertopic import BERTopic
+
+    if num_threads:
+        # Os processos dividem os núcleos entre si, em vez de cada um tentar usar todos.
+        import torch
+        torch.set_num_threads(num_threads)
+    t0 = time.perf_counter()
+    topic_model = BERTopic(language='english' if language == 'en' else 'multilingual',
+                           vectorizer_model=make_vectorizer(stop_words), min_topic_size=min_topic_size)
+    topics, _ = topic_model.fit_transform(docs, embeddings=embeddings)
+    topic_model.embedding_model = None
+    return {
+        'language': language,
+        'topics': [int(t) for t in topics],
+        'model': topic_model,
+        'fit_s': round(time.perf_counter() - t0, 3),
+    }
+
+
+class PartitionedTopicModel:
+    """
+    Modelos ajustados por idioma sob IDs globais de tópico: o tópico local `t`
+    do idioma `lang` recebe o ID `offsets[lang] + t`. Oferece a parte da
+    interface do BERTopic usada pela tabela de tópicos (`get_topic_info`,
+    `get_topic`); as visualizações usam o modelo de cada idioma (`models`).
+    """
+
+    def __init__(self):
+        self.models = {}
+        self.offsets = {}
+        self.positions = {}
+        self.unassigned = 0
+        self.topic_languages = {}
+        self._next_id = 0
+
+    def add(self, language, topic_model, local_topics, positions):
+        """
+        Registra o modelo de uma partição e retorna as atribuições com IDs globais.
+        """
+        offset = self._next_id
+        self.models[language] = topic_model
+        self.offsets[language] = offset
+        self.positions[language] = positions
+        n_topics = max(local_topics, default=-1) + 1
+        for topic_id in range(offset, offset + n_topics):
+            self.topic_languages[topic_id] = language
+        self._next_id += n_topics
+        return [t if t == -1 else t + offset for t in local_topics]
+
+    def get_topic(self, topic_id):
+        language = self.topic_languages.get(topic_id)
+        if language is None:
+            return False
+        return self.models[language].get_topic(topic_id - self.offsets[language])
+
+    def get_topic_info(self):
+        """
+        Tabela unificada dos tópicos, com a coluna `Language`. Os outliers de todos os idiomas ficam no tópico -1.
+        """
+        import pandas as pd
+
+        frames, outliers = [], self.unassigned
+        for language, topic_model in self.models.items():
+            info = topic_model.get_topic_info()
+            outliers += int(info.loc[info['Topic'] == -1, 'Count'].sum())
+            info = info[info['Topic'] != -1].copy()
+            info['Topic'] += self.offsets[language]
+            info.insert(1, 'Language', language)
+            frames.append(info)
+        outlier_row = pd.DataFrame([{'Topic': -1, 'Language': ', '.join(self.models), 'Count': outliers, 'Name': '-1_outliers'}])
+        return pd.concat([outlier_row, *frames], ignore_index=True)
+
+
+def fit_partitioned(docs, languages, embeddings=None, min_topic_size=3, min_posts=MIN_PARTITION_POSTS,
+                    max_workers=None, progress_callback=None):
+    """
+    Ajusta um modelo por idioma em processos paralelos. `embeddings` (ex.: do
+    encoder compartilhado), se fornecidos, são repartidos entre os idiomas.
+    `progress_callback(idioma, concluídas, total)` é chamado a cada partição.
+    Retorna o `PartitionedTopicModel`, o tópico global de cada post e um
+    resumo por partição; partições que falharem ficam como outliers.
+    """
+    partitions = partition_by_language(languages, min_posts)
+    max_workers = max(1, min(len(partitions), max_workers or os.cpu_count() or 1))
+    num_threads = max(1, (os.cpu_count() or 1) // max_workers)
+    stop_words = {}
+    for language in partitions:
+        try:
+            stop_words[language] = partition_stopwords(language)
+        except Exception:
+            stop_words[language] = ()
+
+    results = {}
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {}
+        for language, positions in partitions.items():
+            partition_embeddings = embeddings[positions] if embeddings is not None else None
+            future = pool.submit(fit_partition, language, [docs[i] for i in positions], partition_embeddings,
+                                 stop_words[language], min_topic_size, num_threads)
+            futures[future] = language
+        for future in as_completed(futures):
+            language = futures[future]
+            try:
+                results[language] = future.result()
+            except Exception as e:
+                results[language] = e
+            if progress_callback:
+                progress_callback(language, len(results), len(partitions))
+    wall_s = round(time.perf_counter() - t0, 3)
+
+    # Os IDs globais seguem a ordem das partições, e não a de conclusão dos processos,
+    # para que os mesmos posts produzam sempre os mesmos IDs de tópico.
+    partitioned = PartitionedTopicModel()
+    topics = [-1] * len(docs)
+    summary = []
+    for language, positions in partitions.items():
+        result = results[language]
+        if isinstance(result, Exception):
+            partitioned.unassigned += len(positions)
+            summary.append({'language': language, 'posts': len(positions), 'error': str(result)})
+            continue
+        for position, topic in zip(positions, partitioned.add(language, result['model'], result['topics'], positions)):
+            topics[position] = topic
+        summary.append({'language': language, 'posts': len(positions), 'topics': max(result['topics'], default=-1) + 1,
+                        'fit_s': result['fit_s']})
+    return partitioned, topics, {'partitions': summary, 'workers': max_workers, 'wall_s': wall_s}
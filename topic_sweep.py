@@ -0,0 +1,137 @@
+"""
+Varredura de hiperparâmetros da modelagem de tópicos.
+
+Embeddings e redução de dimensionalidade (UMAP) são calculados uma única vez
+para o corpus; apenas o agrupamento (HDBSCAN) e a representação (c-TF-IDF)
+são ajustados para cada combinação da grade, em processos paralelos. Cada
+configuração é avaliada por número de tópicos, proporção de outliers,
+coerência e tempo de ajuste, e o modelo escolhido pode ser adotado pela
+sessão sem um novo ajuste.
+"""
+
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from topics import make_vectorizer, topic_coherence, topic_quality
+
+# Modelo de embeddings usado pelo BERTopic com language="multilingual".
+EMBEDDING_MODEL = 'paraphrase-multilingual-MiniLM-L12-v2'
+# Parâmetros do UMAP padrão do BERTopic, com semente fixa para que a redução seja reproduzível.
+UMAP_PARAMS = {'n_neighbors': 15, 'n_components': 5, 'min_dist': 0.0, 'metric': 'cosine', 'random_state': 42}
+DEFAULT_GRID = {
+    'min_topic_size': (3, 5, 10),
+    'min_samples': (None, 2),
+    'ngram_range': ((1, 1), (1, 2)),
+}
+
+
+def expand_grid(grid=None):
+    """
+    Combinações dos valores da grade, uma configuração (dicionário) por combinação.
+    """
+    grid = grid or DEFAULT_GRID
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def embed_documents(docs, model_name=EMBEDDING_MODEL):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name).encode(docs, show_progress_bar=False)
+
+
+def reduce_embeddings(embeddings, **params):
+    from umap import UMAP
+    return UMAP(**{**UMAP_PARAMS, **params}).fit_transform(embeddings)
+
+
+def fit_config(docs, reduced_embeddings, stop_words, config):
+    """
+    Ajusta o BERTopic para uma configuração sobre embeddings já reduzidos
+    (o passo de redução do BERTopic é substituído por uma identidade).
+    """
+    from bertopic import BERTopic
+    from bertopic.dimensionality import BaseDimensionalityReduction
+    from hdbscan import HDBSCAN
+
+    t0 = time.perf_counter()
+    topic_model = BERTopic(
+        language="multilingual",
+        umap_model=BaseDimensionalityReduction(),
+        hdbscan_model=HDBSCAN(min_cluster_size=config['min_topic_size'], min_samples=config['min_samples'],
+                              metric='euclidean', cluster_selection_method='eom', prediction_data=True),
+        vectorizer_model=make_vectorizer(stop_words, config['ngram_range']),
+        min_topic_size=config['min_topic_size'],
+    )
+    topics, _ = topic_model.fit_transform(docs, embeddings=reduced_embeddings)
+    fit_s = time.perf_counter() - t0
+    topics = [int(t) for t in topics]
+    return {
+        'config': config,
+        **topic_quality(topic_model, topics),
+        'coherence': topic_coherence(topic_model, docs, topics),
+        'fit_s': round(fit_s, 3),
+        'topics': topics,
+        'model': topic_model,
+    }
+
+
+# Corpus compartilhado por todas as configurações de um processo, enviado uma vez na criação do processo.
+_worker_corpus = {}
+
+
+def _init_worker(docs, reduced_embeddings, stop_words):
+    _worker_corpus.update(docs=docs, reduced_embeddings=reduced_embeddings, stop_words=stop_words)
+
+
+def _fit_in_worker(config):
+    return fit_config(_worker_corpus['docs'], _worker_corpus['reduced_embeddings'], _worker_corpus['stop_words'], config)
+
+
+def run_sweep(docs, embeddings=None, grid=None, stop_words=(), max_workers=None, progress_callback=None):
+    """
+    Executa a varredura: calcula os embeddings (se não forem fornecidos) e a
+    redução uma vez e ajusta cada configuração da grade em até `max_workers`
+    processos. `progress_callback(concluídas, total)` é chamado a cada ajuste.
+    Retorna os tempos das etapas compartilhadas e os resultados, do mais
+    coerente para o menos; configurações que falharem trazem `error`.
+    """
+    configs = expand_grid(grid)
+    timings = {}
+    t0 = time.perf_counter()
+    if embeddings is None:
+        embeddings = embed_documents(docs)
+    timings['embed_s'] = round(time.perf_counter() - t0, 3)
+    t1 = time.perf_counter()
+    reduced_embeddings = reduce_embeddings(embeddings)
+    timings['reduce_s'] = round(time.perf_counter() - t1, 3)
+
+    results = []
+    t1 = time.perf_counter()
+    max_workers = max(1, min(len(configs), max_workers or os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(docs, reduced_embeddings, tuple(stop_words))) as pool:
+        futures = {pool.submit(_fit_in_worker, config): config for config in configs}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({'config': futures[future], 'error': str(e)})
+            if progress_callback:
+                progress_callback(len(results), len(configs))
+    timings['fit_wall_s'] = round(time.perf_counter() - t1, 3)
+    timings['total_s'] = round(time.perf_counter() - t0, 3)
+
+    results.sort(key=lambda r: ('error' in r, -(r.get('coherence') if r.get('coherence') is not None else -1.0)))
+    return {**timings, 'workers': max_workers, 'results': results}
+
+
+def format_config(config):
+    """
+    Descrição curta de uma configuração, para tabelas e seletores.
+    """
+    ngram = config['ngram_range']
+    return (f"min_topic_size={config['min_topic_size']} · min_samples={config['min_samples'] or 'auto'} · "
+            f"n-gramas {ngram[0]}–{ngram[1]}")
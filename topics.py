@@ -0,0 +1,163 @@
+"""
+Utilitários da modelagem de tópicos do BskyMood.
+
+As dependências pesadas (BERTopic, scikit-learn, NLTK) são importadas apenas
+dentro das funções que as utilizam, para não pesar na inicialização do app.
+"""
+
+import functools
+import hashlib
+import math
+import os
+from collections import OrderedDict
+
+from inference import DEFAULT_CACHE_DIR
+
+STOPWORD_LANGUAGES = ('english', 'portuguese', 'spanish')
+NLTK_DATA_DIR = os.path.join(DEFAULT_CACHE_DIR, 'nltk_data')
+
+
+@functools.lru_cache(maxsize=None)
+def load_stopwords(languages=STOPWORD_LANGUAGES):
+    """
+    Retorna as stopwords do NLTK para os idiomas informados. O corpus é baixado
+    uma única vez para o cache local e, depois disso, lido do disco.
+    """
+    import nltk
+
+    if NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.append(NLTK_DATA_DIR)
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        os.makedirs(NLTK_DATA_DIR, exist_ok=True)
+        nltk.download('stopwords', download_dir=NLTK_DATA_DIR, quiet=True)
+
+    from nltk.corpus import stopwords
+    return tuple(word for language in languages for word in stopwords.words(language))
+
+
+def make_vectorizer(stop_words, ngram_range=(1, 1)):
+    """
+    Cria o vetorizador usado pelo BERTopic para extrair as palavras-chave dos tópicos.
+    """
+    from sklearn.feature_extraction.text import CountVectorizer
+    return CountVectorizer(stop_words=list(stop_words), ngram_range=tuple(ngram_range))
+
+
+def model_fingerprint(topics, docs, params=None):
+    """
+    Identificador de um ajuste do BERTopic, derivado das atribuições de tópico,
+    dos documentos e, se informados, dos hiperparâmetros (que mudam as
+    palavras-chave mesmo com as mesmas atribuições). Usado como chave dos
+    caches de resultados derivados.
+    """
+    digest = hashlib.sha1()
+    if params is not None:
+        digest.update(repr(params).encode())
+    digest.update(','.join(map(str, topics)).encode())
+    for doc in docs:
+        digest.update(doc.encode('utf-8', 'ignore'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:16]
+
+
+class ModelResultCache:
+    """
+    Cache LRU de resultados derivados de um modelo de tópicos já ajustado
+    (tópicos no tempo, figuras). As chaves incluem a impressão digital do
+    modelo e os parâmetros, então um novo ajuste nunca reaproveita resultados
+    antigos e repetir uma combinação de parâmetros não refaz o cálculo.
+    """
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get_or_compute(self, key, compute):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        result = compute()
+        self._entries[key] = result
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return result
+
+
+def compute_topics_over_time(topic_model, docs, topics, created_at, bin_seconds):
+    """
+    Frequência e representação de cada tópico por intervalo de tempo, a partir
+    das atribuições de tópico já armazenadas (sem reajustar o modelo). Os
+    carimbos de tempo são agrupados em intervalos fixos de `bin_seconds`
+    antes de chegar ao BERTopic; posts sem data válida são ignorados.
+    """
+    import pandas as pd
+    from analytics import parse_timestamp
+
+    rows = [(doc, topic, parse_timestamp(ts)) for doc, topic, ts in zip(docs, topics, created_at)]
+    rows = [(doc, topic, ts) for doc, topic, ts in rows if ts is not None]
+    if not rows:
+        return pd.DataFrame()
+    binned = [pd.Timestamp(int(ts // bin_seconds) * bin_seconds, unit='s', tz='UTC') for _, _, ts in rows]
+    return topic_model.topics_over_time(
+        [doc for doc, _, _ in rows], binned, topics=[topic for _, topic, _ in rows],
+        global_tuning=True, evolution_tuning=True,
+    )
+
+
+def topic_quality(topic_model, topics, top_n_words=10):
+    """
+    Métricas de qualidade de um ajuste: número de tópicos, proporção de
+    outliers e diversidade (fração de palavras distintas entre as
+    `top_n_words` palavras de cada tópico; 1.0 indica tópicos sem repetição).
+    """
+    topics = list(topics)
+    topic_ids = sorted({t for t in topics if t != -1})
+    words = []
+    for topic_id in topic_ids:
+        words.extend(word for word, _ in (topic_model.get_topic(topic_id) or [])[:top_n_words])
+    return {
+        'n_topics': len(topic_ids),
+        'outlier_ratio': round(sum(1 for t in topics if t == -1) / len(topics), 4) if topics else 0.0,
+        'diversity': round(len(set(words)) / len(words), 4) if words else None,
+    }
+
+
+def topic_coherence(topic_model, docs, topics, top_n_words=10):
+    """
+    Coerência média dos tópicos: NPMI entre os pares das `top_n_words`
+    palavras de cada tópico, pela coocorrência nos documentos. Varia de -1 a
+    1 (maior é melhor); None se não houver tópicos.
+    """
+    analyzer = topic_model.vectorizer_model.build_analyzer()
+    topic_words = [
+        [word for word, _ in (topic_model.get_topic(topic_id) or [])[:top_n_words] if word]
+        for topic_id in sorted({t for t in topics if t != -1})
+    ]
+    vocabulary = {word for words in topic_words for word in words}
+    # Documentos em que cada palavra dos tópicos aparece.
+    postings = {word: set() for word in vocabulary}
+    for index, doc in enumerate(docs):
+        for word in vocabulary.intersection(analyzer(doc)):
+            postings[word].add(index)
+
+    n_docs = len(docs)
+    scores = []
+    for words in topic_words:
+        pairs = []
+        for i, a in enumerate(words):
+            for b in words[i + 1:]:
+                both = len(postings[a] & postings[b])
+                if not both:
+                    pairs.append(-1.0)
+                    continue
+                p_ab = both / n_docs
+                if p_ab == 1.0:
+                    pairs.append(1.0)
+                    continue
+                pmi = math.log(p_ab / ((len(postings[a]) / n_docs) * (len(postings[b]) / n_docs)))
+                pairs.append(pmi / -math.log(p_ab))
+        if pairs:
+            scores.append(sum(pairs) / len(pairs))
+    return round(sum(scores) / len(scores), 4) if scores else None